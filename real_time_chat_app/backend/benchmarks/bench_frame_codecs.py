@@ -0,0 +1,146 @@
+"""
+Compare WebSocket frame encodings on realistic message mixes.
+
+For every codec and mix this reports the average encoded size and the time to
+encode and decode one frame. Run from the backend directory:
+
+    python -m benchmarks.bench_frame_codecs [--frames 20000] [--seed 7]
+"""
+from typing import Callable, Dict, List
+import argparse
+import random
+import string
+import time
+from src.utils.frame_codec import CODECS
+
+
+def _text(rng: random.Random, min_words: int, max_words: int) -> str:
+    """Random lowercase words, like chat text"""
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        for _ in range(rng.randint(min_words, max_words))
+    ]
+    return " ".join(words)
+
+
+def _new_message(rng: random.Random, seq: int) -> dict:
+    """A live chat message as broadcast to a room"""
+    return {
+        "type": "new_message",
+        "room_id": rng.randint(1, 500),
+        "message_id": 100000 + seq,
+        "seq": seq,
+        "sender_id": rng.randint(1, 10000),
+        "sender_username": f"user{rng.randint(1, 10000)}",
+        "sender_full_name": f"User {rng.randint(1, 10000)}",
+        "content": _text(rng, 1, 40),
+        "created_at": "2025-10-20 10:30:00.123456"
+    }
+
+
+def _typing(rng: random.Random, seq: int) -> dict:
+    """An aggregated typing indicator"""
+    return {
+        "type": "typing_users",
+        "room_id": rng.randint(1, 500),
+        "users": [
+            {"user_id": user_id, "username": f"user{user_id}"}
+            for user_id in rng.sample(range(1, 10000), rng.randint(0, 3))
+        ]
+    }
+
+
+def _presence(rng: random.Random, seq: int) -> dict:
+    """A per-room presence diff"""
+    return {
+        "type": "presence",
+        "room_id": rng.randint(1, 500),
+        "online": rng.sample(range(1, 10000), rng.randint(0, 5)),
+        "offline": rng.sample(range(1, 10000), rng.randint(0, 5))
+    }
+
+
+def _history(rng: random.Random, seq: int) -> dict:
+    """A full replay batch"""
+    return {
+        "type": "message_history",
+        "room_id": rng.randint(1, 500),
+        "messages": [_new_message(rng, seq + i) for i in range(100)],
+        "has_more": True
+    }
+
+
+# Frame builders and their weight in each mix
+MIXES: Dict[str, Dict[Callable, int]] = {
+    "chat": {_new_message: 80, _typing: 15, _presence: 5},
+    "signals": {_new_message: 20, _typing: 50, _presence: 30},
+    "replay": {_history: 1},
+}
+
+
+def build_frames(mix: Dict[Callable, int], count: int, seed: int) -> List[dict]:
+    """
+    Generate a reproducible list of frames for a mix.
+    
+    Time Complexity: O(n) where n = count
+    Space Complexity: O(n)
+    """
+    rng = random.Random(seed)
+    builders = rng.choices(list(mix.keys()), weights=list(mix.values()), k=count)
+    return [builder(rng, seq) for seq, builder in enumerate(builders, start=1)]
+
+
+def measure(codec: type, frames: List[dict]) -> Dict[str, float]:
+    """
+    Encode and decode every frame, returning averages per frame.
+    
+    Time Complexity: O(n) where n = total size of the frames
+    Space Complexity: O(n)
+    """
+    start = time.perf_counter()
+    encoded = [codec.encode(frame) for frame in frames]
+    encode_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for data in encoded:
+        codec.decode(data)
+    decode_seconds = time.perf_counter() - start
+    
+    total_bytes = sum(len(data.encode("utf-8")) if isinstance(data, str) else len(data) for data in encoded)
+    
+    return {
+        "bytes": total_bytes / len(frames),
+        "encode_us": encode_seconds / len(frames) * 1e6,
+        "decode_us": decode_seconds / len(frames) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000, help="frames per mix (replay uses 1/100)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    
+    if len(CODECS) < 2:
+        print("msgpack is not installed, only JSON will be measured (pip install msgpack)")
+    
+    print(f"{'mix':<10}{'codec':<10}{'bytes/frame':>14}{'encode µs':>12}{'decode µs':>12}{'size vs json':>14}")
+    
+    for mix_name, mix in MIXES.items():
+        count = max(args.frames // 100, 10) if mix_name == "replay" else args.frames
+        frames = build_frames(mix, count, args.seed)
+        baseline = None
+        
+        for codec_name, codec in CODECS.items():
+            result = measure(codec, frames)
+            baseline = baseline or result["bytes"]
+            
+            print(
+                f"{mix_name:<10}{codec_name:<10}{result['bytes']:>14.1f}"
+                f"{result['encode_us']:>12.2f}{result['decode_us']:>12.2f}"
+                f"{result['bytes'] / baseline:>13.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Compare ways of turning a page of chat history into a JSON response body.
+
+Each strategy renders the same list of MessageWithSender models, the way
+GET /messages/chat/{id} returns them, and reports the CPU time per page.
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization [--messages 100] [--pages 2000]
+"""
+from typing import Callable, Dict, List
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import random
+import string
+import time
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from src.schemas.message import MessageWithSender
+from src.utils.responses import ModelJSONResponse, orjson
+
+PAGE_TYPE = List[MessageWithSender]
+_FIELD = create_response_field(name="Response_bench", type_=PAGE_TYPE)
+
+
+def build_page(count: int, seed: int) -> List[MessageWithSender]:
+    """
+    A reproducible history page with realistic text lengths.
+    
+    Time Complexity: O(n) where n = count
+    Space Complexity: O(n)
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 10, 20, 10, 30)
+    page = []
+    
+    for seq in range(1, count + 1):
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+            for _ in range(rng.randint(1, 40))
+        ]
+        sender_id = rng.randint(1, 10000)
+        page.append(MessageWithSender(
+            id=100000 + seq,
+            chat_room_id=42,
+            sender_id=sender_id,
+            seq=seq,
+            content=" ".join(words),
+            is_read=rng.random() < 0.8,
+            created_at=start + timedelta(seconds=seq * 7),
+            sender_username=f"user{sender_id}",
+            sender_full_name=f"User {sender_id}"
+        ))
+    
+    return page
+
+
+def _fastapi_path(response_class: type) -> Callable:
+    """What FastAPI does with response_model: dump, revalidate, encode"""
+    async def render(page: List[MessageWithSender]) -> bytes:
+        content = await serialize_response(field=_FIELD, response_content=page, is_coroutine=True)
+        return response_class(content).body
+    
+    return render
+
+
+async def _model_json(page: List[MessageWithSender]) -> bytes:
+    return ModelJSONResponse(page, PAGE_TYPE).body
+
+
+def strategies() -> Dict[str, Callable]:
+    """Strategies to compare, baseline first"""
+    found = {"response_model + JSONResponse": _fastapi_path(JSONResponse)}
+    if orjson is not None:
+        found["response_model + ORJSONResponse"] = _fastapi_path(ORJSONResponse)
+    found["ModelJSONResponse"] = _model_json
+    return found
+
+
+async def measure(render: Callable, page: List[MessageWithSender], pages: int) -> Dict[str, float]:
+    """
+    Render the page repeatedly and return CPU microseconds per page.
+    
+    Time Complexity: O(p * n) where p = pages, n = messages per page
+    Space Complexity: O(n)
+    """
+    body = await render(page)
+    
+    start = time.process_time()
+    for _ in range(pages):
+        await render(page)
+    seconds = time.process_time() - start
+    
+    return {"us_per_page": seconds / pages * 1e6, "bytes": len(body)}
+
+
+async def run(args: argparse.Namespace):
+    page = build_page(args.messages, args.seed)
+    baseline = None
+    
+    print(f"{'strategy':<34}{'µs/page':>10}{'bytes':>10}{'speedup':>10}")
+    
+    for name, render in strategies().items():
+        result = await measure(render, page, args.pages)
+        baseline = baseline or result["us_per_page"]
+        print(
+            f"{name:<34}{result['us_per_page']:>10.1f}{result['bytes']:>10}"
+            f"{baseline / result['us_per_page']:>9.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100, help="messages per history page")
+    parser.add_argument("--pages", type=int, default=2000, help="pages rendered per strategy")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    
+    if orjson is None:
+        print("orjson is not installed, ORJSONResponse will be skipped (pip install orjson)")
+    
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
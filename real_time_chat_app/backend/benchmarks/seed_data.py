@@ -0,0 +1,210 @@
+"""
+Generate a large synthetic dataset of users, rooms, memberships and messages.
+
+Going through /auth/register costs one bcrypt hash per user and the API
+commits once per message, far too slow for capacity testing. This writes
+rows straight to the tables instead:
+
+- every user shares one pre-computed hash of SEED_PASSWORD, so seeded users
+  can still log in (e.g. from the load test)
+- group sizes and room activity follow power laws: most rooms are small and
+  quiet, a few are huge and busy
+- rows are generated lazily and loaded in batches, with COPY on Postgres and
+  DB-API executemany elsewhere, so memory stays flat however many messages
+- messages get per-room sequence numbers and last_message_seq is set to match
+
+Run from the backend directory against an empty database:
+
+    python -m benchmarks.seed_data --database-url sqlite:///chat_seed.db \\
+        --users 100000 --rooms 50000 --messages 10000000
+"""
+from typing import Callable, Dict, Iterator, List, Optional
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+import argparse
+import random
+import time
+from sqlalchemy import bindparam, create_engine, update
+from sqlalchemy.engine import Engine
+from src.db.bulk_load import bulk_load
+from src.models import ChatRoom, RoomType
+from src.utils.security import hash_password
+
+# Password of every seeded user
+SEED_PASSWORD = "password123"
+
+# Text messages are cut from, so contents vary in length without per-row work
+_LOREM = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt "
+    "ut labore et dolore magna aliqua ut enim ad minim veniam quis nostrud exercitation ullamco "
+    "laboris nisi ut aliquip ex ea commodo consequat duis aute irure dolor in reprehenderit "
+) * 4
+
+
+def _power_law(rng: random.Random, alpha: float, minimum: int, maximum: int) -> int:
+    """Pareto-distributed integer in [minimum, maximum]"""
+    return min(maximum, int(minimum * rng.paretovariate(alpha)))
+
+
+def seed(engine: Engine, num_users: int, num_rooms: int, num_messages: int,
+         direct_ratio: float = 0.5, max_group_size: int = 500, seed: int = 7,
+         batch_size: int = 50000, days: int = 90,
+         progress: Optional[Callable[[str, int, float], None]] = None) -> Dict[str, int]:
+    """
+    Insert a synthetic dataset into an empty database.
+    
+    Time Complexity: O(u + r * s + m log r) where s = average room size
+    Space Complexity: O(r * s + batch_size), independent of m
+    
+    Args:
+        engine: Engine of a database with the schema already created
+        num_users: Users to create
+        num_rooms: Rooms to create
+        num_messages: Messages to create
+        direct_ratio: Fraction of rooms that are direct chats
+        max_group_size: Largest group room
+        seed: Random seed, the same seed gives the same dataset
+        batch_size: Rows per COPY / executemany
+        days: Messages are spread evenly over this many past days
+        progress: Called as progress(table, rows so far, seconds so far)
+    
+    Returns:
+        Number of rows inserted per table
+    """
+    rng = random.Random(seed)
+    password_hash = hash_password(SEED_PASSWORD)
+    
+    # Room memberships, kept to pick message senders; messages are streamed
+    room_members: List[List[int]] = []
+    room_types: List[str] = []
+    for _ in range(num_rooms):
+        if rng.random() < direct_ratio:
+            room_types.append(RoomType.DIRECT.value)
+            room_members.append(rng.sample(range(1, num_users + 1), 2))
+        else:
+            size = _power_law(rng, 1.5, 3, min(max_group_size, num_users))
+            room_types.append(RoomType.GROUP.value)
+            room_members.append(rng.sample(range(1, num_users + 1), size))
+    
+    # Room activity: a few rooms receive most of the messages
+    activity = list(accumulate(rng.paretovariate(1.2) for _ in range(num_rooms)))
+    last_seqs = [0] * num_rooms
+    
+    def user_rows() -> Iterator[tuple]:
+        for user_id in range(1, num_users + 1):
+            yield (user_id, f"seed{user_id}", f"seed{user_id}@example.com", password_hash,
+                   f"Seed User {user_id}", True, False)
+    
+    def room_rows() -> Iterator[tuple]:
+        for room_id, (room_type, members) in enumerate(zip(room_types, room_members), start=1):
+            name = f"Seed group {room_id}" if room_type == RoomType.GROUP.value else None
+            yield (room_id, name, room_type, members[0], 0)
+    
+    def member_rows() -> Iterator[tuple]:
+        for room_id, members in enumerate(room_members, start=1):
+            for user_id in members:
+                yield (room_id, user_id)
+    
+    def message_rows() -> Iterator[tuple]:
+        started_at = datetime.now(timezone.utc) - timedelta(days=days)
+        step = timedelta(days=days) / max(num_messages, 1)
+        read_before = int(num_messages * 0.95)
+        done = 0
+        
+        while done < num_messages:
+            count = min(batch_size, num_messages - done)
+            # One weighted draw per batch: O(log r) per message
+            room_indexes = rng.choices(range(num_rooms), cum_weights=activity, k=count)
+            
+            for i, room_index in enumerate(room_indexes, start=done):
+                last_seqs[room_index] += 1
+                start = rng.randrange(200)
+                yield (
+                    room_index + 1,
+                    rng.choice(room_members[room_index]),
+                    last_seqs[room_index],
+                    _LOREM[start:start + rng.randint(5, 200)].strip() or "hi",
+                    i < read_before,
+                    (started_at + step * i).strftime("%Y-%m-%d %H:%M:%S.%f"),
+                )
+            
+            done += count
+    
+    with engine.begin() as conn:
+        counts = {
+            "users": bulk_load(conn, "users", (
+                "id", "username", "email", "hashed_password", "full_name", "is_active", "is_verified"
+            ), user_rows(), batch_size, progress),
+            "rooms": bulk_load(conn, "chat_rooms", (
+                "id", "name", "room_type", "created_by", "last_message_seq"
+            ), room_rows(), batch_size, progress),
+            "members": bulk_load(conn, "chat_room_members", (
+                "chat_room_id", "user_id"
+            ), member_rows(), batch_size, progress),
+            "messages": bulk_load(conn, "messages", (
+                "chat_room_id", "sender_id", "seq", "content", "is_read", "created_at"
+            ), message_rows(), batch_size, progress),
+        }
+        
+        room_seqs = [{"room_id": room_id, "seq": seq} for room_id, seq in enumerate(last_seqs, start=1) if seq]
+        if room_seqs:
+            conn.execute(
+                update(ChatRoom)
+                .where(ChatRoom.id == bindparam("room_id"))
+                .values(last_message_seq=bindparam("seq")),
+                room_seqs
+            )
+        
+        if conn.dialect.name == "postgresql":
+            # Explicit ids don't advance the serial sequences
+            for table in ("users", "chat_rooms"):
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                )
+    
+    return counts
+
+
+def print_progress(table: str, rows: int, seconds: float):
+    """Progress callback printing rows loaded and throughput"""
+    print(f"\r  {table:<18} {rows:>12,} rows  {rows / max(seconds, 1e-9):>10,.0f} rows/s", end="", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--rooms", type=int, default=50_000)
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--direct-ratio", type=float, default=0.5)
+    parser.add_argument("--max-group-size", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--create-tables", action="store_true", help="create the schema from the models first")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    
+    engine = create_engine(args.database_url)
+    if args.create_tables:
+        from src.database import Base
+        Base.metadata.create_all(bind=engine)
+    
+    last_table: List[Optional[str]] = [None]
+    
+    def progress(table: str, rows: int, seconds: float):
+        if last_table[0] not in (None, table):
+            print()
+        last_table[0] = table
+        print_progress(table, rows, seconds)
+    
+    start = time.perf_counter()
+    counts = seed(
+        engine, args.users, args.rooms, args.messages,
+        direct_ratio=args.direct_ratio, max_group_size=args.max_group_size,
+        seed=args.seed, batch_size=args.batch_size, progress=progress
+    )
+    print(f"\nLoaded {counts} in {time.perf_counter() - start:.1f}s "
+          f"(seeded users log in with password {SEED_PASSWORD!r})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+End-to-end WebSocket load test.
+
+Provisions users and rooms through the REST API, opens one socket per user,
+drives a configurable message / typing / join mix and reports end-to-end
+delivery latency percentiles, fan-out throughput, error rates and server
+memory. Run from the backend directory.
+
+Against a running server (pass --server-pid to report its memory):
+
+    python -m benchmarks.ws_load_test --url http://127.0.0.1:8000 --users 1000 --rooms 100
+
+In-process (serves src.main:app with uvicorn on a free port in a background
+thread, using DATABASE_URL from the environment / .env; add --create-tables
+for an empty database):
+
+    python -m benchmarks.ws_load_test --in-process --users 200 --rooms 20 --duration 30
+
+Thousands of sockets need a high enough open-file limit (ulimit -n). Per-user
+rate limits still apply, keep --rate under RATE_LIMIT_MESSAGE_PER_SECOND or
+disable them with RATE_LIMIT_ENABLED=false to measure raw capacity.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+
+import httpx
+import websockets
+
+# Marker prefix of load-test message contents: LT|<send time in ns>
+CONTENT_PREFIX = "LT|"
+
+
+class LoadStats:
+    """
+    Counters and latency samples collected by all simulated clients.
+    """
+    
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.sent: Dict[str, int] = {"message": 0, "typing": 0, "join": 0}
+        self.received: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.connected = 0
+    
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+    
+    def record_frame(self, frame: dict):
+        """
+        Count a received frame, timing load-test messages.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        frame_type = frame.get("type")
+        self.received[frame_type] = self.received.get(frame_type, 0) + 1
+        
+        if frame_type == "new_message" and frame.get("content", "").startswith(CONTENT_PREFIX):
+            sent_ns = int(frame["content"][len(CONTENT_PREFIX):])
+            self.latencies_ms.append((time.time_ns() - sent_ns) / 1e6)
+        elif frame_type in ("error", "throttled"):
+            self.error(frame_type)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples.
+    
+    Time Complexity: O(n log n)
+    Space Complexity: O(n)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """
+    Resident memory of a process in MB, from /proc (Linux only).
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def start_in_process_server(create_tables: bool = False) -> Tuple[str, Callable[[], None]]:
+    """
+    Serve the app with uvicorn on a free local port in a daemon thread.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    
+    Args:
+        create_tables: Create the schema from the models first (empty databases)
+    
+    Returns:
+        Tuple of (base URL, function stopping the server)
+    """
+    import uvicorn
+    from src.main import app
+    
+    if create_tables:
+        from src.database import Base, engine
+        Base.metadata.create_all(bind=engine)
+    
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    
+    while not server.started:
+        time.sleep(0.05)
+    
+    def stop():
+        server.should_exit = True
+        thread.join()
+    
+    return f"http://127.0.0.1:{port}", stop
+
+
+async def provision(base_url: str, num_users: int, num_rooms: int, max_room_size: int,
+                    rng: random.Random, concurrency: int) -> Tuple[List[Tuple[int, str]], Dict[int, List[int]]]:
+    """
+    Register users and create group rooms with power-law sizes.
+    
+    Time Complexity: O(u + r * s) where s = average room size
+    Space Complexity: O(u + r * s)
+    
+    Returns:
+        Tuple of ([(user_id, access_token)], {user_id: [room_id, ...]})
+    """
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(concurrency)
+    users: List[Optional[Tuple[int, str]]] = [None] * num_users
+    
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+        async def register(i: int):
+            async with semaphore:
+                response = await http.post("/auth/register", json={
+                    "username": f"lt{run_id}u{i}",
+                    "email": f"lt{run_id}u{i}@example.com",
+                    "password": "loadtest123",
+                    "full_name": f"Load Test {i}"
+                })
+                response.raise_for_status()
+                data = response.json()
+                users[i] = (data["user"]["id"], data["tokens"]["access_token"])
+        
+        await asyncio.gather(*(register(i) for i in range(num_users)))
+        
+        user_rooms: Dict[int, List[int]] = {user_id: [] for user_id, _ in users}
+        
+        async def create_room(i: int):
+            # Pareto sizes: most rooms are small, a few are very large
+            size = max(2, min(max_room_size, num_users, int(rng.paretovariate(1.2) * 2)))
+            members = rng.sample(users, size)
+            (creator_id, creator_token), others = members[0], members[1:]
+            
+            async with semaphore:
+                response = await http.post(
+                    "/groups/create",
+                    json={"name": f"Load room {i}", "member_ids": [user_id for user_id, _ in others]},
+                    headers={"Authorization": f"Bearer {creator_token}"}
+                )
+                response.raise_for_status()
+                room_id = response.json()["group"]["id"]
+            
+            for user_id, _ in members:
+                user_rooms[user_id].append(room_id)
+        
+        await asyncio.gather(*(create_room(i) for i in range(num_rooms)))
+    
+    return users, user_rooms
+
+
+async def run_client(ws_url: str, user_id: int, token: str, room_ids: List[int], args,
+                     stats: LoadStats, stop_at: float, rng: random.Random):
+    """
+    One simulated user: connect, join rooms, then send the configured mix.
+    
+    Time Complexity: O(d * rate) where d = duration
+    Space Complexity: O(1)
+    """
+    query = f"?batch_ms={args.batch_ms}" if args.batch_ms else ""
+    actions = ["message", "typing", "join"]
+    weights = [args.message_weight, args.typing_weight, args.join_weight]
+    
+    try:
+        async with websockets.connect(f"{ws_url}/ws/{token}{query}", max_size=None, open_timeout=30) as ws:
+            stats.connected += 1
+            
+            async def reader():
+                async for raw in ws:
+                    data = json.loads(raw)
+                    for frame in (data if isinstance(data, list) else [data]):
+                        stats.record_frame(frame)
+                        if frame.get("type") == "ping":
+                            await ws.send(json.dumps({"type": "pong"}))
+            
+            reader_task = asyncio.create_task(reader())
+            
+            for room_id in room_ids:
+                await ws.send(json.dumps({"type": "join_room", "room_id": room_id}))
+            
+            while room_ids and time.monotonic() < stop_at:
+                await asyncio.sleep(rng.expovariate(args.rate))
+                room_id = rng.choice(room_ids)
+                action = rng.choices(actions, weights=weights)[0]
+                
+                if action == "message":
+                    frame = {"type": "message", "room_id": room_id, "content": f"{CONTENT_PREFIX}{time.time_ns()}"}
+                elif action == "typing":
+                    frame = {"type": "typing", "room_id": room_id}
+                else:
+                    await ws.send(json.dumps({"type": "leave_room", "room_id": room_id}))
+                    frame = {"type": "join_room", "room_id": room_id}
+                
+                await ws.send(json.dumps(frame))
+                stats.sent[action] += 1
+            
+            # Let in-flight deliveries arrive before closing
+            await asyncio.sleep(args.drain_seconds)
+            reader_task.cancel()
+    except websockets.ConnectionClosed as e:
+        stats.error(f"closed_{e.code}")
+    except Exception as e:
+        stats.error(type(e).__name__)
+
+
+async def run(args) -> dict:
+    """
+    Provision, connect every client, drive load and summarize.
+    
+    Time Complexity: O(u * d * rate)
+    Space Complexity: O(m) where m = delivered load-test messages
+    """
+    rng = random.Random(args.seed)
+    server_pid = args.server_pid
+    stop_server = None
+    
+    if args.in_process:
+        base_url, stop_server = start_in_process_server(args.create_tables)
+        server_pid = os.getpid()
+    else:
+        base_url = args.url.rstrip("/")
+    
+    ws_url = base_url.replace("http", "ws", 1)
+    
+    started = time.monotonic()
+    users, user_rooms = await provision(base_url, args.users, args.rooms, args.max_room_size, rng, args.concurrency)
+    provision_seconds = time.monotonic() - started
+    memory_before = rss_mb(server_pid) if server_pid else None
+    
+    stats = LoadStats()
+    ramp_seconds = args.users / args.connect_rate
+    stop_at = time.monotonic() + ramp_seconds + args.duration
+    clients = []
+    
+    # Ramp up at --connect-rate to stay under the server's admission limits
+    for user_id, token in users:
+        clients.append(asyncio.create_task(run_client(
+            ws_url, user_id, token, user_rooms[user_id], args, stats, stop_at, random.Random(rng.random())
+        )))
+        await asyncio.sleep(1 / args.connect_rate)
+    
+    load_started = time.monotonic()
+    memory_peak = memory_before
+    while not all(client.done() for client in clients):
+        await asyncio.sleep(1)
+        current = rss_mb(server_pid) if server_pid else None
+        if current is not None:
+            memory_peak = max(memory_peak or 0, current)
+    elapsed = time.monotonic() - load_started + ramp_seconds
+    
+    if stop_server:
+        stop_server()
+    
+    delivered = stats.received.get("new_message", 0)
+    total_errors = sum(stats.errors.values())
+    total_sent = sum(stats.sent.values())
+    
+    return {
+        "users": args.users,
+        "rooms": args.rooms,
+        "connected": stats.connected,
+        "provision_seconds": round(provision_seconds, 1),
+        "load_seconds": round(elapsed, 1),
+        "sent": stats.sent,
+        "received": stats.received,
+        "delivered_messages": delivered,
+        "fanout_per_second": round(delivered / elapsed, 1) if elapsed else 0,
+        "latency_ms": {
+            "p50": round(percentile(stats.latencies_ms, 50), 2),
+            "p90": round(percentile(stats.latencies_ms, 90), 2),
+            "p99": round(percentile(stats.latencies_ms, 99), 2),
+            "max": round(max(stats.latencies_ms, default=0.0), 2),
+        },
+        "errors": stats.errors,
+        "error_rate": round(total_errors / total_sent, 4) if total_sent else 0,
+        "server_rss_mb": {"before": memory_before, "peak": memory_peak},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of a running server, e.g. http://127.0.0.1:8000")
+    target.add_argument("--in-process", action="store_true", help="serve the app in this process")
+    parser.add_argument("--create-tables", action="store_true", help="with --in-process, create the schema first")
+    parser.add_argument("--server-pid", type=int, help="PID of the server, to report its memory")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--max-room-size", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after ramp-up")
+    parser.add_argument("--rate", type=float, default=0.5, help="frames per second per client")
+    parser.add_argument("--message-weight", type=float, default=70)
+    parser.add_argument("--typing-weight", type=float, default=25)
+    parser.add_argument("--join-weight", type=float, default=5)
+    parser.add_argument("--connect-rate", type=float, default=100, help="new sockets per second")
+    parser.add_argument("--batch-ms", type=int, default=0, help="opt clients into frame batching")
+    parser.add_argument("--concurrency", type=int, default=32, help="parallel provisioning requests")
+    parser.add_argument("--drain-seconds", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,19 +25,20 @@
 #         env_file = ".env"
 #         case_sensitive = True 
 
-    
+
 # @lru_cache
 # def get_settings() -> Settings:
 #     """
 #     Returns cached settings instance.
 #     lru_cache ensures we only load .env once.
-    
+
 #     Time Complexity: O(1)
 #     Space Complexity: O(1)
 #     """
 #     return Settings()
 
 
+from typing import Dict
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 import os
@@ -55,16 +56,84 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     
+    # SQLite (used when DATABASE_URL starts with sqlite://)
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # NORMAL is durable across app crashes in WAL mode
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE_BYTES: int = 268435456
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SERIALIZE_WRITES: bool = True
+    
     # JWT Authentication
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    ADMIN_TOKEN: str = ""  # shared secret for operator-only features (X-Admin-Token); empty = disabled
     
     # App Settings
     DEBUG: bool = True
     APP_NAME: str = "RealtimeChatApp"
     
+    # Logging (queued, written to stdout by a background thread)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never waited on
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # e.g. {"ws.join_room": 0.01}, JSON in the environment
+    
+    # Observability
+    METRICS_ENABLED: bool = True
+    QUERY_TRACKING_ENABLED: bool = True
+    QUERY_REPEAT_THRESHOLD: int = 10  # same statement shape this often in one request = likely N+1
+    QUERY_BUDGET_ENFORCE: bool = False  # raise instead of warn when a @query_budget is exceeded
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.1  # how often scheduling delay is sampled
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.25  # stall length that captures the blocking stack
+    TRACING_ENABLED: bool = True  # per-stage histograms and Server-Timing headers
+    TRACE_EVENTS_ENABLED: bool = False  # also log every trace as a structured "trace" event
+    TRACE_EVENTS_MIN_MS: float = 0.0  # only log traces at least this slow
+    PROFILING_ENABLED: bool = False  # install the per-request profiler (X-Profile header / sampling)
+    PROFILE_SAMPLE_PERCENT: float = 0.0  # share of requests profiled without the header
+    PROFILE_DIR: str = "profiles"
+    
+    # WebSocket Settings
+    WS_REPLAY_BATCH_SIZE: int = 100
+    WS_REPLAY_MAX_MESSAGES: int = 1000
+    WS_RESUME_WINDOW_SECONDS: int = 120
+    WS_RESUME_BUFFER_SIZE: int = 200
+    WS_TYPING_THROTTLE_SECONDS: float = 1.0
+    WS_TYPING_TTL_SECONDS: float = 5.0
+    WS_TYPING_TICK_SECONDS: float = 0.5
+    WS_PRESENCE_TIMEOUT_SECONDS: float = 60.0
+    WS_PRESENCE_TICK_SECONDS: float = 1.0
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 25.0
+    WS_IDLE_TIMEOUT_SECONDS: float = 60.0
+    WS_HEARTBEAT_TICK_SECONDS: float = 1.0
+    WS_OUTBOUND_QUEUE_SIZE: int = 256
+    WS_SLOW_CONSUMER_POLICY: str = "shed"  # "shed" or "disconnect"
+    WS_BATCH_MAX_WINDOW_MS: int = 100
+    WS_BATCH_MAX_FRAMES: int = 100
+    WS_MAX_CONNECTIONS: int = 10000
+    WS_MAX_ACCEPTS_PER_SECOND: float = 200.0
+    WS_ACCEPT_BURST: int = 400
+    WS_USER_CONNECTS_PER_SECOND: float = 0.5
+    WS_USER_CONNECT_BURST: int = 5
+    WS_ADMISSION_RETRY_SECONDS: float = 5.0
+    
+    # History export (streamed NDJSON)
+    EXPORT_BATCH_SIZE: int = 1000  # rows per server-side cursor fetch and per response chunk
+    EXPORT_GZIP_LEVEL: int = 6
+    
+    # Rate Limiting (token buckets per user: refill per second, burst)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MESSAGE_PER_SECOND: float = 5.0
+    RATE_LIMIT_MESSAGE_BURST: int = 20
+    RATE_LIMIT_TYPING_PER_SECOND: float = 5.0
+    RATE_LIMIT_TYPING_BURST: int = 30
+    RATE_LIMIT_JOIN_PER_SECOND: float = 2.0
+    RATE_LIMIT_JOIN_BURST: int = 20
+    RATE_LIMIT_REST_SEND_PER_SECOND: float = 5.0
+    RATE_LIMIT_REST_SEND_BURST: int = 20
+    
     class Config:
         env_file = str(ENV_FILE)
         case_sensitive = True
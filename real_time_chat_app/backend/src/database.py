@@ -5,20 +5,37 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from src.config import get_settings
+from src.db.sqlite import configure_sqlite_engine, SQLiteWriteLock
+from src.utils import query_tracker
 
 settings = get_settings()
 
+# Embedded mode: a SQLite file instead of a database server
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+
 # Create database engine
 # pool_pre_ping=True checks connection health before using
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    echo=settings.DEBUG  # Log SQL queries in debug mode
+    echo=settings.DEBUG,  # Log SQL queries in debug mode
+    # Sessions move between the event loop and threadpool threads
+    connect_args={"check_same_thread": False} if is_sqlite else {}
 )
 
 # Session factory for database operations
 SessionLocal = sessionmaker(autoflush=False, autocommit = False, bind=engine)
 
+if is_sqlite:
+    configure_sqlite_engine(engine, settings)
+    
+    if settings.SQLITE_SERIALIZE_WRITES:
+        SQLiteWriteLock(settings.SQLITE_BUSY_TIMEOUT_MS / 1000).install(SessionLocal)
+
+# Per-request query counts and N+1 warnings
+if settings.QUERY_TRACKING_ENABLED:
+    query_tracker.install(engine)
+
 # Base class for all models
 Base = declarative_base()
 
@@ -0,0 +1,138 @@
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+from itertools import islice
+import csv
+import io
+import time
+from sqlalchemy.engine import Connection
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    """Group a row stream into lists of at most size rows"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_loader(conn: Connection, cursor, table: str, columns: Sequence[str]) -> Callable[[List[tuple]], None]:
+    """Batch loader using Postgres COPY ... FROM STDIN (psycopg2)"""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    
+    def load(batch: List[tuple]):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    
+    return load
+
+
+def _executemany_loader(conn: Connection, cursor, table: str, columns: Sequence[str]) -> Callable[[List[tuple]], None]:
+    """Batch loader using the driver's executemany with positional rows"""
+    marker = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([marker] * len(columns))})"
+    
+    def load(batch: List[tuple]):
+        cursor.executemany(sql, batch)
+    
+    return load
+
+
+def bulk_load(conn: Connection, table: str, columns: Sequence[str], rows: Iterable[tuple],
+              batch_size: int, progress: Optional[Callable[[str, int, float], None]] = None) -> int:
+    """
+    Stream rows into a table in batches through the fastest bulk path.
+    
+    Time Complexity: O(n)
+    Space Complexity: O(batch_size)
+    
+    Args:
+        conn: Connection inside a transaction
+        table: Table name
+        columns: Column names, in the order of each row tuple
+        rows: Iterable of row tuples, consumed lazily
+        batch_size: Rows per COPY / executemany
+        progress: Called as progress(table, rows so far, seconds so far)
+    
+    Returns:
+        Number of rows loaded
+    """
+    loader = _copy_loader if conn.dialect.name == "postgresql" else _executemany_loader
+    # Raw DBAPI cursor for COPY / driver executemany, closed when done
+    cursor = conn.connection.driver_connection.cursor()
+    start = time.perf_counter()
+    loaded = 0
+    
+    try:
+        load = loader(conn, cursor, table, columns)
+        
+        for batch in _batches(rows, batch_size):
+            load(batch)
+            loaded += len(batch)
+            if progress:
+                progress(table, loaded, time.perf_counter() - start)
+    finally:
+        cursor.close()
+    
+    return loaded
+
+
+def deferrable_indexes(conn: Connection, table: str) -> List[Tuple[str, str]]:
+    """
+    Secondary indexes of a table that are safe to drop during a bulk load.
+    
+    Unique indexes (primary keys, uq_messages_room_seq) are kept: they
+    enforce correctness while rows go in. Plain indexes only speed up
+    reads, and building one once after the load is much cheaper than
+    updating it for every row.
+    
+    Time Complexity: O(i) where i = indexes on the table
+    Space Complexity: O(i)
+    
+    Args:
+        conn: Connection
+        table: Table name
+    
+    Returns:
+        List of (index name, CREATE INDEX statement to restore it)
+    """
+    if conn.dialect.name == "postgresql":
+        rows = conn.exec_driver_sql(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %(table)s",
+            {"table": table}
+        ).all()
+    elif conn.dialect.name == "sqlite":
+        # Automatic indexes (sql IS NULL) belong to constraints
+        rows = conn.exec_driver_sql(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,)
+        ).all()
+    else:
+        return []
+    
+    return [(name, definition) for name, definition in rows if "UNIQUE" not in definition.upper()]
+
+
+def drop_indexes(conn: Connection, indexes: Sequence[Tuple[str, str]]):
+    """
+    Drop indexes returned by deferrable_indexes().
+    
+    Time Complexity: O(i)
+    Space Complexity: O(1)
+    """
+    for name, _ in indexes:
+        conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
+
+
+def restore_indexes(conn: Connection, indexes: Sequence[Tuple[str, str]]):
+    """
+    Recreate dropped indexes from their saved definitions.
+    
+    Time Complexity: O(i * n log n) where n = rows in the table
+    Space Complexity: O(n) for the sort, inside the database
+    """
+    for _, definition in indexes:
+        conn.exec_driver_sql(definition)
@@ -0,0 +1,392 @@
+"""
+Bulk-load message history from another chat system.
+
+Records are read in chunks from NDJSON or CSV (optionally gzipped) and each
+chunk is loaded in one transaction through COPY on Postgres or executemany
+elsewhere, instead of one commit per message through create_message.
+Fields per record, as written by GET /messages/rooms/{id}/export:
+
+    chat_room_id, sender_id, content, created_at (ISO 8601), is_read (optional)
+
+Room and sender ids are external ids mapped through two-column CSV files
+(external_id,internal_id); without a map they must already be our ids.
+Messages get the next sequence numbers of their room, in input order, so
+the input should be chronological per room. Records whose room or sender
+is unknown are skipped and counted. Run from the backend directory:
+
+    python -m src.db.message_import old_chat.ndjson.gz \\
+        --user-map users.csv --room-map rooms.csv --defer-indexes
+
+Every committed chunk prints the input position; after a failure, rerun
+with --skip <position> to carry on where the last commit ended.
+"""
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Set
+from datetime import datetime, timezone
+from itertools import islice
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+from sqlalchemy import bindparam, create_engine, select, update
+from sqlalchemy.engine import Connection, Engine
+from src.db.bulk_load import bulk_load, deferrable_indexes, drop_indexes, restore_indexes
+from src.models import ChatRoom, User
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+MESSAGE_COLUMNS = ("chat_room_id", "sender_id", "seq", "content", "is_read", "created_at")
+
+# Ids looked up per IN (...) query; SQLite caps bound parameters
+_LOOKUP_BATCH = 500
+
+_TRUE = {"1", "true", "t", "yes", "y"}
+
+
+def read_ndjson(stream: IO[str]) -> Iterator[dict]:
+    """One record per non-empty line"""
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in stream:
+        if line.strip():
+            yield loads(line)
+
+
+def read_csv(stream: IO[str]) -> Iterator[dict]:
+    """One record per row, keyed by the header row"""
+    yield from csv.DictReader(stream)
+
+
+READERS: Dict[str, Callable[[IO[str]], Iterator[dict]]] = {
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+}
+
+
+def load_id_map(path: str) -> Dict[str, int]:
+    """
+    Read an external_id,internal_id CSV file (header row optional).
+    
+    Time Complexity: O(n) where n = rows in the file
+    Space Complexity: O(n)
+    """
+    id_map = {}
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[1].strip().isdigit():
+                id_map[row[0].strip()] = int(row[1])
+    return id_map
+
+
+class ImportStats:
+    """
+    Progress of an import.
+    
+    Structure:
+    - consumed: input records read, including skipped ones (--skip position)
+    - loaded: messages inserted
+    - skipped: {reason: records}, reasons "bad_record", "unknown_room", "unknown_sender"
+    """
+    
+    def __init__(self, consumed: int = 0):
+        self.start = time.perf_counter()
+        self.consumed = consumed
+        self.loaded = 0
+        self.skipped: Dict[str, int] = {}
+    
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+    
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.start
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.loaded / max(self.seconds, 1e-9)
+    
+    def as_dict(self) -> dict:
+        return {
+            "consumed": self.consumed,
+            "loaded": self.loaded,
+            "skipped": dict(self.skipped),
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+class MessageImporter:
+    """
+    Loads message records into the messages table in large transactions.
+    
+    Per chunk: the touched rooms are locked and their last_message_seq read
+    (FOR UPDATE on Postgres, so live senders to those rooms wait instead of
+    colliding on seq), new sender ids are checked in bulk, rows are bulk
+    loaded and the room counters written back, all in one transaction.
+    
+    Structure:
+    - user_map / room_map: external id -> our id, None to use ids as is
+    - known_users / missing_users: sender ids already checked
+    - missing_rooms: room ids already found not to exist
+    """
+    
+    def __init__(self, engine: Engine, user_map: Optional[Dict[str, int]] = None,
+                 room_map: Optional[Dict[str, int]] = None, chunk_size: int = 100_000,
+                 batch_size: int = 10_000, progress: Optional[Callable[[ImportStats], None]] = None):
+        """
+        Initialize message importer.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            engine: Engine of the target database
+            user_map: External sender id -> user id
+            room_map: External room id -> chat room id
+            chunk_size: Records per transaction
+            batch_size: Rows per COPY / executemany
+            progress: Called with the stats after every committed chunk
+        """
+        self.engine = engine
+        self.user_map = user_map
+        self.room_map = room_map
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.progress = progress
+        self.known_users: Set[int] = set()
+        self.missing_users: Set[int] = set()
+        self.missing_rooms: Set[int] = set()
+    
+    
+    @staticmethod
+    def _map_id(value, id_map: Optional[Dict[str, int]]) -> Optional[int]:
+        if value is None or value == "":
+            return None
+        if id_map is not None:
+            return id_map.get(str(value))
+        return int(value)
+    
+    
+    def _parse(self, record: dict, stats: ImportStats) -> Optional[tuple]:
+        """
+        Validate one record into (room_id, sender_id, content, is_read, created_at).
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        try:
+            room_id = self._map_id(record.get("chat_room_id"), self.room_map)
+            sender_value = record.get("sender_id")
+            sender_id = self._map_id(sender_value, self.user_map)
+            content = record["content"]
+            created_at = datetime.fromisoformat(record["created_at"])
+        except (KeyError, TypeError, ValueError):
+            stats.skip("bad_record")
+            return None
+        
+        if not content:
+            stats.skip("bad_record")
+            return None
+        if room_id is None:
+            stats.skip("unknown_room")
+            return None
+        if sender_id is None and sender_value not in (None, ""):
+            stats.skip("unknown_sender")
+            return None
+        
+        # Kept as naive UTC; naive input is taken to be UTC already
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        # Imported history counts as read unless the record says otherwise
+        is_read = record.get("is_read")
+        if is_read is None or is_read == "":
+            is_read = True
+        elif isinstance(is_read, str):
+            is_read = is_read.strip().lower() in _TRUE
+        
+        return room_id, sender_id, content, bool(is_read), created_at
+    
+    
+    def _check_users(self, conn: Connection, user_ids: Set[int]):
+        """Sort sender ids not seen before into known_users / missing_users"""
+        new_ids = list(user_ids - self.known_users - self.missing_users)
+        
+        for start in range(0, len(new_ids), _LOOKUP_BATCH):
+            batch = new_ids[start:start + _LOOKUP_BATCH]
+            found = set(conn.execute(select(User.id).where(User.id.in_(batch))).scalars())
+            self.known_users |= found
+            self.missing_users |= set(batch) - found
+    
+    
+    def _lock_rooms(self, conn: Connection, room_ids: Set[int]) -> Dict[int, int]:
+        """Lock the chunk's rooms and return {room_id: last_message_seq}"""
+        ids = list(room_ids - self.missing_rooms)
+        seqs = {}
+        
+        for start in range(0, len(ids), _LOOKUP_BATCH):
+            batch = ids[start:start + _LOOKUP_BATCH]
+            rows = conn.execute(
+                select(ChatRoom.id, ChatRoom.last_message_seq)
+                .where(ChatRoom.id.in_(batch))
+                .order_by(ChatRoom.id)  # fixed lock order, so concurrent imports can't deadlock
+                .with_for_update()
+            ).all()
+            seqs.update(rows)
+            self.missing_rooms |= set(batch) - seqs.keys()
+        
+        return seqs
+    
+    
+    def _load_chunk(self, parsed: List[tuple], stats: ImportStats):
+        """
+        Insert one chunk of parsed records and bump the room counters.
+        
+        Time Complexity: O(c) where c = chunk size
+        Space Complexity: O(c)
+        """
+        with self.engine.begin() as conn:
+            seqs = self._lock_rooms(conn, {room_id for room_id, *_ in parsed})
+            self._check_users(conn, {sender_id for _, sender_id, *_ in parsed if sender_id is not None})
+            
+            postgres = conn.dialect.name == "postgresql"
+            rows = []
+            
+            for room_id, sender_id, content, is_read, created_at in parsed:
+                if room_id not in seqs:
+                    stats.skip("unknown_room")
+                    continue
+                if sender_id is not None and sender_id not in self.known_users:
+                    stats.skip("unknown_sender")
+                    continue
+                
+                seqs[room_id] += 1
+                rows.append((
+                    room_id, sender_id, seqs[room_id], content, is_read,
+                    # Other drivers get the naive UTC text SQLAlchemy stores
+                    created_at.replace(tzinfo=timezone.utc) if postgres else created_at.isoformat(" ", "microseconds")
+                ))
+            
+            if not rows:
+                return
+            
+            stats.loaded += bulk_load(conn, "messages", MESSAGE_COLUMNS, rows, self.batch_size)
+            
+            touched = {row[0] for row in rows}
+            conn.execute(
+                update(ChatRoom)
+                .where(ChatRoom.id == bindparam("room_id"))
+                .values(last_message_seq=bindparam("seq")),
+                [{"room_id": room_id, "seq": seqs[room_id]} for room_id in touched]
+            )
+    
+    
+    def run(self, records: Iterable[dict], skip: int = 0, defer_indexes: bool = False) -> ImportStats:
+        """
+        Import every record, committing once per chunk.
+        
+        Time Complexity: O(n) where n = records, plus one index build per
+            deferred index
+        Space Complexity: O(c + u) where c = chunk size, u = distinct senders
+        
+        Args:
+            records: Parsed input records, consumed lazily
+            skip: Records to pass over first (resume after a failure)
+            defer_indexes: Drop the plain indexes on messages for the load
+                and rebuild them at the end (slows reads meanwhile)
+        
+        Returns:
+            Final stats
+        """
+        records = iter(records)
+        for _ in islice(records, skip):
+            pass
+        
+        stats = ImportStats(consumed=skip)
+        indexes = []
+        
+        if defer_indexes:
+            with self.engine.begin() as conn:
+                indexes = deferrable_indexes(conn, "messages")
+                drop_indexes(conn, indexes)
+        
+        try:
+            while True:
+                chunk = list(islice(records, self.chunk_size))
+                if not chunk:
+                    break
+                
+                parsed = [row for row in (self._parse(record, stats) for record in chunk) if row]
+                if parsed:
+                    self._load_chunk(parsed, stats)
+                
+                stats.consumed += len(chunk)
+                if self.progress:
+                    self.progress(stats)
+        finally:
+            if indexes:
+                with self.engine.begin() as conn:
+                    restore_indexes(conn, indexes)
+        
+        if stats.loaded and self.engine.dialect.name == "postgresql":
+            with self.engine.begin() as conn:
+                conn.exec_driver_sql("ANALYZE messages")
+        
+        return stats
+
+
+def print_progress(stats: ImportStats):
+    """Progress callback printing the resume position and throughput"""
+    print(f"\r  input {stats.consumed:>14,}  loaded {stats.loaded:>14,}  "
+          f"skipped {sum(stats.skipped.values()):>10,}  {stats.rows_per_second:>10,.0f} rows/s",
+          end="", flush=True)
+
+
+def _open(path: str) -> IO[str]:
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="NDJSON or CSV file, .gz allowed, - for stdin")
+    parser.add_argument("--format", choices=READERS, help="default: from the file name, else ndjson")
+    parser.add_argument("--database-url", help="defaults to the app's DATABASE_URL")
+    parser.add_argument("--user-map", help="CSV of external_id,user_id")
+    parser.add_argument("--room-map", help="CSV of external_id,chat_room_id")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="records per transaction")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="rows per COPY / executemany")
+    parser.add_argument("--skip", type=int, default=0, help="input records to pass over (resume)")
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="drop plain indexes on messages during the load, rebuild after")
+    args = parser.parse_args()
+    
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from src.database import engine
+    
+    input_format = args.format or ("csv" if ".csv" in args.input else "ndjson")
+    importer = MessageImporter(
+        engine,
+        user_map=load_id_map(args.user_map) if args.user_map else None,
+        room_map=load_id_map(args.room_map) if args.room_map else None,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        progress=print_progress
+    )
+    
+    with _open(args.input) as stream:
+        stats = importer.run(READERS[input_format](stream), skip=args.skip, defer_indexes=args.defer_indexes)
+    
+    print(f"\nImported {stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+-- Per-room message sequence numbers
+-- Run once on databases created before init_schema.sql gained these columns.
+
+ALTER TABLE chat_rooms ADD COLUMN IF NOT EXISTS last_message_seq INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS seq INTEGER;
+
+-- Backfill existing messages in (created_at, id) order within each room
+UPDATE messages m
+SET seq = numbered.seq
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY chat_room_id ORDER BY created_at, id) AS seq
+    FROM messages
+) AS numbered
+WHERE m.id = numbered.id;
+
+UPDATE chat_rooms r
+SET last_message_seq = COALESCE((SELECT MAX(seq) FROM messages WHERE chat_room_id = r.id), 0);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_messages_room_seq ON messages(chat_room_id, seq);
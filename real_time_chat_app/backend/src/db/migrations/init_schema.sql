@@ -17,6 +17,7 @@ CREATE TABLE IF NOT EXISTS chat_rooms(
     name VARCHAR(225), -- NULL for 1-to-1, has value for groups
     room_type VARCHAR(100) NOT NULL CHECK (room_type IN ('direct', 'group')),
     created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    last_message_seq INTEGER NOT NULL DEFAULT 0, -- last per-room sequence handed out
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 
@@ -36,6 +37,7 @@ CREATE TABLE IF NOT EXISTS messages(
     id SERIAL PRIMARY KEY,
     chat_room_id INTEGER REFERENCES chat_rooms(id) ON DELETE CASCADE,
     sender_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    seq INTEGER, -- position of the message within its chat room
     content TEXT NOT NULL,
     is_read BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -54,6 +56,7 @@ CREATE TABLE IF NOT EXISTS refresh_tokens(
 CREATE INDEX IF NOT EXISTS idx_messages_chat_room ON messages(chat_room_id); -- get all messages find in this chat room id
 CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages(sender_id); -- use sender id to find all the messages they send
 CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_messages_room_seq ON messages(chat_room_id, seq); -- replay and gap detection by sequence
 CREATE INDEX IF NOT EXISTS idx_chat_room_member_user ON chat_room_members(user_id); -- find chat room user is
 CREATE INDEX IF NOT EXISTS idx_refresh_token_user ON refresh_tokens(user_id) 
 
@@ -0,0 +1,144 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+import threading
+
+
+def configure_sqlite_engine(engine: Engine, settings):
+    """
+    Tune every new SQLite connection and fix pysqlite's transaction handling.
+    
+    - WAL journal: readers never block the writer and vice versa
+    - synchronous=NORMAL: fsync at checkpoints instead of every commit
+    - larger page cache, memory-mapped reads, temp tables in memory
+    - busy_timeout: wait for a lock instead of failing with "database is locked"
+    - foreign_keys=ON: SQLite ignores ON DELETE CASCADE without it
+    
+    pysqlite opens transactions lazily and mishandles SAVEPOINT, so its own
+    transaction handling is turned off and SQLAlchemy emits BEGIN itself.
+    
+    Time Complexity: O(1) per connection
+    Space Complexity: O(1)
+    
+    Args:
+        engine: Engine created for a sqlite:// URL
+        settings: Application settings
+    """
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_BYTES}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+class SQLiteWriteLock:
+    """
+    Lets one session at a time write to a SQLite database.
+    
+    SQLite allows a single writer. When two transactions both try to write,
+    the loser spins in busy_timeout or, if it already read in the same
+    transaction, fails at once with "database is locked". Queueing writers
+    in-process in front of the database avoids both: a session takes the lock
+    before its first write (ORM flush or INSERT/UPDATE/DELETE statement) and
+    releases it when its transaction ends. Read-only sessions never touch it.
+    
+    A session usually reads before it writes (e.g. "is this username
+    taken?"), and in WAL mode a read transaction that another writer has
+    committed past can never be upgraded to a write. So once a session gets
+    the lock, its still read-only transaction is restarted as BEGIN IMMEDIATE:
+    later statements see the latest data, like Postgres' default READ
+    COMMITTED, and writers in other processes wait in busy_timeout.
+    
+    The WebSocket router runs sessions on the event loop thread, so a waiter
+    must never block forever behind a session paused at an await: the lock
+    is taken with a timeout, after which SQLite's own busy handling applies.
+    
+    Structure:
+    - lock: threading.Lock shared by every session of one sessionmaker
+    - session.info[INFO_KEY]: True while that session holds the lock, False
+      if it timed out waiting (it then writes without the lock)
+    """
+    
+    INFO_KEY = "sqlite_write_lock"
+    
+    def __init__(self, timeout_seconds: float):
+        """
+        Initialize write lock.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            timeout_seconds: Longest a writer waits for the lock
+        """
+        self.lock = threading.Lock()
+        self.timeout_seconds = timeout_seconds
+    
+    
+    def install(self, session_factory: sessionmaker):
+        """
+        Hook the lock into every session made by a session factory.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        event.listen(session_factory, "do_orm_execute", self._on_execute)
+        event.listen(session_factory, "before_flush", self._on_flush)
+        event.listen(session_factory, "after_transaction_end", self._on_transaction_end)
+    
+    
+    def acquire(self, session: Session):
+        """
+        Take the lock for a session's transaction, once per transaction.
+        
+        Time Complexity: O(1), plus any wait for the current writer
+        Space Complexity: O(1)
+        """
+        if self.INFO_KEY in session.info:
+            return
+        
+        session.info[self.INFO_KEY] = self.lock.acquire(timeout=self.timeout_seconds)
+        
+        # Nothing written yet: swap the read snapshot for a write transaction
+        dbapi_connection = session.connection().connection.driver_connection
+        if dbapi_connection.in_transaction:
+            dbapi_connection.execute("COMMIT")
+        dbapi_connection.execute("BEGIN IMMEDIATE")
+    
+    
+    def release(self, session: Session):
+        """
+        Give the lock back if the session holds it.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if session.info.pop(self.INFO_KEY, False):
+            self.lock.release()
+    
+    
+    def _on_execute(self, orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            self.acquire(orm_execute_state.session)
+    
+    
+    def _on_flush(self, session, flush_context, instances):
+        self.acquire(session)
+    
+    
+    def _on_transaction_end(self, session, transaction):
+        # Savepoints end inside the outer transaction, which still holds the lock
+        if transaction.parent is None:
+            self.release(session)
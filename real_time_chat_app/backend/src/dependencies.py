@@ -1,10 +1,13 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
 from src.database import get_db
 from src.services.auth_service import AuthService
 from src.models.user import User
+from src.utils.rate_limiter import rate_limiter
+from src.utils.security import is_admin_token
+import math
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -109,4 +112,62 @@ def get_optional_current_user(
         return None
     
     token = credentials.credentials
-    return AuthService.get_current_user(db, token)
\ No newline at end of file
+    return AuthService.get_current_user(db, token)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency restricting an endpoint to operators holding ADMIN_TOKEN.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    
+    Usage:
+        @app.get("/internal", dependencies=[Depends(require_admin)])
+        def internal_route():
+            ...
+    
+    Args:
+        x_admin_token: Value of the X-Admin-Token header
+        
+    Raises:
+        HTTPException: If the token is missing or wrong, or ADMIN_TOKEN is unset
+    """
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
+
+
+def rate_limit(action: str):
+    """
+    Dependency factory limiting how often the current user can hit an endpoint.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    
+    Usage:
+        @app.post("/send")
+        def send(user: User = Depends(rate_limit("rest_send"))):
+            ...
+    
+    Args:
+        action: Rate limiter action the endpoint counts against
+        
+    Returns:
+        Dependency returning the active user
+    """
+    def check_rate_limit(current_user: User = Depends(get_current_active_user)) -> User:
+        retry_after = rate_limiter.check(current_user.id, action)
+        
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many requests, retry in {retry_after:.1f}s",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+        
+        return current_user
+    
+    return check_rate_limit
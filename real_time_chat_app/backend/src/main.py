@@ -1,17 +1,60 @@
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.config import get_settings
 from src.routers import auth
-from src.routers import auth, messages, groups, websocket
+from src.routers import auth, messages, groups, websocket, metrics
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.query_tracking import QueryTrackingMiddleware
+from src.middleware.server_timing import ServerTimingMiddleware
+from src.middleware.profiling import ProfilingMiddleware, instrument_routes
+from src.utils.log import setup_logging
+from src.utils.responses import DefaultJSONResponse
+from src.services.websocket_manager import manager
+from src.services.typing_tracker import typing_tracker
+from src.services.presence_service import presence_service
+from src.services.heartbeat_monitor import heartbeat_monitor
+from src.services.loop_monitor import loop_monitor
 
 settings = get_settings()
 
+# Structured logs go through a queue, off the event loop
+setup_logging(settings)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start background tasks with the app and cancel them on shutdown.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    tasks = [
+        asyncio.create_task(typing_tracker.run(manager)),
+        asyncio.create_task(presence_service.run(manager)),
+        asyncio.create_task(heartbeat_monitor.run(manager)),
+    ]
+    
+    if settings.LOOP_MONITOR_ENABLED:
+        tasks.append(asyncio.create_task(loop_monitor.run()))
+    
+    yield
+    
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     description="Real-time Chat Application API",
     version="1.0.0",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse
 )
 
 # CORS middleware - allows frontend to connect
@@ -23,12 +66,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms for /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# SQL statements per request, checked against @query_budget
+if settings.QUERY_TRACKING_ENABLED:
+    app.add_middleware(QueryTrackingMiddleware)
+
+# Per-stage timings in a Server-Timing header
+if settings.TRACING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+# On-demand cProfile of single requests (X-Profile header or sampling)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(messages.router)  
 app.include_router(groups.router)
 app.include_router(websocket.router)
 
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+# After all routes exist, so every sync endpoint is covered
+if settings.PROFILING_ENABLED:
+    instrument_routes(app)
+
 
 @app.get("/")
 def root():
@@ -0,0 +1,49 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+from src.utils.metrics import metrics
+
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ("method", "route", "status")
+)
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request into http_request_duration_seconds.
+    
+    A plain ASGI middleware rather than BaseHTTPMiddleware, so it adds no
+    extra task or response wrapping per request. Requests are labelled by
+    route template ("/messages/chat/{other_user_id}"), not the raw path,
+    to keep the number of series bounded; unmatched paths share one label.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status = "500"
+        
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # FastAPI stores the matched route in the scope while routing
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status
+            )
@@ -0,0 +1,217 @@
+from typing import List, Optional
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config import get_settings
+from src.utils.security import is_admin_token
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfile:
+    """
+    Profiles collected for one request.
+    
+    Structure:
+    - profile_id: file name stem of the saved .prof/.json pair
+    - reason: "header" or "sampled"
+    - loop: cProfile of the event loop thread while the request ran
+    - workers: one cProfile per threadpool call made by the request
+    """
+    
+    def __init__(self, reason: str):
+        self.profile_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "_" + uuid.uuid4().hex[:8]
+        self.reason = reason
+        self.loop: Optional[cProfile.Profile] = None
+        self.workers: List[cProfile.Profile] = []
+        self.worker_seconds = 0.0
+
+
+# Profile of the request running in the current context; Starlette copies
+# the context into the threadpool, so sync endpoints can find it
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+# Before 3.12 a cProfile only hooks the thread that enabled it. From 3.12 it
+# runs on sys.monitoring: one profiler for the whole process that sees every
+# thread, and enabling a second one raises ValueError.
+_PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+# The single profiler slot. The request profiling the event loop holds it;
+# from 3.12 a threadpool profile needs it too, so two never run at once and
+# whichever comes second is skipped.
+_profiler_slot = threading.Lock()
+
+
+def _profiled_sync(func):
+    """
+    Wrap a sync endpoint so its threadpool run is profiled when requested.
+    
+    Time Complexity: O(1) when the request isn't profiled
+    Space Complexity: O(1)
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        request_profile = _current.get()
+        if request_profile is None:
+            return func(*args, **kwargs)
+        
+        # From 3.12 the request's loop profile already sees this thread, and
+        # another request's profiler leaves no room for a second one
+        own_slot = False
+        if _PROCESS_WIDE_PROFILER and request_profile.loop is None:
+            own_slot = _profiler_slot.acquire(blocking=False)
+        profile = cProfile.Profile() if own_slot or not _PROCESS_WIDE_PROFILER else None
+        
+        start = time.perf_counter()
+        try:
+            if profile is None:
+                return func(*args, **kwargs)
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            request_profile.worker_seconds += time.perf_counter() - start
+            if profile is not None:
+                request_profile.workers.append(profile)
+            if own_slot:
+                _profiler_slot.release()
+    
+    return wrapper
+
+
+def instrument_routes(app: FastAPI):
+    """
+    Make the threadpool part of sync (def) routes visible to the profiler.
+    
+    Before Python 3.12 cProfile only sees the thread it was enabled on, so
+    each sync endpoint gets its own profiler in the worker thread, merged
+    into the request's profile afterwards. From 3.12 the loop profile
+    already covers worker threads and a worker profiler only runs when the
+    profiler slot is free. Only the endpoint is wrapped: dependencies are
+    left alone so dependency_overrides keep matching.
+    
+    Time Complexity: O(r) where r = number of routes
+    Space Complexity: O(r)
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not inspect.iscoroutinefunction(route.dependant.call):
+            route.dependant.call = _profiled_sync(route.dependant.call)
+
+
+def _save(request_profile: RequestProfile, directory: Path, metadata: dict):
+    """
+    Write <id>.prof (pstats) and <id>.json (route and timing) to directory.
+    
+    Time Complexity: O(f) where f = profiled functions
+    Space Complexity: O(f)
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    
+    profiles = [p for p in [request_profile.loop, *request_profile.workers] if p is not None]
+    stats = pstats.Stats(profiles[0])
+    for profile in profiles[1:]:
+        stats.add(profile)
+    
+    stats.dump_stats(directory / f"{request_profile.profile_id}.prof")
+    (directory / f"{request_profile.profile_id}.json").write_text(json.dumps(metadata, indent=2))
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in cProfile of individual HTTP requests.
+    
+    A request is profiled when it carries "X-Profile: 1" together with a
+    valid "X-Admin-Token", or at random for PROFILE_SAMPLE_PERCENT of
+    requests. The profile covers the event loop thread (async routes and
+    dependencies, and anything else the loop runs meanwhile) plus the
+    threadpool run of sync endpoints (see instrument_routes). Results are
+    written to PROFILE_DIR off the event loop; header-triggered responses
+    get an X-Profile-Id header naming the files.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    def _reason(self, scope: Scope) -> Optional[str]:
+        settings = get_settings()
+        headers = Headers(scope=scope)
+        
+        if headers.get("x-profile") == "1" and is_admin_token(headers.get("x-admin-token")):
+            return "header"
+        if settings.PROFILE_SAMPLE_PERCENT and random.random() * 100 < settings.PROFILE_SAMPLE_PERCENT:
+            return "sampled"
+        return None
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        reason = self._reason(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+        
+        request_profile = RequestProfile(reason)
+        token = _current.set(request_profile)
+        status = 500
+        
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if reason == "header":
+                    # ASGI allows any iterable of headers, e.g. a tuple
+                    profile_header = (b"x-profile-id", request_profile.profile_id.encode())
+                    message["headers"] = [*message.get("headers", []), profile_header]
+            await send(message)
+        
+        if _profiler_slot.acquire(blocking=False):
+            request_profile.loop = cProfile.Profile()
+            request_profile.loop.enable()
+        
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            _current.reset(token)
+            
+            if request_profile.loop is not None:
+                request_profile.loop.disable()
+                _profiler_slot.release()
+            
+            # FastAPI stores the matched route in the scope while routing
+            route = scope.get("route")
+            metadata = {
+                "id": request_profile.profile_id,
+                "reason": reason,
+                "method": scope["method"],
+                "route": route.path if route is not None else None,
+                "path": scope["path"],
+                "status": status,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round(duration * 1000, 3),
+                "threadpool_ms": round(request_profile.worker_seconds * 1000, 3),
+                "loop_profiled": request_profile.loop is not None,
+            }
+            
+            if request_profile.loop is not None or request_profile.workers:
+                try:
+                    await run_in_threadpool(_save, request_profile, Path(get_settings().PROFILE_DIR), metadata)
+                    logger.info("Profiled %s %s in %.1f ms", scope["method"], scope["path"], duration * 1000,
+                                extra={"event": "profile.saved", "profile": metadata})
+                except OSError:
+                    logger.exception("Could not save profile %s", request_profile.profile_id,
+                                     extra={"event": "profile.save_failed"})
@@ -0,0 +1,30 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src.utils.query_tracker import track_queries
+
+
+class QueryTrackingMiddleware:
+    """
+    Counts the SQL statements each HTTP request issues.
+    
+    Statements are attributed through a context variable, which Starlette
+    carries into the threadpool running sync routes. Once routed, the
+    request is labelled "METHOD /route/template" and checked against the
+    endpoint's @query_budget, if it declares one.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        with track_queries(f"{scope['method']} unmatched") as stats:
+            await self.app(scope, receive, send)
+            
+            # FastAPI stores the matched route in the scope while routing
+            route = scope.get("route")
+            if route is not None:
+                stats.label = f"{scope['method']} {route.path}"
+                stats.budget = getattr(route.endpoint, "query_budget", None)
@@ -0,0 +1,39 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+from src.utils.tracing import trace
+
+
+class ServerTimingMiddleware:
+    """
+    Stage breakdown of each HTTP request in a Server-Timing header.
+    
+    Spans finished before the response starts (membership, insert, commit,
+    ...) are listed, followed by "app" for the total time until then, so
+    browser dev tools show where a slow request went. The same stages feed
+    stage_duration_seconds, labelled "METHOD /route/template".
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        with trace(f"{scope['method']} unmatched") as request_trace:
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    elapsed_ms = (time.perf_counter() - request_trace.start) * 1000
+                    timing = request_trace.server_timing()
+                    value = f"{timing}, app;dur={elapsed_ms:.2f}" if timing else f"app;dur={elapsed_ms:.2f}"
+                    # ASGI allows any iterable of headers, e.g. a tuple
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", value.encode())]
+                await send(message)
+            
+            await self.app(scope, receive, send_wrapper)
+            
+            # FastAPI stores the matched route in the scope while routing
+            route = scope.get("route")
+            if route is not None:
+                request_trace.operation = f"{scope['method']} {route.path}"
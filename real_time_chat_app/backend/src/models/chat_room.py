@@ -35,6 +35,9 @@ class ChatRoom(Base):
     # Foreign Key
     created_by = Column(Integer, ForeignKey("users.id", ondelete= "SET NULL"), nullable=True )
 
+    # Last per-room message sequence number handed out (see Message.seq)
+    last_message_seq = Column(Integer, nullable=False, default=0, server_default="0")
+
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
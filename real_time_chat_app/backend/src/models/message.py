@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.database import Base
@@ -13,6 +13,10 @@ class Message(Base):
     Space Complexity: O(n) where n=total messages
     """
     __tablename__ = "messages"
+    __table_args__ = (
+        # One sequence number per message within a room
+        UniqueConstraint("chat_room_id", "seq", name="uq_messages_room_seq"),
+    )
     
     # Primary Key
     id = Column(Integer, primary_key=True, index=True)
@@ -21,6 +25,9 @@ class Message(Base):
     chat_room_id = Column(Integer, ForeignKey("chat_rooms.id", ondelete="CASCADE"), nullable=False, index=True)
     sender_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     
+    # Monotonically increasing position within the chat room (1, 2, 3, ...)
+    seq = Column(Integer, nullable=True)
+    
     # Message content
     content = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
@@ -1,11 +1,13 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
-from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.engine import Row
+from sqlalchemy import and_, or_, desc, select, update
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 from src.models.chat_room import ChatRoom, RoomType
 from src.models.chat_room_member import ChatRoomMember
 from src.models.message import Message
 from src.models.user import User
 from sqlalchemy import func
+from src.utils.tracing import span
 
 
 class ChatRepository:
@@ -135,6 +137,10 @@ class ChatRepository:
         """
         Create a new message.
         
+        The room's sequence counter is bumped in the same transaction, so
+        every message gets the next per-room sequence number. The row lock
+        on the room serializes concurrent senders to the same room.
+        
         Time Complexity: O(1)
         Space Complexity: O(1)
         
@@ -147,14 +153,29 @@ class ChatRepository:
         Returns:
             Created Message object
         """
-        message = Message(
-            chat_room_id=chat_room_id,
-            sender_id=sender_id,
-            content=content
-        )
-        db.add(message)
-        db.commit()
-        db.refresh(message)
+        with span("insert"):
+            seq = db.execute(
+                update(ChatRoom)
+                .where(ChatRoom.id == chat_room_id)
+                .values(last_message_seq=ChatRoom.last_message_seq + 1)
+                .returning(ChatRoom.last_message_seq)
+            ).scalar_one()
+            
+            message = Message(
+                chat_room_id=chat_room_id,
+                sender_id=sender_id,
+                seq=seq,
+                content=content
+            )
+            db.add(message)
+            db.flush()
+        
+        with span("commit"):
+            db.commit()
+        
+        with span("refresh"):
+            db.refresh(message)
+        
         return message
     
     
@@ -164,6 +185,9 @@ class ChatRepository:
         """
         Get messages from a chat room (paginated).
         
+        Ordered by the per-room sequence number, which (unlike created_at)
+        never ties and matches the order messages were broadcast in.
+        
         Time Complexity: O(n) where n = limit
         Space Complexity: O(n)
         
@@ -178,11 +202,260 @@ class ChatRepository:
         """
         messages = db.query(Message).filter(
             Message.chat_room_id == chat_room_id
-        ).order_by(desc(Message.created_at)).limit(limit).offset(offset).all()
+        ).order_by(desc(Message.seq), desc(Message.id)).limit(limit).offset(offset).all()
         
         return list(reversed(messages))  # Return oldest to newest
     
     
+    @staticmethod
+    def get_chat_message_rows(db: Session, chat_room_id: int, limit: int = 50,
+                              offset: int = 0) -> List[Row]:
+        """
+        Get a page of messages with sender info as plain column rows.
+        
+        Same page as get_chat_messages, but only the columns a history
+        response needs are selected and the sender is joined in, so no ORM
+        objects are built and nothing enters the session's identity map.
+        
+        Time Complexity: O(n) where n = limit
+        Space Complexity: O(n)
+        
+        Args:
+            db: Database session
+            chat_room_id: Chat room ID
+            limit: Maximum number of messages to return
+            offset: Number of messages to skip
+            
+        Returns:
+            Rows with the MessageWithSender fields as attributes, oldest first
+        """
+        # Page first, then join: joining before the OFFSET would look up a
+        # sender for every skipped row
+        page = db.query(
+            Message.id,
+            Message.chat_room_id,
+            Message.sender_id,
+            Message.seq,
+            Message.content,
+            Message.is_read,
+            Message.created_at
+        ).filter(
+            Message.chat_room_id == chat_room_id
+        ).order_by(desc(Message.seq), desc(Message.id)).limit(limit).offset(offset).subquery()
+        
+        return db.query(
+            page,
+            User.username.label("sender_username"),
+            User.full_name.label("sender_full_name")
+        ).outerjoin(
+            User, User.id == page.c.sender_id
+        ).order_by(page.c.seq, page.c.id).all()
+    
+    
+    @staticmethod
+    def stream_chat_message_rows(db: Session, chat_room_id: int,
+                                 batch_size: int = 1000) -> Iterator[Sequence[Row]]:
+        """
+        Stream a room's whole history in batches, oldest first.
+        
+        yield_per makes the driver use a server-side cursor where it has
+        one (psycopg2 named cursors) and fetchmany() elsewhere, so only
+        one batch of rows is in memory at a time however long the room
+        is. Rows have the same columns as get_chat_message_rows.
+        
+        Time Complexity: O(n) where n = messages in the room
+        Space Complexity: O(b) where b = batch_size
+        
+        Args:
+            db: Database session (kept busy until the iterator is exhausted)
+            chat_room_id: Chat room ID
+            batch_size: Rows fetched per round trip
+            
+        Returns:
+            Iterator of row batches
+        """
+        result = db.execute(
+            select(
+                Message.id,
+                Message.chat_room_id,
+                Message.sender_id,
+                Message.seq,
+                Message.content,
+                Message.is_read,
+                Message.created_at,
+                User.username.label("sender_username"),
+                User.full_name.label("sender_full_name")
+            ).outerjoin(
+                User, User.id == Message.sender_id
+            ).where(
+                Message.chat_room_id == chat_room_id
+            ).order_by(Message.seq, Message.id).execution_options(yield_per=batch_size)
+        )
+        
+        return result.partitions()
+    
+    
+    @staticmethod
+    def get_messages_after_seq(db: Session, chat_room_id: int, after_seq: int,
+                               limit: int = 100) -> List[Tuple[Message, Optional[str], Optional[str]]]:
+        """
+        Get messages after a given room sequence number, with sender info.
+        Used to replay messages a client missed while it was away.
+        
+        Time Complexity: O(log n + k) where k = limit
+        Space Complexity: O(k)
+        
+        Args:
+            db: Database session
+            chat_room_id: Chat room ID
+            after_seq: Only messages with a greater sequence number are returned
+            limit: Maximum number of messages to return
+            
+        Returns:
+            List of tuples (Message, sender_username, sender_full_name), in sequence order
+        """
+        return db.query(Message, User.username, User.full_name).outerjoin(
+            User, User.id == Message.sender_id
+        ).filter(
+            Message.chat_room_id == chat_room_id,
+            Message.seq > after_seq
+        ).order_by(Message.seq).limit(limit).all()
+    
+    
+    @staticmethod
+    def get_replay_start(db: Session, chat_room_id: int, after_seq: int,
+                         max_messages: int) -> Tuple[int, bool]:
+        """
+        Clamp a replay cursor so that at most max_messages are replayed.
+        
+        Time Complexity: O(log n + max_messages)
+        Space Complexity: O(1)
+        
+        Args:
+            db: Database session
+            chat_room_id: Chat room ID
+            after_seq: Last sequence number the client already has
+            max_messages: Maximum number of messages to replay
+            
+        Returns:
+            Tuple of (sequence to replay after, whether older messages were skipped)
+        """
+        cutoff = db.query(Message.seq).filter(
+            Message.chat_room_id == chat_room_id,
+            Message.seq > after_seq
+        ).order_by(desc(Message.seq)).offset(max_messages).limit(1).first()
+        
+        if cutoff:
+            return cutoff[0], True
+        
+        return after_seq, False
+    
+    
+    @staticmethod
+    def get_message_seq(db: Session, chat_room_id: int, message_id: int) -> int:
+        """
+        Translate a message ID into the room sequence number at that point.
+        
+        Time Complexity: O(1) for an existing message, O(log n) otherwise
+        Space Complexity: O(1)
+        
+        Args:
+            db: Database session
+            chat_room_id: Chat room ID
+            message_id: Message ID the client already has
+            
+        Returns:
+            Sequence number of that message (or of the newest one before it)
+        """
+        seq = db.query(Message.seq).filter(
+            Message.id == message_id,
+            Message.chat_room_id == chat_room_id
+        ).scalar()
+        
+        if seq is None:
+            # Message was deleted or belongs elsewhere, fall back to the newest older one
+            seq = db.query(func.max(Message.seq)).filter(
+                Message.chat_room_id == chat_room_id,
+                Message.id <= message_id
+            ).scalar()
+        
+        return seq or 0
+    
+    
+    @staticmethod
+    def get_last_message_seqs(db: Session, chat_room_ids: List[int]) -> Dict[int, int]:
+        """
+        Get the latest sequence number for several rooms in one query.
+        
+        Time Complexity: O(n) where n = number of rooms
+        Space Complexity: O(n)
+        
+        Args:
+            db: Database session
+            chat_room_ids: Chat room IDs
+            
+        Returns:
+            Dictionary of {chat_room_id: last_message_seq}
+        """
+        if not chat_room_ids:
+            return {}
+        
+        rows = db.query(ChatRoom.id, ChatRoom.last_message_seq).filter(
+            ChatRoom.id.in_(chat_room_ids)
+        ).all()
+        
+        return {room_id: last_seq for room_id, last_seq in rows}
+    
+    
+    @staticmethod
+    def get_member_room_ids(db: Session, user_id: int, chat_room_ids: List[int]) -> Set[int]:
+        """
+        Filter room IDs down to the ones the user is still a member of.
+        
+        Time Complexity: O(n) where n = number of rooms
+        Space Complexity: O(n)
+        
+        Args:
+            db: Database session
+            user_id: User ID
+            chat_room_ids: Chat room IDs to check
+            
+        Returns:
+            Set of chat room IDs the user belongs to
+        """
+        if not chat_room_ids:
+            return set()
+        
+        rows = db.query(ChatRoomMember.chat_room_id).filter(
+            ChatRoomMember.user_id == user_id,
+            ChatRoomMember.chat_room_id.in_(chat_room_ids)
+        ).all()
+        
+        return {row[0] for row in rows}
+    
+    
+    @staticmethod
+    def get_user_room_ids(db: Session, user_id: int) -> List[int]:
+        """
+        Get IDs of every room the user is a member of.
+        
+        Time Complexity: O(n) where n = number of user's rooms
+        Space Complexity: O(n)
+        
+        Args:
+            db: Database session
+            user_id: User ID
+            
+        Returns:
+            List of chat room IDs
+        """
+        rows = db.query(ChatRoomMember.chat_room_id).filter(
+            ChatRoomMember.user_id == user_id
+        ).all()
+        
+        return [row[0] for row in rows]
+    
+    
     @staticmethod
     def get_user_chat_rooms(db: Session, user_id: int) -> List[Tuple[ChatRoom, User, Message]]:
         """
@@ -237,6 +510,115 @@ class ChatRepository:
         return results
     
     
+    @staticmethod
+    def get_direct_chat_rows(db: Session, user_id: int) -> List[Row]:
+        """
+        Get the user's direct chats with the other user, the last message
+        and the unread count, as plain column rows in a single query.
+        
+        The last message is found through the room's last_message_seq and
+        the (chat_room_id, seq) unique index instead of a query per room.
+        
+        Time Complexity: O(n + u) where n = user's chats, u = unread messages
+        Space Complexity: O(n)
+        
+        Args:
+            db: Database session
+            user_id: User ID
+            
+        Returns:
+            Rows of (chat_room_id, room_created_at, other_user_id,
+            other_user_username, other_user_full_name, last_message,
+            last_message_time, unread_count)
+        """
+        me = aliased(ChatRoomMember)
+        other = aliased(ChatRoomMember)
+        
+        my_rooms = db.query(ChatRoomMember.chat_room_id).filter(
+            ChatRoomMember.user_id == user_id
+        )
+        unread = db.query(
+            Message.chat_room_id,
+            func.count(Message.id).label("unread_count")
+        ).filter(
+            Message.chat_room_id.in_(my_rooms),
+            Message.sender_id != user_id,
+            Message.is_read == False
+        ).group_by(Message.chat_room_id).subquery()
+        
+        return db.query(
+            ChatRoom.id.label("chat_room_id"),
+            ChatRoom.created_at.label("room_created_at"),
+            User.id.label("other_user_id"),
+            User.username.label("other_user_username"),
+            User.full_name.label("other_user_full_name"),
+            Message.content.label("last_message"),
+            Message.created_at.label("last_message_time"),
+            func.coalesce(unread.c.unread_count, 0).label("unread_count")
+        ).select_from(me).join(
+            ChatRoom, and_(ChatRoom.id == me.chat_room_id, ChatRoom.room_type == RoomType.DIRECT.value)
+        ).join(
+            other, and_(other.chat_room_id == ChatRoom.id, other.user_id != user_id)
+        ).join(
+            User, User.id == other.user_id
+        ).outerjoin(
+            Message, and_(Message.chat_room_id == ChatRoom.id, Message.seq == ChatRoom.last_message_seq)
+        ).outerjoin(
+            unread, unread.c.chat_room_id == ChatRoom.id
+        ).filter(
+            me.user_id == user_id
+        ).all()
+    
+    
+    @staticmethod
+    def get_group_rows(db: Session, user_id: int) -> List[Row]:
+        """
+        Get the user's groups with member count and last message, as plain
+        column rows in a single query.
+        
+        Time Complexity: O(n + m) where n = user's groups, m = their members
+        Space Complexity: O(n)
+        
+        Args:
+            db: Database session
+            user_id: User ID
+            
+        Returns:
+            Rows with the GroupSummary fields as attributes, in the order
+            the user joined the groups
+        """
+        me = aliased(ChatRoomMember)
+        
+        my_rooms = db.query(ChatRoomMember.chat_room_id).filter(
+            ChatRoomMember.user_id == user_id
+        )
+        member_counts = db.query(
+            ChatRoomMember.chat_room_id,
+            func.count(ChatRoomMember.id).label("member_count")
+        ).filter(
+            ChatRoomMember.chat_room_id.in_(my_rooms)
+        ).group_by(ChatRoomMember.chat_room_id).subquery()
+        
+        return db.query(
+            ChatRoom.id,
+            ChatRoom.name,
+            ChatRoom.room_type,
+            ChatRoom.created_by,
+            member_counts.c.member_count,
+            Message.content.label("last_message"),
+            Message.created_at.label("last_message_time"),
+            ChatRoom.created_at
+        ).select_from(me).join(
+            ChatRoom, and_(ChatRoom.id == me.chat_room_id, ChatRoom.room_type == RoomType.GROUP.value)
+        ).join(
+            member_counts, member_counts.c.chat_room_id == ChatRoom.id
+        ).outerjoin(
+            Message, and_(Message.chat_room_id == ChatRoom.id, Message.seq == ChatRoom.last_message_seq)
+        ).filter(
+            me.user_id == user_id
+        ).order_by(me.id).all()
+    
+    
     @staticmethod
     def is_user_in_chat(db: Session, user_id: int, chat_room_id: int) -> bool:
         """
@@ -253,12 +635,13 @@ class ChatRepository:
         Returns:
             True if user is member, False otherwise
         """
-        member = db.query(ChatRoomMember).filter(
-            and_(
-                ChatRoomMember.user_id == user_id,
-                ChatRoomMember.chat_room_id == chat_room_id
-            )
-        ).first()
+        with span("membership"):
+            member = db.query(ChatRoomMember).filter(
+                and_(
+                    ChatRoomMember.user_id == user_id,
+                    ChatRoomMember.chat_room_id == chat_room_id
+                )
+            ).first()
         
         return member is not None
     
@@ -6,17 +6,22 @@ from src.schemas.auth import (
     UserLogin, 
     TokenResponse, 
     TokenRefresh,
-    ChangePassword
+    ChangePassword,
+    AuthResponse,
+    SessionsTerminatedResponse
 )
+from src.schemas.common import StatusMessage
 from src.schemas.user import UserResponse
 from src.services.auth_service import AuthService
 from src.dependencies import get_current_active_user
 from src.models.user import User
+from src.utils.query_tracker import query_budget
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(7)
 def register(
     user_data: UserRegister,
     db: Session = Depends(get_db)
@@ -40,11 +45,7 @@ def register(
     try:
         user, tokens = AuthService.register_user(db, user_data)
         
-        return {
-            "message": "User registered successfully",
-            "user": user,
-            "tokens": tokens
-        }
+        return AuthResponse(message="User registered successfully", user=user, tokens=tokens)
     
     except ValueError as e:
         raise HTTPException(
@@ -53,7 +54,8 @@ def register(
         )
 
 
-@router.post("/login", response_model=dict)
+@router.post("/login", response_model=AuthResponse)
+@query_budget(4)
 def login(
     login_data: UserLogin,
     db: Session = Depends(get_db)
@@ -77,11 +79,7 @@ def login(
     try:
         user, tokens = AuthService.login_user(db, login_data)
         
-        return {
-            "message": "Login successful",
-            "user": user,
-            "tokens": tokens
-        }
+        return AuthResponse(message="Login successful", user=user, tokens=tokens)
     
     except ValueError as e:
         raise HTTPException(
@@ -92,6 +90,7 @@ def login(
 
 
 @router.post("/refresh", response_model=TokenResponse)
+@query_budget(2)
 def refresh_token(
     token_data: TokenRefresh,
     db: Session = Depends(get_db)
@@ -123,7 +122,8 @@ def refresh_token(
         )
 
 
-@router.post("/logout", response_model=dict)
+@router.post("/logout", response_model=StatusMessage)
+@query_budget(2)
 def logout(
     token_data: TokenRefresh,
     db: Session = Depends(get_db)
@@ -144,7 +144,7 @@ def logout(
     success = AuthService.logout_user(db, token_data.refresh_token)
     
     if success:
-        return {"message": "Logout successful"}
+        return StatusMessage(message="Logout successful")
     
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
@@ -152,7 +152,7 @@ def logout(
     )
 
 
-@router.post("/logout-all", response_model=dict)
+@router.post("/logout-all", response_model=SessionsTerminatedResponse)
 def logout_all_devices(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -172,13 +172,10 @@ def logout_all_devices(
     """
     count = AuthService.logout_all_devices(db, current_user.id)
     
-    return {
-        "message": "Logged out from all devices",
-        "sessions_terminated": count
-    }
+    return SessionsTerminatedResponse(message="Logged out from all devices", sessions_terminated=count)
 
 
-@router.post("/change-password", response_model=dict)
+@router.post("/change-password", response_model=StatusMessage)
 def change_password(
     password_data: ChangePassword,
     current_user: User = Depends(get_current_active_user),
@@ -209,7 +206,7 @@ def change_password(
             password_data.new_password
         )
         
-        return {"message": "Password changed successfully. Please login again."}
+        return StatusMessage(message="Password changed successfully. Please login again.")
     
     except ValueError as e:
         raise HTTPException(
@@ -219,6 +216,7 @@ def change_password(
 
 
 @router.get("/me", response_model=UserResponse)
+@query_budget(1)
 def get_current_user_info(
     current_user: User = Depends(get_current_active_user)
 ):
@@ -6,17 +6,23 @@ from src.schemas.chat import (
     GroupCreate, 
     GroupMemberAdd, 
     GroupMemberRemove,
-    GroupMessageCreate
+    GroupMessageCreate,
+    GroupCreatedResponse,
+    GroupSummary,
+    MembersAddedResponse
 )
-from src.schemas.message import MessageWithSender
+from src.schemas.common import StatusMessage
+from src.schemas.message import MessageWithSender, MessageSentResponse
 from src.services.chat_service import ChatService
-from src.dependencies import get_current_active_user
+from src.dependencies import get_current_active_user, rate_limit
 from src.models.user import User
+from src.utils.query_tracker import query_budget
+from src.utils.responses import ModelJSONResponse
 
 router = APIRouter(prefix="/groups", tags=["Groups"])
 
 
-@router.post("/create", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("/create", response_model=GroupCreatedResponse, status_code=status.HTTP_201_CREATED)
 def create_group(
     group_data: GroupCreate,
     current_user: User = Depends(get_current_active_user),
@@ -36,10 +42,7 @@ def create_group(
             group_data.member_ids
         )
         
-        return {
-            "message": "Group created successfully",
-            "group": group
-        }
+        return GroupCreatedResponse(message="Group created successfully", group=group)
     
     except ValueError as e:
         raise HTTPException(
@@ -48,10 +51,11 @@ def create_group(
         )
 
 
-@router.post("/send", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("/send", response_model=MessageSentResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(6)
 def send_group_message(
     message_data: GroupMessageCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(rate_limit("rest_send")),
     db: Session = Depends(get_db)
 ):
     """
@@ -68,10 +72,7 @@ def send_group_message(
             message_data.content
         )
         
-        return {
-            "message": "Message sent successfully",
-            "data": message
-        }
+        return MessageSentResponse(message="Message sent successfully", data=message)
     
     except ValueError as e:
         raise HTTPException(
@@ -81,6 +82,7 @@ def send_group_message(
 
 
 @router.get("/{group_id}/messages", response_model=List[MessageWithSender])
+@query_budget(3)
 def get_group_messages(
     group_id: int,
     limit: int = Query(50, ge=1, le=100),
@@ -102,7 +104,7 @@ def get_group_messages(
             limit, 
             offset
         )
-        return messages
+        return ModelJSONResponse(messages, List[MessageWithSender])
     
     except ValueError as e:
         raise HTTPException(
@@ -111,7 +113,7 @@ def get_group_messages(
         )
 
 
-@router.post("/{group_id}/members", response_model=dict)
+@router.post("/{group_id}/members", response_model=MembersAddedResponse)
 def add_group_members(
     group_id: int,
     member_data: GroupMemberAdd,
@@ -132,10 +134,7 @@ def add_group_members(
             member_data.user_ids
         )
         
-        return {
-            "message": f"Successfully added {added} members",
-            "members_added": added
-        }
+        return MembersAddedResponse(message=f"Successfully added {added} members", members_added=added)
     
     except ValueError as e:
         raise HTTPException(
@@ -144,7 +143,7 @@ def add_group_members(
         )
 
 
-@router.delete("/{group_id}/members", response_model=dict)
+@router.delete("/{group_id}/members", response_model=StatusMessage)
 def remove_group_member(
     group_id: int,
     member_data: GroupMemberRemove,
@@ -165,7 +164,7 @@ def remove_group_member(
             member_data.user_id
         )
         
-        return {"message": "Member removed successfully"}
+        return StatusMessage(message="Member removed successfully")
     
     except ValueError as e:
         raise HTTPException(
@@ -174,7 +173,8 @@ def remove_group_member(
         )
 
 
-@router.get("/my-groups", response_model=List[dict])
+@router.get("/my-groups", response_model=List[GroupSummary])
+@query_budget(2)
 def get_my_groups(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -186,4 +186,4 @@ def get_my_groups(
     Space Complexity: O(n)
     """
     groups = ChatService.get_user_groups(db, current_user.id)
-    return groups
\ No newline at end of file
+    return ModelJSONResponse(groups, List[GroupSummary])
\ No newline at end of file
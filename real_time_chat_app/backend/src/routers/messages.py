@@ -1,20 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 from src.database import get_db
-from src.schemas.message import MessageCreate, MessageWithSender
+from src.schemas.message import MessageCreate, MessageWithSender, MessageSentResponse
 from src.schemas.chat import DirectChatResponse
 from src.services.chat_service import ChatService
-from src.dependencies import get_current_active_user
+from src.services.export_service import ExportService
+from src.dependencies import get_current_active_user, rate_limit
 from src.models.user import User
+from src.utils.query_tracker import query_budget
+from src.utils.responses import ModelJSONResponse
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
 
-@router.post("/send", response_model=dict, status_code=status.HTTP_201_CREATED)
+@router.post("/send", response_model=MessageSentResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(10)
 def send_message(
     message_data: MessageCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(rate_limit("rest_send")),
     db: Session = Depends(get_db)
 ):
     """
@@ -37,10 +42,7 @@ def send_message(
     try:
         message = ChatService.send_direct_message(db, current_user.id, message_data)
         
-        return {
-            "message": "Message sent successfully",
-            "data": message
-        }
+        return MessageSentResponse(message="Message sent successfully", data=message)
     
     except ValueError as e:
         raise HTTPException(
@@ -50,6 +52,7 @@ def send_message(
 
 
 @router.get("/chat/{other_user_id}", response_model=List[MessageWithSender])
+@query_budget(9)
 def get_chat_history(
     other_user_id: int,
     limit: int = Query(50, ge=1, le=100),
@@ -84,7 +87,7 @@ def get_chat_history(
             limit, 
             offset
         )
-        return messages
+        return ModelJSONResponse(messages, List[MessageWithSender])
     
     except ValueError as e:
         raise HTTPException(
@@ -94,6 +97,7 @@ def get_chat_history(
 
 
 @router.get("/chats", response_model=List[DirectChatResponse])
+@query_budget(2)
 def get_all_chats(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -112,4 +116,49 @@ def get_all_chats(
         List of direct chats with last message and unread count
     """
     chats = ChatService.get_user_chats(db, current_user.id)
-    return chats
\ No newline at end of file
+    return ModelJSONResponse(chats, List[DirectChatResponse])
+
+
+@router.get("/rooms/{chat_room_id}/export", response_class=StreamingResponse)
+@query_budget(3)
+def export_room_history(
+    chat_room_id: int,
+    gzip: bool = Query(False, description="Gzip the NDJSON stream"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download a room's full history as NDJSON, one message per line.
+    
+    Works for direct and group rooms. Access is checked once, then the
+    messages are streamed from a server-side cursor in batches, so memory
+    use does not grow with the size of the room.
+    
+    Time Complexity: O(n) where n = messages in the room
+    Space Complexity: O(b) where b = EXPORT_BATCH_SIZE
+    
+    Args:
+        chat_room_id: Chat room ID
+        gzip: Compress the stream (application/gzip)
+        current_user: Currently authenticated user
+        db: Database session
+        
+    Returns:
+        Streaming NDJSON (or gzipped NDJSON) response
+        
+    Raises:
+        HTTPException: If user is not a member of the room
+    """
+    if not ChatService.verify_chat_access(db, current_user.id, chat_room_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this chat"
+        )
+    
+    filename = f"room-{chat_room_id}.ndjson" + (".gz" if gzip else "")
+    
+    return StreamingResponse(
+        ExportService.stream_room_history(db.get_bind(), chat_room_id, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,60 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.pool import QueuePool
+from src.database import engine
+from src.services.websocket_manager import manager
+from src.services.admission_control import admission_controller
+from src.routers.websocket import frame_dispatcher
+from src.utils.metrics import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _pool_stat(name: str) -> float:
+    """Read a QueuePool statistic; other pools (SQLite) report 0"""
+    if not isinstance(engine.pool, QueuePool):
+        return 0
+    return getattr(engine.pool, name)()
+
+
+# Gauges and counters read from existing state at scrape time
+metrics.callback("ws_connections_active", "Open WebSocket connections on this worker",
+                 lambda: len(manager.active_connections))
+metrics.callback("ws_rooms_active", "Rooms with at least one connected member",
+                 lambda: len(manager.room_connections))
+metrics.callback("ws_suspended_sessions", "Disconnected sessions that can still be resumed",
+                 lambda: len(manager.suspended_sessions))
+metrics.callback("ws_outbound_queued_frames", "Frames waiting in per-connection outbound queues",
+                 lambda: sum(len(queue) for queue in list(manager.outbound.values())))
+metrics.callback("ws_inbound_frames_total", "Inbound WebSocket frames by type",
+                 lambda: {(frame_type,): entry["count"] for frame_type, entry in frame_dispatcher.stats.items()},
+                 ("type",), kind="counter")
+metrics.callback("ws_inbound_frame_errors_total", "Inbound WebSocket frames rejected as invalid",
+                 lambda: {(frame_type,): entry["errors"] for frame_type, entry in frame_dispatcher.stats.items()},
+                 ("type",), kind="counter")
+metrics.callback("ws_rejected_connections_total", "WebSocket connections refused by admission control",
+                 lambda: {(reason,): count for reason, count in admission_controller.rejected.items()},
+                 ("reason",), kind="counter")
+metrics.callback("db_pool_size", "Connections kept open by the database pool",
+                 lambda: _pool_stat("size"))
+metrics.callback("db_pool_checked_out", "Database connections currently in use",
+                 lambda: _pool_stat("checkedout"))
+metrics.callback("db_pool_overflow", "Database connections open beyond the pool size",
+                 lambda: _pool_stat("overflow"))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Expose all metrics in the Prometheus text format.
+    
+    Async so it reads the connection manager on the event loop thread,
+    never while a broadcast is mutating it.
+    
+    Time Complexity: O(s + c) where s = samples, c = connections
+    Space Complexity: O(s)
+    """
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
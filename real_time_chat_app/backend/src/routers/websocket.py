@@ -2,19 +2,404 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from sqlalchemy.orm import Session
 from src.database import get_db
 from src.services.websocket_manager import manager
+from src.services.typing_tracker import typing_tracker
+from src.services.presence_service import presence_service
+from src.services.heartbeat_monitor import heartbeat_monitor
+from src.services.loop_monitor import loop_monitor
 from src.services.chat_service import ChatService
 from src.services.auth_service import AuthService
 from src.repositories.chat_repository import ChatRepository
 from src.repositories.user_repository import UserRepository
-import json
+from src.schemas.presence import PresenceQuery, PresenceStatus, OnlineUsers
+from src.schemas.ws_frames import (
+    inbound_frame_adapter,
+    JoinRoomFrame,
+    LeaveRoomFrame,
+    ChatMessageFrame,
+    TypingFrame,
+    ResumeFrame,
+    PresenceQueryFrame,
+    PingFrame,
+    PongFrame
+)
+from src.services.frame_dispatcher import FrameDispatcher, FrameError
+from src.services.admission_control import admission_controller, TRY_AGAIN_LATER_CLOSE_CODE
+from src.dependencies import get_current_active_user, require_admin
+from src.models.user import User
+from src.config import get_settings
+from src.utils.frame_codec import negotiate_codec
+from src.utils.rate_limiter import rate_limiter
+from src.utils.query_tracker import track_queries, query_budget
+from src.utils.tracing import trace, span
+from typing import List, Optional, Union
+import logging
 
 router = APIRouter(tags=["WebSocket"])
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Inbound frame handlers, registered below with @frame_dispatcher.handler
+frame_dispatcher = FrameDispatcher(inbound_frame_adapter)
+
+# Frame types that count against a rate limit, and the limiter action they use
+RATE_LIMITED_FRAMES = {"message": "message", "typing": "typing", "join_room": "join"}
+
+
+def _message_frame(message, sender_username: Optional[str], sender_full_name: Optional[str]) -> dict:
+    """
+    Build the "new_message" frame sent to clients for a stored message.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    return {
+        "type": "new_message",
+        "room_id": message.chat_room_id,
+        "message_id": message.id,
+        "seq": message.seq,
+        "sender_id": message.sender_id,
+        "sender_username": sender_username,
+        "sender_full_name": sender_full_name,
+        "content": message.content,
+        "created_at": str(message.created_at)
+    }
+
+
+async def _replay_missed_messages(db: Session, user_id: int, room_id: int, since_seq: int,
+                                  buffered_frames: Optional[List[dict]] = None):
+    """
+    Stream messages a user missed in a room, then switch to live delivery.
+    
+    Live broadcasts are held by the connection manager while the replay runs,
+    so the client receives every message exactly once and in sequence order.
+    
+    Time Complexity: O(n) where n = replayed messages (capped by WS_REPLAY_MAX_MESSAGES)
+    Space Complexity: O(b) where b = WS_REPLAY_BATCH_SIZE
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        room_id: Room ID
+        since_seq: Last room sequence number the client already has
+        buffered_frames: Missed frames from a resume buffer (skips the database)
+    """
+    manager.begin_replay(user_id, room_id)
+    
+    batch_size = settings.WS_REPLAY_BATCH_SIZE
+    last_seq = since_seq
+    truncated = False
+    
+    if buffered_frames is not None:
+        # Resume buffer already covers the gap
+        for start in range(0, len(buffered_frames), batch_size):
+            frames = buffered_frames[start:start + batch_size]
+            last_seq = frames[-1]["seq"]
+            
+            await manager.send_personal_message(user_id, {
+                "type": "message_history",
+                "room_id": room_id,
+                "messages": frames,
+                "has_more": start + batch_size < len(buffered_frames)
+            })
+    else:
+        cursor, truncated = ChatRepository.get_replay_start(
+            db, room_id, since_seq, settings.WS_REPLAY_MAX_MESSAGES
+        )
+        
+        while True:
+            batch = ChatRepository.get_messages_after_seq(db, room_id, cursor, batch_size)
+            
+            if not batch:
+                break
+            
+            cursor = batch[-1][0].seq
+            last_seq = cursor
+            has_more = len(batch) == batch_size
+            
+            await manager.send_personal_message(user_id, {
+                "type": "message_history",
+                "room_id": room_id,
+                "messages": [_message_frame(msg, username, full_name) for msg, username, full_name in batch],
+                "has_more": has_more
+            })
+            
+            if not has_more:
+                break
+    
+    await manager.send_personal_message(user_id, {
+        "type": "replay_complete",
+        "room_id": room_id,
+        "last_seq": last_seq,
+        "truncated": truncated
+    })
+    
+    # Release live frames held during the replay, skipping ones already sent
+    await manager.end_replay(user_id, room_id, last_seq)
+
+
+def _presence_status(user_ids: List[int]) -> dict:
+    """
+    Split a batch of user IDs into online and offline lists.
+    
+    Time Complexity: O(k) where k = number of users asked about
+    Space Complexity: O(k)
+    """
+    statuses = presence_service.are_online(user_ids)
+    
+    return {
+        "online": [user_id for user_id, is_online in statuses.items() if is_online],
+        "offline": [user_id for user_id, is_online in statuses.items() if not is_online]
+    }
+
+
+async def _receive_data(websocket: WebSocket) -> Union[str, bytes]:
+    """
+    Receive the next client frame's raw payload, text or binary.
+    
+    Time Complexity: O(n) where n = frame size
+    Space Complexity: O(n)
+    
+    Raises:
+        WebSocketDisconnect: If the client went away
+    """
+    message = await websocket.receive()
+    
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    
+    data = message.get("bytes")
+    if data is None:
+        data = message.get("text")
+    
+    return data
+
+
+async def _resume_session(db: Session, user_id: int, frame: ResumeFrame):
+    """
+    Resume a recently disconnected session and send only the missed messages.
+    
+    Rooms are rejoined if the user is still a member. The gap for each room is
+    served from the server-side resume buffer when it is complete, and from the
+    database otherwise.
+    
+    Time Complexity: O(r + n) where r = rooms in the session, n = missed messages
+    Space Complexity: O(n)
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        frame: Resume frame with the token and the last seq seen per room
+    """
+    session = manager.take_suspended_session(frame.resume_token, user_id)
+    
+    if not session:
+        await manager.send_personal_message(user_id, {
+            "type": "resume_failed",
+            "message": "Session expired or unknown, rejoin rooms to resync"
+        })
+        return
+    
+    last_seqs = frame.last_seqs
+    room_ids = sorted(ChatRepository.get_member_room_ids(db, user_id, list(session.room_ids)))
+    latest_seqs = ChatRepository.get_last_message_seqs(db, room_ids)
+    
+    await manager.send_personal_message(user_id, {
+        "type": "resumed",
+        "room_ids": room_ids
+    })
+    
+    for room_id in room_ids:
+        latest_seq = latest_seqs.get(room_id, 0)
+        
+        # Without a client cursor, send whatever was buffered while away
+        buffer = session.buffers.get(room_id)
+        since_seq = last_seqs.get(room_id, buffer[0]["seq"] - 1 if buffer else latest_seq)
+        
+        buffered_frames = session.frames_after(room_id, since_seq, latest_seq)
+        await _replay_missed_messages(db, user_id, room_id, since_seq, buffered_frames)
+
+
+@frame_dispatcher.handler("join_room")
+async def _handle_join_room(frame: JoinRoomFrame, db: Session, user: User):
+    """
+    Join a chat room, replaying missed messages if the client asked for them.
+    
+    Time Complexity: O(n + m) where n = replayed messages, m = users in room
+    Space Complexity: O(b) where b = WS_REPLAY_BATCH_SIZE
+    """
+    room_id = frame.room_id
+    since_seq = frame.since_seq
+    
+    # Verify user has access to room
+    if not ChatRepository.is_user_in_chat(db, user.id, room_id):
+        await manager.send_personal_message(user.id, {
+            "type": "error",
+            "message": "You don't have access to this room"
+        })
+        return
+    
+    if since_seq is None and frame.since_message_id is not None:
+        since_seq = ChatRepository.get_message_seq(db, room_id, frame.since_message_id)
+    
+    if since_seq is None:
+        manager.join_room(user.id, room_id)
+    
+    presence_service.add_member_room(user.id, room_id)
+    
+    # Notify user
+    await manager.send_personal_message(user.id, {
+        "type": "room_joined",
+        "room_id": room_id,
+        "message": f"Joined room {room_id}"
+    })
+    
+    # Send anything the client missed before live messages
+    if since_seq is not None:
+        await _replay_missed_messages(db, user.id, room_id, since_seq)
+    
+    # Notify others in room
+    await manager.broadcast_to_room(room_id, {
+        "type": "user_joined",
+        "room_id": room_id,
+        "user_id": user.id,
+        "username": user.username
+    }, exclude_user=user.id)
+
+
+@frame_dispatcher.handler("leave_room")
+async def _handle_leave_room(frame: LeaveRoomFrame, db: Session, user: User):
+    """
+    Leave a chat room.
+    
+    Time Complexity: O(m) where m = users in room
+    Space Complexity: O(1)
+    """
+    room_id = frame.room_id
+    manager.leave_room(user.id, room_id)
+    typing_tracker.stop_typing(user.id, room_id)
+    
+    # Notify user
+    await manager.send_personal_message(user.id, {
+        "type": "room_left",
+        "room_id": room_id,
+        "message": f"Left room {room_id}"
+    })
+    
+    # Notify others
+    await manager.broadcast_to_room(room_id, {
+        "type": "user_left",
+        "room_id": room_id,
+        "user_id": user.id,
+        "username": user.username
+    })
+
+
+@frame_dispatcher.handler("message")
+@query_budget(5)
+async def _handle_message(frame: ChatMessageFrame, db: Session, user: User):
+    """
+    Store a message and broadcast it to the room.
+    
+    Time Complexity: O(m) where m = users in room
+    Space Complexity: O(1)
+    """
+    room_id = frame.room_id
+    
+    if not frame.content.strip():
+        return
+    
+    # Verify user is in room
+    if not ChatRepository.is_user_in_chat(db, user.id, room_id):
+        await manager.send_personal_message(user.id, {
+            "type": "error",
+            "message": "You are not in this room"
+        })
+        return
+    
+    # Save message to database
+    message = ChatRepository.create_message(db, room_id, user.id, frame.content)
+    typing_tracker.stop_typing(user.id, room_id)
+    
+    with span("build_frame"):
+        new_message = _message_frame(message, user.username, user.full_name)
+    
+    # Broadcast to all users in room
+    with span("broadcast"):
+        await manager.broadcast_to_room(room_id, new_message)
+
+
+@frame_dispatcher.handler("typing")
+@query_budget(0)
+async def _handle_typing(frame: TypingFrame, db: Session, user: User):
+    """
+    Record a typing signal.
+    
+    Only members currently in the room can signal typing there.
+    The typing tracker fans out one aggregated frame per room per tick.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    if frame.room_id in manager.user_rooms.get(user.id, ()):
+        typing_tracker.record(user.id, user.username, frame.room_id)
+
+
+@frame_dispatcher.handler("resume")
+async def _handle_resume(frame: ResumeFrame, db: Session, user: User):
+    """
+    Pick up a dropped session where it left off.
+    
+    Time Complexity: O(r + n) where r = rooms in the session, n = missed messages
+    Space Complexity: O(n)
+    """
+    await _resume_session(db, user.id, frame)
+
+
+@frame_dispatcher.handler("presence_query")
+@query_budget(0)
+async def _handle_presence_query(frame: PresenceQueryFrame, db: Session, user: User):
+    """
+    Answer a batched "are these users online" lookup.
+    
+    Time Complexity: O(k) where k = number of users asked about
+    Space Complexity: O(k)
+    """
+    await manager.send_personal_message(user.id, {
+        "type": "presence_status",
+        **_presence_status(frame.user_ids)
+    })
+
+
+@frame_dispatcher.handler("ping")
+@query_budget(0)
+async def _handle_ping(frame: PingFrame, db: Session, user: User):
+    """
+    Answer a client keep-alive ping.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    await manager.send_personal_message(user.id, {
+        "type": "pong"
+    })
+
+
+@frame_dispatcher.handler("pong")
+async def _handle_pong(frame: PongFrame, db: Session, user: User):
+    """
+    Answer to a server ping, already counted as activity when received.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    pass
 
 
 @router.websocket("/ws/{token}")
 async def websocket_endpoint(
     websocket: WebSocket,
     token: str,
+    batch_ms: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     """
@@ -22,10 +407,16 @@ async def websocket_endpoint(
     
     Connection URL: ws://localhost:8000/ws/{access_token}
     
+    Frames are JSON text by default. Clients offering the "msgpack"
+    subprotocol get MessagePack binary frames instead (same fields).
+    
+    Opt into batching with ?batch_ms=10: every server frame is then an array
+    of the frames queued within that window (capped at WS_BATCH_MAX_WINDOW_MS).
+    
     Message formats:
     
-    1. Join room:
-       {"type": "join_room", "room_id": 1}
+    1. Join room (optionally replaying messages after since_seq or since_message_id):
+       {"type": "join_room", "room_id": 1, "since_seq": 42}
     
     2. Leave room:
        {"type": "leave_room", "room_id": 1}
@@ -36,10 +427,31 @@ async def websocket_endpoint(
     4. Typing indicator:
        {"type": "typing", "room_id": 1}
     
+    5. Resume after reconnect (token comes from the "connected" frame):
+       {"type": "resume", "resume_token": "...", "last_seqs": {"1": 42}}
+    
+    6. Batched presence lookup:
+       {"type": "presence_query", "user_ids": [1, 2, 3]}
+    
+    7. Reply to a server heartbeat:
+       {"type": "pong"}
+    
     Time Complexity: O(1) for connection, O(n) for broadcasts
     Space Complexity: O(1)
     """
     
+    codec = negotiate_codec(websocket.scope.get("subprotocols", []))
+    
+    if codec is None:
+        await websocket.close(code=4003, reason="Unsupported subprotocol")
+        return
+    
+    # Shed load before doing any database work
+    retry_after = admission_controller.check_server(len(manager.active_connections))
+    if retry_after:
+        await manager.reject(websocket, codec, TRY_AGAIN_LATER_CLOSE_CODE, f"Server busy; retry_after={retry_after:.1f}")
+        return
+    
     # Authenticate user from token
     user = AuthService.get_current_user(db, token)
     
@@ -49,143 +461,109 @@ async def websocket_endpoint(
     
     user_id = user.id
     
-    # Connect user
-    await manager.connect(user_id, websocket)
+    retry_after = admission_controller.check_user(user_id)
+    if retry_after:
+        await manager.reject(websocket, codec, TRY_AGAIN_LATER_CLOSE_CODE, f"Reconnecting too fast; retry_after={retry_after:.1f}")
+        return
+    
+    batch_ms = min(batch_ms, settings.WS_BATCH_MAX_WINDOW_MS)
+    
+    # Connect user (presence changes are pushed to every room they belong to)
+    member_room_ids = ChatRepository.get_user_room_ids(db, user_id)
+    
+    # Hand the pooled connection back: the session checks one out again for
+    # each frame, so an idle socket holds none and the pool bounds in-flight
+    # frames rather than open sockets. user stays usable, detached.
+    db.close()
+    
+    resume_token = await manager.connect(user_id, websocket, member_room_ids, codec, batch_ms / 1000)
     
     try:
         # Send connection confirmation
-        await websocket.send_json({
+        await manager.send_personal_message(user_id, {
             "type": "connected",
             "user_id": user_id,
             "username": user.username,
+            "resume_token": resume_token,
+            "batch_ms": batch_ms,
             "message": "Connected to chat server"
         })
         
+        # Actions currently over their rate limit on this connection
+        throttled_actions = set()
+        
         # Listen for messages
         while True:
             # Receive message from client
-            data = await websocket.receive_text()
-            message_data = json.loads(data)
+            data = await _receive_data(websocket)
             
-            message_type = message_data.get("type")
+            # Any frame counts as a heartbeat
+            presence_service.heartbeat(user_id)
+            heartbeat_monitor.touch(user_id)
             
-            # Handle different message types
-            if message_type == "join_room":
-                # Join a chat room
-                room_id = message_data.get("room_id")
-                
-                # Verify user has access to room
-                if ChatRepository.is_user_in_chat(db, user_id, room_id):
-                    manager.join_room(user_id, room_id)
-                    
-                    # Notify user
-                    await manager.send_personal_message(user_id, {
-                        "type": "room_joined",
-                        "room_id": room_id,
-                        "message": f"Joined room {room_id}"
-                    })
-                    
-                    # Notify others in room
-                    await manager.broadcast_to_room(room_id, {
-                        "type": "user_joined",
-                        "room_id": room_id,
-                        "user_id": user_id,
-                        "username": user.username
-                    }, exclude_user=user_id)
-                else:
+            # Stage timings for this frame, labelled once its type is known
+            with trace("ws:invalid") as frame_trace:
+                # Malformed frames get an error reply, the connection stays up
+                try:
+                    with span("parse"):
+                        frame = frame_dispatcher.decode(data, codec)
+                except FrameError as e:
                     await manager.send_personal_message(user_id, {
                         "type": "error",
-                        "message": "You don't have access to this room"
+                        "message": str(e)
                     })
-            
-            elif message_type == "leave_room":
-                # Leave a chat room
-                room_id = message_data.get("room_id")
-                manager.leave_room(user_id, room_id)
-                
-                # Notify user
-                await manager.send_personal_message(user_id, {
-                    "type": "room_left",
-                    "room_id": room_id,
-                    "message": f"Left room {room_id}"
-                })
+                    continue
                 
-                # Notify others
-                await manager.broadcast_to_room(room_id, {
-                    "type": "user_left",
-                    "room_id": room_id,
-                    "user_id": user_id,
-                    "username": user.username
-                })
-            
-            elif message_type == "message":
-                # Send a message to room
-                room_id = message_data.get("room_id")
-                content = message_data.get("content")
+                frame_trace.operation = f"ws:{frame.type}"
                 
-                if not content or not content.strip():
-                    continue
+                action = RATE_LIMITED_FRAMES.get(frame.type)
+                if action:
+                    retry_after = rate_limiter.check(user_id, action)
+                    
+                    if retry_after:
+                        # Typing floods are lossy anyway, tell the client once per streak
+                        if action != "typing" or action not in throttled_actions:
+                            await manager.send_personal_message(user_id, {
+                                "type": "throttled",
+                                "action": action,
+                                "frame_type": frame.type,
+                                "retry_after": round(retry_after, 3)
+                            })
+                        throttled_actions.add(action)
+                        continue
+                    
+                    throttled_actions.discard(action)
                 
-                # Verify user is in room
-                if not ChatRepository.is_user_in_chat(db, user_id, room_id):
+                try:
+                    if settings.QUERY_TRACKING_ENABLED:
+                        handler = frame_dispatcher.handlers[frame.type]
+                        with track_queries(f"ws:{frame.type}", getattr(handler, "query_budget", None)):
+                            await frame_dispatcher.dispatch(frame, db, user)
+                    else:
+                        await frame_dispatcher.dispatch(frame, db, user)
+                except Exception:
+                    logger.exception("Error handling %s for user %s", frame.type, user_id,
+                                     extra={"event": "ws.frame_failed", "user_id": user_id, "frame_type": frame.type})
+                    db.rollback()
                     await manager.send_personal_message(user_id, {
                         "type": "error",
-                        "message": "You are not in this room"
+                        "message": f"Could not process {frame.type}"
                     })
-                    continue
-                
-                # Save message to database
-                message = ChatRepository.create_message(db, room_id, user_id, content)
-                
-                # Broadcast to all users in room
-                await manager.broadcast_to_room(room_id, {
-                    "type": "new_message",
-                    "room_id": room_id,
-                    "message_id": message.id,
-                    "sender_id": user_id,
-                    "sender_username": user.username,
-                    "sender_full_name": user.full_name,
-                    "content": content,
-                    "created_at": str(message.created_at)
-                })
-            
-            elif message_type == "typing":
-                # Typing indicator
-                room_id = message_data.get("room_id")
-                
-                # Broadcast to others in room (exclude sender)
-                await manager.broadcast_to_room(room_id, {
-                    "type": "user_typing",
-                    "room_id": room_id,
-                    "user_id": user_id,
-                    "username": user.username
-                }, exclude_user=user_id)
-            
-            elif message_type == "ping":
-                # Keep-alive ping
-                await manager.send_personal_message(user_id, {
-                    "type": "pong"
-                })
-            
-            else:
-                # Unknown message type
-                await manager.send_personal_message(user_id, {
-                    "type": "error",
-                    "message": f"Unknown message type: {message_type}"
-                })
+                finally:
+                    # Release the connection until the next frame
+                    db.close()
     
     except WebSocketDisconnect:
         # User disconnected
-        manager.disconnect(user_id)
-        print(f"User {user_id} disconnected")
+        manager.disconnect(user_id, websocket)
     
-    except Exception as e:
+    except Exception:
         # Error occurred
-        print(f"WebSocket error for user {user_id}: {e}")
-        manager.disconnect(user_id)
+        logger.exception("WebSocket error for user %s", user_id, extra={"event": "ws.error", "user_id": user_id})
+        manager.disconnect(user_id, websocket)
 
 
-@router.get("/ws/online-users")
+@router.get("/ws/online-users", response_model=OnlineUsers)
 async def get_online_users():
     """
     Get list of currently online users.
@@ -193,7 +571,38 @@ async def get_online_users():
     Time Complexity: O(n)
     Space Complexity: O(n)
     """
+    return OnlineUsers(online_users=manager.get_online_users(), count=presence_service.online_count())
+
+
+@router.get("/ws/stats", dependencies=[Depends(require_admin)])
+async def get_connection_stats():
+    """
+    Get outbound buffer depth, dropped frames and lag for every connection,
+    plus inbound frame counts and decode cost per frame type, rejected
+    connection attempts by reason and event loop lag.
+    
+    Operators only (X-Admin-Token): the per-connection stats show who is online.
+    
+    Time Complexity: O(n) where n = connected users
+    Space Complexity: O(n)
+    """
     return {
-        "online_users": manager.get_online_users(),
-        "count": len(manager.get_online_users())
-    }
\ No newline at end of file
+        **manager.get_connection_stats(),
+        "inbound_frames": frame_dispatcher.get_stats(),
+        "rejected_connections": admission_controller.rejected,
+        "event_loop": loop_monitor.get_stats()
+    }
+
+
+@router.post("/ws/presence", response_model=PresenceStatus)
+async def query_presence(
+    query: PresenceQuery,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Check which of the given users are online.
+    
+    Time Complexity: O(k) where k = number of users asked about
+    Space Complexity: O(k)
+    """
+    return _presence_status(query.user_ids)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
+from src.schemas.user import UserResponse
 
 class UserRegister(BaseModel):
     """Schema for user registration"""
@@ -19,6 +20,19 @@ class TokenResponse(BaseModel):
     refresh_token : str
     token_type : str = "bearer"
 
+class AuthResponse(BaseModel):
+    """Schema for register and login responses"""
+    message: str
+    user: UserResponse
+    tokens: TokenResponse
+
+
+class SessionsTerminatedResponse(BaseModel):
+    """Schema for logout from all devices response"""
+    message: str
+    sessions_terminated: int
+
+
 class TokenRefresh(BaseModel):
     """Schema for refreshing access token"""
     refresh_token: str
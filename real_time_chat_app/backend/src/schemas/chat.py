@@ -66,6 +66,24 @@ class GroupResponse(BaseModel):
         from_attributes = True
 
 
+class GroupSummary(GroupResponse):
+    """Schema for a group in the user's group list"""
+    last_message: Optional[str] = None
+    last_message_time: Optional[datetime] = None
+
+
+class GroupCreatedResponse(BaseModel):
+    """Schema for create group response"""
+    message: str
+    group: GroupResponse
+
+
+class MembersAddedResponse(BaseModel):
+    """Schema for add members response"""
+    message: str
+    members_added: int
+
+
 class GroupWithMembers(GroupResponse):
     """Schema for group with member details"""
     members: TypingList[dict] = []
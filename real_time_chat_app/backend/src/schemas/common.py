@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class StatusMessage(BaseModel):
+    """Schema for responses that only confirm an action"""
+    message: str
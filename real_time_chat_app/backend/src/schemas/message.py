@@ -14,6 +14,7 @@ class MessageResponse(BaseModel):
     id: int
     chat_room_id: int
     sender_id: Optional[int]
+    seq: Optional[int] = None
     content: str
     is_read: bool
     created_at: datetime
@@ -25,4 +26,10 @@ class MessageResponse(BaseModel):
 class MessageWithSender(MessageResponse):
     """Schema for message with sender information"""
     sender_username: Optional[str] = None
-    sender_full_name: Optional[str] = None
\ No newline at end of file
+    sender_full_name: Optional[str] = None
+
+
+class MessageSentResponse(BaseModel):
+    """Schema for send message response"""
+    message: str
+    data: MessageResponse
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class PresenceQuery(BaseModel):
+    """Schema for a batched presence lookup"""
+    user_ids: List[int] = Field(..., max_length=1000)
+
+
+class PresenceStatus(BaseModel):
+    """Schema for presence lookup results"""
+    online: List[int]
+    offline: List[int]
+
+
+class OnlineUsers(BaseModel):
+    """Schema for the online users list"""
+    online_users: List[int]
+    count: int
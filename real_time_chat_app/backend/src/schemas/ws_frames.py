@@ -0,0 +1,71 @@
+from pydantic import BaseModel, Field, StrictStr, TypeAdapter
+from typing import Dict, List, Literal, Optional, Union
+from typing_extensions import Annotated
+
+
+class JoinRoomFrame(BaseModel):
+    """Schema for joining a room, optionally replaying what was missed"""
+    type: Literal["join_room"]
+    room_id: int
+    since_seq: Optional[int] = Field(None, ge=0)
+    since_message_id: Optional[int] = None
+
+
+class LeaveRoomFrame(BaseModel):
+    """Schema for leaving a room"""
+    type: Literal["leave_room"]
+    room_id: int
+
+
+class ChatMessageFrame(BaseModel):
+    """Schema for sending a message to a room"""
+    type: Literal["message"]
+    room_id: int
+    content: StrictStr = Field(..., max_length=5000)
+
+
+class TypingFrame(BaseModel):
+    """Schema for a typing indicator"""
+    type: Literal["typing"]
+    room_id: int
+
+
+class ResumeFrame(BaseModel):
+    """Schema for resuming a dropped session"""
+    type: Literal["resume"]
+    resume_token: StrictStr
+    last_seqs: Dict[int, int] = {}
+
+
+class PresenceQueryFrame(BaseModel):
+    """Schema for a batched presence lookup"""
+    type: Literal["presence_query"]
+    user_ids: List[int] = Field(..., max_length=1000)
+
+
+class PingFrame(BaseModel):
+    """Schema for a client keep-alive ping"""
+    type: Literal["ping"]
+
+
+class PongFrame(BaseModel):
+    """Schema for a reply to a server ping"""
+    type: Literal["pong"]
+
+
+InboundFrame = Annotated[
+    Union[
+        JoinRoomFrame,
+        LeaveRoomFrame,
+        ChatMessageFrame,
+        TypingFrame,
+        ResumeFrame,
+        PresenceQueryFrame,
+        PingFrame,
+        PongFrame,
+    ],
+    Field(discriminator="type")
+]
+
+# Built once at import: validates raw JSON in one pass and picks the model by "type"
+inbound_frame_adapter = TypeAdapter(InboundFrame)
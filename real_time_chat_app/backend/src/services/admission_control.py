@@ -0,0 +1,109 @@
+from typing import Dict, Optional
+import random
+from src.config import get_settings
+from src.utils.rate_limiter import TokenBucketLimiter
+
+settings = get_settings()
+
+# Close code asking the client to come back later ("Try Again Later")
+TRY_AGAIN_LATER_CLOSE_CODE = 1013
+
+
+def with_jitter(retry_after: float) -> float:
+    """
+    Spread retries over [retry_after, 2 * retry_after) so rejected clients
+    don't all come back in the same instant.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    return retry_after + random.uniform(0, retry_after)
+
+
+class AdmissionController:
+    """
+    Decides whether a new WebSocket connection is accepted.
+    
+    During a reconnect storm (e.g. right after a deploy) every client comes
+    back at once. Admitting all of them makes everyone slow; instead the
+    worker caps its total connections and its accept rate, and each user's
+    reconnect rate, and tells rejected clients when to retry, with jitter.
+    
+    Server-wide checks run before authentication so shed connections cost
+    no database work.
+    
+    Structure:
+    - limiter: token buckets for "accept" (whole worker) and "connect" (per user)
+    - rejected: {reason: number of rejected connections}
+    """
+    
+    def __init__(self):
+        """
+        Initialize admission controller.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.limiter = TokenBucketLimiter({
+            "accept": (settings.WS_MAX_ACCEPTS_PER_SECOND, settings.WS_ACCEPT_BURST),
+            "connect": (settings.WS_USER_CONNECTS_PER_SECOND, settings.WS_USER_CONNECT_BURST),
+        })
+        self.rejected: Dict[str, int] = {}
+    
+    
+    def check_server(self, active_connections: int) -> Optional[float]:
+        """
+        Check the worker-wide connection cap and accept rate.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            active_connections: Connections currently open on this worker
+        
+        Returns:
+            None if admitted, otherwise seconds the client should wait (jittered)
+        """
+        if active_connections >= settings.WS_MAX_CONNECTIONS:
+            return self._reject("max_connections", settings.WS_ADMISSION_RETRY_SECONDS)
+        
+        retry_after = self.limiter.check("server", "accept")
+        if retry_after:
+            return self._reject("accept_rate", max(retry_after, 1.0))
+        
+        return None
+    
+    
+    def check_user(self, user_id: int) -> Optional[float]:
+        """
+        Check how fast a single user is reconnecting.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+        
+        Returns:
+            None if admitted, otherwise seconds the client should wait (jittered)
+        """
+        retry_after = self.limiter.check(user_id, "connect")
+        if retry_after:
+            return self._reject("user_connect_rate", retry_after)
+        
+        return None
+    
+    
+    def _reject(self, reason: str, retry_after: float) -> float:
+        """
+        Count a rejection and jitter its retry hint.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return with_jitter(retry_after)
+
+
+# Global admission controller instance
+admission_controller = AdmissionController()
@@ -1,12 +1,34 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from pydantic import TypeAdapter
 from src.repositories.chat_repository import ChatRepository
 from src.repositories.user_repository import UserRepository
 from src.schemas.message import MessageCreate, MessageResponse, MessageWithSender
-from src.schemas.chat import DirectChatResponse
+from src.schemas.chat import DirectChatResponse, GroupResponse, GroupSummary
 from src.models.user import User
-from src.models.message import Message
-from sqlalchemy import and_
+
+# Read paths get column rows from the repository and turn a whole page into
+# response models in one pydantic-core call
+_message_page = TypeAdapter(List[MessageWithSender])
+_direct_chats = TypeAdapter(List[DirectChatResponse])
+_group_summaries = TypeAdapter(List[GroupSummary])
+
+
+def _as_dicts(rows: list) -> List[dict]:
+    """
+    Column rows as plain dicts keyed by label.
+    
+    pydantic-core validates dicts several times faster than it reads
+    attributes off Row objects (from_attributes).
+    
+    Time Complexity: O(n * c) where n = rows, c = columns
+    Space Complexity: O(n * c)
+    """
+    if not rows:
+        return []
+    
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
 
 
 class ChatService:
@@ -86,30 +108,13 @@ class ChatService:
         # Get or create chat room
         chat_room = ChatRepository.get_or_create_direct_chat(db, user_id, other_user_id)
         
-        # Get messages
-        messages = ChatRepository.get_chat_messages(db, chat_room.id, limit, offset)
+        # Get messages (read state as it was before this visit)
+        rows = ChatRepository.get_chat_message_rows(db, chat_room.id, limit, offset)
         
         # Mark messages as read
         ChatRepository.mark_messages_as_read(db, chat_room.id, user_id)
         
-        # Convert to response with sender info
-        result = []
-        for msg in messages:
-            sender = UserRepository.get_user_by_id(db, msg.sender_id) if msg.sender_id else None
-            
-            msg_with_sender = MessageWithSender(
-                id=msg.id,
-                chat_room_id=msg.chat_room_id,
-                sender_id=msg.sender_id,
-                content=msg.content,
-                is_read=msg.is_read,
-                created_at=msg.created_at,
-                sender_username=sender.username if sender else None,
-                sender_full_name=sender.full_name if sender else None
-            )
-            result.append(msg_with_sender)
-        
-        return result
+        return _message_page.validate_python(_as_dicts(rows))
     
     
     # @staticmethod
@@ -219,57 +224,23 @@ class ChatService:
     def get_user_chats(db: Session, user_id: int) -> List[DirectChatResponse]:
         """
         Get all direct chats for a user.
-        """
-        
-        
-        chat_data = ChatRepository.get_user_chat_rooms(db, user_id)
         
-        result = []
+        Time Complexity: O(n log n) where n = number of user's chats
+        Space Complexity: O(n)
         
-        for item in chat_data:
-            # Safely unpack tuple
-            if not item or len(item) < 3:
-                continue
-            
-            chat_room = item[0]
-            other_user = item[1]
-            last_message = item[2]
-            
-            # Skip if no chat room or not a direct chat
-            if not chat_room or chat_room.room_type != "direct":
-                continue
-            
-            # Skip if no other user (shouldn't happen for direct chats)
-            if not other_user:
-                continue
-            
-            # Count unread messages
-            unread_count = db.query(Message).filter(
-                and_(
-                    Message.chat_room_id == chat_room.id,
-                    Message.sender_id != user_id,
-                    Message.is_read == False
-                )
-            ).count()
+        Args:
+            db: Database session
+            user_id: User ID
             
-            chat_response = DirectChatResponse(
-                chat_room_id=chat_room.id,
-                other_user_id=other_user.id,
-                other_user_username=other_user.username,
-                other_user_full_name=other_user.full_name,
-                last_message=last_message.content if last_message else None,
-                last_message_time=last_message.created_at if last_message else None,
-                unread_count=unread_count
-            )
-            result.append(chat_response)
-        
-        # Sort by last message time (newest first)
-        result.sort(
-            key=lambda x: x.last_message_time if x.last_message_time else chat_room.created_at, 
-            reverse=True
-        )
+        Returns:
+            Direct chats with last message and unread count, newest first
+        """
+        rows = ChatRepository.get_direct_chat_rows(db, user_id)
+        
+        # Sort by last message time (newest first), empty chats by creation
+        rows.sort(key=lambda row: row.last_message_time or row.room_created_at, reverse=True)
         
-        return result
+        return _direct_chats.validate_python(_as_dicts(rows))
     
     
     @staticmethod
@@ -291,7 +262,7 @@ class ChatService:
         return ChatRepository.is_user_in_chat(db, user_id, chat_room_id)
     
     @staticmethod
-    def create_group(db: Session, creator_id: int, name: str, member_ids: List[int]) -> dict:
+    def create_group(db: Session, creator_id: int, name: str, member_ids: List[int]) -> GroupResponse:
         """
         Create a new group chat.
         
@@ -305,7 +276,7 @@ class ChatService:
             member_ids: List of user IDs to add
             
         Returns:
-            Dictionary with group info
+            Created group with member count
             
         Raises:
             ValueError: If validation fails
@@ -322,14 +293,14 @@ class ChatService:
         # Get member count
         members = ChatRepository.get_group_members(db, group.id)
         
-        return {
-            "id": group.id,
-            "name": group.name,
-            "room_type": group.room_type,
-            "created_by": group.created_by,
-            "member_count": len(members),
-            "created_at": group.created_at
-        }
+        return GroupResponse(
+            id=group.id,
+            name=group.name,
+            room_type=group.room_type,
+            created_by=group.created_by,
+            member_count=len(members),
+            created_at=group.created_at
+        )
     
     
     @staticmethod
@@ -396,27 +367,10 @@ class ChatService:
         if not ChatRepository.is_user_in_chat(db, user_id, group_id):
             raise ValueError("You are not a member of this group")
         
-        # Get messages
-        messages = ChatRepository.get_chat_messages(db, group_id, limit, offset)
+        # Get messages with sender info
+        rows = ChatRepository.get_chat_message_rows(db, group_id, limit, offset)
         
-        # Convert to response with sender info
-        result = []
-        for msg in messages:
-            sender = UserRepository.get_user_by_id(db, msg.sender_id) if msg.sender_id else None
-            
-            msg_with_sender = MessageWithSender(
-                id=msg.id,
-                chat_room_id=msg.chat_room_id,
-                sender_id=msg.sender_id,
-                content=msg.content,
-                is_read=msg.is_read,
-                created_at=msg.created_at,
-                sender_username=sender.username if sender else None,
-                sender_full_name=sender.full_name if sender else None
-            )
-            result.append(msg_with_sender)
-        
-        return result
+        return _message_page.validate_python(_as_dicts(rows))
     
     
     @staticmethod
@@ -499,7 +453,7 @@ class ChatService:
     
     
     @staticmethod
-    def get_user_groups(db: Session, user_id: int) -> List[dict]:
+    def get_user_groups(db: Session, user_id: int) -> List[GroupSummary]:
         """
         Get all groups user is member of.
         
@@ -511,30 +465,8 @@ class ChatService:
             user_id: User ID
             
         Returns:
-            List of group info dictionaries
+            Group summaries with last message
         """
-        chat_data = ChatRepository.get_user_chat_rooms(db, user_id)
+        rows = ChatRepository.get_group_rows(db, user_id)
         
-        result = []
-        
-        for chat_room, _, last_message in chat_data:
-            # Only include group chats
-            if chat_room.room_type != "group":
-                continue
-            
-            # Get member count
-            members = ChatRepository.get_group_members(db, chat_room.id)
-            
-            group_info = {
-                "id": chat_room.id,
-                "name": chat_room.name,
-                "room_type": chat_room.room_type,
-                "created_by": chat_room.created_by,
-                "member_count": len(members),
-                "last_message": last_message.content if last_message else None,
-                "last_message_time": last_message.created_at if last_message else None,
-                "created_at": chat_room.created_at
-            }
-            result.append(group_info)
-        
-        return result
\ No newline at end of file
+        return _group_summaries.validate_python(_as_dicts(rows))
\ No newline at end of file
@@ -0,0 +1,88 @@
+from typing import Iterator, Optional, Union
+from datetime import datetime
+import json
+import zlib
+from sqlalchemy.engine import Connection, Engine
+from src.config import get_settings
+from src.database import SessionLocal
+from src.repositories.chat_repository import ChatRepository
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+settings = get_settings()
+
+
+def _json_default(value):
+    """ISO 8601 for datetimes, like the JSON API"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_line(record: dict) -> bytes:
+    """
+    One NDJSON line (compact JSON object plus newline).
+    
+    Time Complexity: O(n) where n = size of the record
+    Space Complexity: O(n)
+    """
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=_json_default) + "\n").encode()
+
+
+class ExportService:
+    """
+    Streams room history out as NDJSON, one message per line.
+    """
+    
+    @staticmethod
+    def stream_room_history(bind: Union[Engine, Connection], chat_room_id: int, compress: bool = False,
+                            batch_size: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Yield a room's full history as NDJSON chunks, optionally gzipped.
+        
+        Rows come from a server-side cursor in EXPORT_BATCH_SIZE batches and
+        every batch becomes one chunk, so memory stays at one batch whether
+        the room has a thousand messages or fifty million. The generator
+        opens its own session: the request's session is closed as soon as
+        the route returns, before the body is streamed. Membership must be
+        checked by the caller.
+        
+        Time Complexity: O(n) where n = messages in the room
+        Space Complexity: O(b) where b = batch size
+        
+        Args:
+            bind: Engine or connection of the request's session
+            chat_room_id: Chat room ID
+            compress: Gzip the stream
+            batch_size: Rows per fetch and chunk (EXPORT_BATCH_SIZE)
+        
+        Returns:
+            Iterator of response body chunks
+        """
+        # wbits=31 writes a gzip header and trailer instead of raw zlib
+        encoder = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+        db = SessionLocal(bind=bind)
+        
+        try:
+            batches = ChatRepository.stream_chat_message_rows(
+                db, chat_room_id, batch_size or settings.EXPORT_BATCH_SIZE
+            )
+            
+            for rows in batches:
+                keys = rows[0]._fields
+                chunk = b"".join(encode_line(dict(zip(keys, row))) for row in rows)
+                
+                if encoder is not None:
+                    chunk = encoder.compress(chunk)
+                if chunk:
+                    yield chunk
+            
+            if encoder is not None:
+                yield encoder.flush()
+        finally:
+            db.close()
@@ -0,0 +1,161 @@
+from typing import Awaitable, Callable, Dict, Union
+from pydantic import BaseModel, TypeAdapter, ValidationError
+import time
+
+
+class FrameError(Exception):
+    """Raised when an inbound frame can't be decoded or validated"""
+    pass
+
+
+def _describe(error: ValidationError) -> str:
+    """
+    Turn a validation error into a short message for the client.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    first = error.errors()[0]
+    kind = first["type"]
+    
+    if kind == "json_invalid":
+        return "Malformed frame"
+    if kind == "union_tag_invalid":
+        return f"Unknown message type: {first['ctx']['tag']}"
+    if kind == "union_tag_not_found":
+        return "Missing message type"
+    if not first["loc"]:
+        return f"Invalid frame: {first['msg']}"
+    
+    frame_type, *field = first["loc"]
+    return f"Invalid {frame_type} frame: {'.'.join(map(str, field))}: {first['msg']}"
+
+
+class FrameDispatcher:
+    """
+    Decodes inbound WebSocket frames and routes them to registered handlers.
+    
+    Validation goes through one TypeAdapter built at import time over a
+    union discriminated by "type", so JSON text is parsed and validated in a
+    single pass and the model is picked by a tag lookup. Handlers live in a
+    dict keyed by type, so dispatch is O(1) however many types exist.
+    
+    Structure:
+    - handlers: {frame type: async handler(frame, *args)}
+    - stats: {frame type or "invalid": {"count", "errors", "decode_ns"}}
+    """
+    
+    def __init__(self, adapter: TypeAdapter):
+        """
+        Initialize frame dispatcher.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            adapter: Discriminated-union TypeAdapter over all inbound frame models
+        """
+        self.adapter = adapter
+        self.handlers: Dict[str, Callable[..., Awaitable[None]]] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+    
+    
+    def handler(self, frame_type: str):
+        """
+        Decorator registering the handler for a frame type.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            frame_type: Value of the frame's "type" field
+        """
+        def register(func: Callable[..., Awaitable[None]]):
+            self.handlers[frame_type] = func
+            return func
+        
+        return register
+    
+    
+    def decode(self, data: Union[str, bytes], codec: type) -> BaseModel:
+        """
+        Parse and validate one inbound frame.
+        
+        Time Complexity: O(n) where n = frame size
+        Space Complexity: O(n)
+        
+        Args:
+            data: Raw text or binary payload
+            codec: Frame encoding negotiated with the client
+        
+        Returns:
+            Validated frame model
+        
+        Raises:
+            FrameError: If the frame is malformed or fails validation
+        """
+        start = time.perf_counter_ns()
+        
+        try:
+            if isinstance(data, str) or not codec.binary:
+                frame = self.adapter.validate_json(data)
+            else:
+                frame = self.adapter.validate_python(codec.decode(data))
+        except ValidationError as e:
+            self._record("invalid", time.perf_counter_ns() - start, error=True)
+            raise FrameError(_describe(e))
+        except Exception:
+            # Binary payload that isn't valid MessagePack
+            self._record("invalid", time.perf_counter_ns() - start, error=True)
+            raise FrameError("Malformed frame")
+        
+        self._record(frame.type, time.perf_counter_ns() - start)
+        return frame
+    
+    
+    async def dispatch(self, frame: BaseModel, *args):
+        """
+        Run the handler registered for a validated frame.
+        
+        Time Complexity: O(1) plus the handler
+        Space Complexity: O(1)
+        
+        Args:
+            frame: Frame returned by decode()
+            *args: Passed through to the handler after the frame
+        """
+        await self.handlers[frame.type](frame, *args)
+    
+    
+    def _record(self, frame_type: str, elapsed_ns: int, error: bool = False):
+        """
+        Add one decode to the per-type counters.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        entry = self.stats.get(frame_type)
+        if entry is None:
+            entry = self.stats[frame_type] = {"count": 0, "errors": 0, "decode_ns": 0}
+        
+        entry["count"] += 1
+        entry["decode_ns"] += elapsed_ns
+        if error:
+            entry["errors"] += 1
+    
+    
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Frame counts and average decode + validation cost per type.
+        
+        Time Complexity: O(t) where t = number of frame types seen
+        Space Complexity: O(t)
+        """
+        return {
+            frame_type: {
+                "count": entry["count"],
+                "errors": entry["errors"],
+                "avg_decode_us": round(entry["decode_ns"] / entry["count"] / 1000, 2)
+            }
+            for frame_type, entry in self.stats.items()
+        }
@@ -0,0 +1,155 @@
+from typing import Dict, List, Tuple
+import asyncio
+import logging
+import time
+from src.config import get_settings
+from src.utils.timer_wheel import TimerWheel
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Close code sent to connections that stopped answering pings
+HEARTBEAT_TIMEOUT_CLOSE_CODE = 4002
+
+
+class HeartbeatMonitor:
+    """
+    Server-driven heartbeats and reaping of dead WebSocket connections.
+    
+    A half-open TCP connection never raises on receive, so it would otherwise
+    keep its room entries forever. Every inbound frame marks the connection
+    alive. A connection quiet for WS_HEARTBEAT_INTERVAL_SECONDS gets a "ping"
+    frame, and one quiet for WS_IDLE_TIMEOUT_SECONDS is closed and cleaned up.
+    
+    One timer wheel holds a single entry per connection, so a tick only visits
+    connections that are actually due instead of scanning everyone, and no
+    task is spawned per connection. Activity just updates a timestamp; the
+    entry is pushed back lazily when it fires.
+    
+    Structure:
+    - last_activity: {user_id: monotonic time of last inbound frame}
+    - wheel: user_id -> time of the next check
+    """
+    
+    def __init__(self):
+        """
+        Initialize heartbeat monitor.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.last_activity: Dict[int, float] = {}
+        self.wheel = TimerWheel(settings.WS_HEARTBEAT_TICK_SECONDS, now=time.monotonic())
+    
+    
+    def track(self, user_id: int):
+        """
+        Start watching a newly connected user.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+        """
+        now = time.monotonic()
+        self.last_activity[user_id] = now
+        self.wheel.schedule(user_id, now + settings.WS_HEARTBEAT_INTERVAL_SECONDS)
+    
+    
+    def forget(self, user_id: int):
+        """
+        Stop watching a user whose connection is gone.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+        """
+        self.last_activity.pop(user_id, None)
+        self.wheel.cancel(user_id)
+    
+    
+    def touch(self, user_id: int):
+        """
+        Record an inbound frame from a user.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+        """
+        if user_id in self.last_activity:
+            self.last_activity[user_id] = time.monotonic()
+    
+    
+    def collect(self, now: float) -> Tuple[List[int], List[int]]:
+        """
+        Find connections that need a ping and connections that are dead.
+        
+        Time Complexity: O(e) where e = connections whose check fell due
+        Space Complexity: O(e)
+        
+        Args:
+            now: Current time.monotonic()
+        
+        Returns:
+            Tuple of (user IDs to ping, user IDs to reap)
+        """
+        to_ping = []
+        to_reap = []
+        
+        for user_id in self.wheel.advance(now):
+            last_activity = self.last_activity.get(user_id)
+            if last_activity is None:
+                continue
+            
+            ping_at = last_activity + settings.WS_HEARTBEAT_INTERVAL_SECONDS
+            reap_at = last_activity + settings.WS_IDLE_TIMEOUT_SECONDS
+            
+            if reap_at <= now:
+                self.last_activity.pop(user_id)
+                to_reap.append(user_id)
+            elif ping_at > now:
+                # Active since it was scheduled, check again later
+                self.wheel.schedule(user_id, ping_at)
+            else:
+                to_ping.append(user_id)
+                self.wheel.schedule(user_id, min(now + settings.WS_HEARTBEAT_INTERVAL_SECONDS, reap_at))
+        
+        return to_ping, to_reap
+    
+    
+    async def run(self, manager):
+        """
+        Background loop pinging quiet connections and reaping dead ones.
+        
+        Time Complexity: O(e) per tick where e = connections due
+        Space Complexity: O(e)
+        
+        Args:
+            manager: ConnectionManager owning the connections
+        """
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_TICK_SECONDS)
+            
+            try:
+                to_ping, to_reap = self.collect(time.monotonic())
+                
+                for user_id in to_ping:
+                    await manager.send_personal_message(user_id, {"type": "ping"})
+                
+                if to_reap:
+                    await manager.close_connections(
+                        to_reap, HEARTBEAT_TIMEOUT_CLOSE_CODE, "Heartbeat timeout"
+                    )
+                    logger.info("Reaped %s idle connection(s)", len(to_reap),
+                                extra={"event": "heartbeat.reaped", "count": len(to_reap)})
+            except Exception:
+                logger.exception("Heartbeat tick failed", extra={"event": "heartbeat.tick_failed"})
+
+
+# Global heartbeat monitor instance
+heartbeat_monitor = HeartbeatMonitor()
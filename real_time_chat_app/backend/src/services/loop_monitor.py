@@ -0,0 +1,182 @@
+from typing import Deque, Dict, List, Optional
+from collections import deque
+from pathlib import Path
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from src.config import get_settings
+from src.utils.metrics import metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Frames from files under backend/ are ours; the rest is stdlib or libraries
+APP_DIR = str(Path(__file__).resolve().parent.parent.parent)
+
+loop_lag_seconds = metrics.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke a sleeping task (scheduling delay)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+loop_blocked = metrics.counter(
+    "event_loop_blocked_total",
+    "Event loop stalls longer than LOOP_BLOCK_THRESHOLD_SECONDS, by innermost app frame",
+    ("site",)
+)
+
+
+def _blocking_site(stack: List[traceback.FrameSummary]) -> str:
+    """
+    Name the innermost app frame of a captured stack ("file.py:123 func").
+    
+    Without an app frame the loop was inside library code (e.g. waiting in
+    selectors.py for the GIL held by a busy thread); that frame is named.
+    
+    Time Complexity: O(d) where d = stack depth
+    Space Complexity: O(1)
+    """
+    app_frames = [
+        frame for frame in stack
+        if frame.filename.startswith(APP_DIR) and "site-packages" not in frame.filename
+    ]
+    frame = app_frames[-1] if app_frames else stack[-1]
+    return f"{Path(frame.filename).name}:{frame.lineno} {frame.name}"
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop scheduling delay and catches the code blocking it.
+    
+    A task sleeps for LOOP_LAG_INTERVAL_SECONDS and records how late it
+    woke up; with a free loop that is well under a millisecond. Blocking
+    code (sync SQLAlchemy in an async handler, bcrypt, ...) delays every
+    task on the worker at once and shows up as lag.
+    
+    Lag can only be measured after the fact, so a watchdog thread also
+    checks that the task keeps beating. When the loop has been stuck for
+    LOOP_BLOCK_THRESHOLD_SECONDS it grabs the loop thread's current stack,
+    which is the blocking call itself, logs it and counts the stall under
+    the innermost app frame.
+    
+    Structure:
+    - last_beat: monotonic time the lag task last ran
+    - max_lag: worst lag seen since start
+    - stalls: last captured stalls (site, stack), newest last
+    """
+    
+    def __init__(self, interval: Optional[float] = None, threshold: Optional[float] = None):
+        """
+        Initialize loop lag monitor.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            interval: Seconds between lag samples (LOOP_LAG_INTERVAL_SECONDS)
+            threshold: Stall length that triggers a stack capture (LOOP_BLOCK_THRESHOLD_SECONDS)
+        """
+        self.interval = interval or settings.LOOP_LAG_INTERVAL_SECONDS
+        self.threshold = threshold or settings.LOOP_BLOCK_THRESHOLD_SECONDS
+        self.last_beat = time.monotonic()
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls: Deque[Dict[str, str]] = deque(maxlen=20)
+        self.loop_thread_id: Optional[int] = None
+    
+    
+    def capture(self, stalled_for: float) -> Optional[Dict[str, str]]:
+        """
+        Record what the loop thread is running right now.
+        
+        Called from the watchdog thread while the loop is stuck.
+        
+        Time Complexity: O(d) where d = stack depth
+        Space Complexity: O(d)
+        
+        Args:
+            stalled_for: Seconds since the loop last ran the lag task
+        
+        Returns:
+            The stall entry, or None if the loop thread is gone
+        """
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return None
+        
+        stack = traceback.extract_stack(frame)
+        site = _blocking_site(stack)
+        stall = {"site": site, "stack": "".join(traceback.format_list(stack[-25:]))}
+        
+        self.stalls.append(stall)
+        loop_blocked.inc(site)
+        logger.warning("Event loop blocked for %.0f ms in %s", stalled_for * 1000, site,
+                       extra={"event": "loop.blocked", "site": site, "stalled_ms": round(stalled_for * 1000, 1),
+                              "stack": stall["stack"]})
+        return stall
+    
+    
+    def _watch(self, stop: threading.Event):
+        """
+        Watchdog thread: capture one stack per stall.
+        
+        Time Complexity: O(1) per check
+        Space Complexity: O(1)
+        """
+        reported_beat = None
+        
+        while not stop.wait(self.threshold / 2):
+            beat = self.last_beat
+            stalled_for = time.monotonic() - beat
+            
+            if stalled_for >= self.threshold and beat != reported_beat:
+                reported_beat = beat
+                self.capture(stalled_for)
+    
+    
+    async def run(self):
+        """
+        Background loop sampling scheduling delay.
+        
+        Time Complexity: O(1) per sample
+        Space Complexity: O(1)
+        """
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        
+        stop = threading.Event()
+        watchdog = threading.Thread(target=self._watch, args=(stop,), name="loop-watchdog", daemon=True)
+        watchdog.start()
+        
+        try:
+            while True:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                
+                now = time.monotonic()
+                self.last_beat = now
+                self.last_lag = max(0.0, now - expected)
+                self.max_lag = max(self.max_lag, self.last_lag)
+                loop_lag_seconds.observe(self.last_lag)
+        finally:
+            stop.set()
+    
+    
+    def get_stats(self) -> dict:
+        """
+        Lag figures and the most recent blocking sites.
+        
+        Time Complexity: O(s) where s = kept stalls
+        Space Complexity: O(s)
+        """
+        return {
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "recent_blocking_sites": [stall["site"] for stall in self.stalls]
+        }
+
+
+# Global loop lag monitor instance
+loop_monitor = LoopLagMonitor()
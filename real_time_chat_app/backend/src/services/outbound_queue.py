@@ -0,0 +1,212 @@
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import time
+
+# Frames that only describe transient state, safe to coalesce or drop
+LOW_PRIORITY_TYPES = {"typing_users", "presence"}
+
+# Slow consumer policies (WS_SLOW_CONSUMER_POLICY)
+POLICY_SHED = "shed"
+POLICY_DISCONNECT = "disconnect"
+
+
+def _merge_presence(older: dict, newer: dict) -> dict:
+    """
+    Fold two presence diffs for the same room into one.
+    
+    Time Complexity: O(u) where u = users in both diffs
+    Space Complexity: O(u)
+    """
+    online = (set(older["online"]) - set(newer["offline"])) | set(newer["online"])
+    offline = (set(older["offline"]) - set(newer["online"])) | set(newer["offline"])
+    
+    return {**newer, "online": sorted(online), "offline": sorted(offline)}
+
+
+class OutboundQueue:
+    """
+    Bounded buffer of frames waiting to be written to one client.
+    
+    Fan-out only appends here, a per-connection writer task drains it, so a
+    client that reads slowly can't stall broadcasts or grow memory without
+    bound. Low-priority frames (typing, presence) live in their own queue keyed
+    by (type, room_id): a newer frame coalesces into the queued one, and when
+    the buffer is full they are dropped to make room. If only high-priority
+    frames are left the put fails and the caller disconnects the client.
+    
+    Structure:
+    - high: deque([(frame, enqueued_at), ...]) always delivered, in order
+    - low: OrderedDict({(type, room_id): (frame, enqueued_at)}) oldest first
+    """
+    
+    def __init__(self, max_frames: int, policy: str = POLICY_SHED):
+        """
+        Initialize outbound queue.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            max_frames: Maximum number of frames buffered for the client
+            policy: POLICY_SHED to drop low-priority frames before giving up,
+                POLICY_DISCONNECT to give up as soon as the buffer is full
+        """
+        self.max_frames = max_frames
+        self.policy = policy
+        self.high: Deque[Tuple[dict, float]] = deque()
+        self.low: "OrderedDict[Hashable, Tuple[dict, float]]" = OrderedDict()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        
+        # Counters exposed through stats()
+        self.sent = 0
+        self.batches = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_queued = 0
+        self.max_lag = 0.0
+    
+    
+    def __len__(self) -> int:
+        return len(self.high) + len(self.low)
+    
+    
+    def put(self, frame: dict) -> bool:
+        """
+        Queue a frame for the client.
+        
+        Time Complexity: O(1), O(u) when merging presence diffs
+        Space Complexity: O(1)
+        
+        Args:
+            frame: Frame to send
+        
+        Returns:
+            False if the client is too far behind and should be disconnected
+        """
+        frame_type = frame.get("type")
+        is_low = frame_type in LOW_PRIORITY_TYPES
+        
+        if is_low:
+            key = (frame_type, frame.get("room_id"))
+            queued = self.low.get(key)
+            
+            if queued is not None:
+                older, enqueued_at = queued
+                merged = _merge_presence(older, frame) if frame_type == "presence" else frame
+                self.low[key] = (merged, enqueued_at)
+                self.coalesced += 1
+                return True
+        
+        if len(self) >= self.max_frames:
+            if self.policy != POLICY_SHED:
+                return False
+            
+            if is_low:
+                self.dropped += 1
+                return True
+            
+            if not self.low:
+                return False
+            
+            self.low.popitem(last=False)
+            self.dropped += 1
+        
+        entry = (frame, time.monotonic())
+        if is_low:
+            self.low[key] = entry
+        else:
+            self.high.append(entry)
+        
+        self.max_queued = max(self.max_queued, len(self))
+        self.ready.set()
+        return True
+    
+    
+    async def get(self) -> dict:
+        """
+        Wait for the next frame, high-priority frames first.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Returns:
+            Next frame to write
+        """
+        while not len(self):
+            self.ready.clear()
+            await self.ready.wait()
+        
+        return self._pop()
+    
+    
+    def drain(self, limit: int) -> List[dict]:
+        """
+        Take up to limit frames that are already queued, without waiting.
+        
+        Time Complexity: O(k) where k = frames taken
+        Space Complexity: O(k)
+        
+        Args:
+            limit: Maximum number of frames to take
+        
+        Returns:
+            Frames in delivery order
+        """
+        frames = []
+        while len(frames) < limit and len(self):
+            frames.append(self._pop())
+        return frames
+    
+    
+    def _pop(self) -> dict:
+        """
+        Remove the next frame, high-priority frames first.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if self.high:
+            frame, enqueued_at = self.high.popleft()
+        else:
+            _, (frame, enqueued_at) = self.low.popitem(last=False)
+        
+        self.sent += 1
+        self.max_lag = max(self.max_lag, time.monotonic() - enqueued_at)
+        return frame
+    
+    
+    def lag(self) -> float:
+        """
+        Seconds the oldest queued frame has been waiting.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        oldest = []
+        if self.high:
+            oldest.append(self.high[0][1])
+        if self.low:
+            oldest.append(next(iter(self.low.values()))[1])
+        
+        return time.monotonic() - min(oldest) if oldest else 0.0
+    
+    
+    def stats(self) -> Dict[str, float]:
+        """
+        Snapshot of the queue's counters.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        return {
+            "queued": len(self),
+            "max_queued": self.max_queued,
+            "sent": self.sent,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "lag_seconds": round(self.lag(), 3),
+            "max_lag_seconds": round(self.max_lag, 3)
+        }
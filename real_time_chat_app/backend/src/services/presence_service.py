@@ -0,0 +1,255 @@
+from typing import Dict, Iterable, Set
+import asyncio
+import logging
+import time
+from src.config import get_settings
+from src.utils.timer_wheel import TimerWheel
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class PresenceService:
+    """
+    Tracks which users are online and pushes presence changes to their rooms.
+    
+    A user is online while connected and heard from within
+    WS_PRESENCE_TIMEOUT_SECONDS. Heartbeats only update a timestamp; a timer
+    wheel checks each user once per timeout, so cost does not grow with the
+    heartbeat rate. Changes are batched per tick into one "presence" frame per
+    affected room, and flapping within a tick cancels out.
+    
+    Structure:
+    - last_seen: {user_id: monotonic time of last heartbeat} (connected users)
+    - online: {user_id, ...} currently considered online
+    - member_rooms: {user_id: {room_id, ...}} rooms the user belongs to
+    - published: {user_id: state last pushed to rooms} for users changed this tick
+    """
+    
+    def __init__(self):
+        """
+        Initialize presence service.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.reset()
+    
+    
+    def reset(self):
+        """
+        Forget all presence state (nobody online, nothing pending).
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.last_seen: Dict[int, float] = {}
+        self.online: Set[int] = set()
+        self.member_rooms: Dict[int, Set[int]] = {}
+        self.published: Dict[int, bool] = {}
+        self.wheel = TimerWheel(settings.WS_PRESENCE_TICK_SECONDS, now=time.monotonic())
+    
+    
+    def connect(self, user_id: int, room_ids: Iterable[int]):
+        """
+        Mark a user online when their socket connects.
+        
+        Time Complexity: O(r) where r = number of rooms the user belongs to
+        Space Complexity: O(r)
+        
+        Args:
+            user_id: User ID
+            room_ids: Rooms the user is a member of (presence is pushed there)
+        """
+        self.member_rooms[user_id] = set(room_ids)
+        self.heartbeat(user_id)
+    
+    
+    def disconnect(self, user_id: int):
+        """
+        Mark a user offline when their socket goes away.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+        """
+        self.last_seen.pop(user_id, None)
+        self.wheel.cancel(user_id)
+        
+        if user_id in self.online:
+            self._set_state(user_id, False)
+        else:
+            # Already timed out and announced, nothing left to push
+            self.member_rooms.pop(user_id, None)
+    
+    
+    def heartbeat(self, user_id: int):
+        """
+        Record activity from a connected user.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+        """
+        now = time.monotonic()
+        self.last_seen[user_id] = now
+        
+        if user_id not in self.online:
+            self._set_state(user_id, True)
+            self.wheel.schedule(user_id, now + settings.WS_PRESENCE_TIMEOUT_SECONDS)
+    
+    
+    def add_member_room(self, user_id: int, room_id: int):
+        """
+        Start pushing a connected user's presence to another room.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if user_id in self.member_rooms:
+            self.member_rooms[user_id].add(room_id)
+    
+    
+    def is_online(self, user_id: int) -> bool:
+        """
+        Check if a single user is online.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        return user_id in self.online
+    
+    
+    def are_online(self, user_ids: Iterable[int]) -> Dict[int, bool]:
+        """
+        Answer a batched "are these users online" query.
+        
+        Time Complexity: O(k) where k = number of users asked about
+        Space Complexity: O(k)
+        
+        Args:
+            user_ids: User IDs to check
+        
+        Returns:
+            Dictionary of {user_id: is_online}
+        """
+        return {user_id: user_id in self.online for user_id in user_ids}
+    
+    
+    def online_count(self) -> int:
+        """
+        Get number of online users.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        return len(self.online)
+    
+    
+    def _set_state(self, user_id: int, is_online: bool):
+        """
+        Change a user's state and remember what was last published.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        was_online = user_id in self.online
+        if was_online == is_online:
+            return
+        
+        if is_online:
+            self.online.add(user_id)
+        else:
+            self.online.discard(user_id)
+        
+        # Keep the state clients last saw, so flaps within a tick cancel out
+        self.published.setdefault(user_id, was_online)
+    
+    
+    def _expire(self, now: float):
+        """
+        Take users offline whose heartbeats stopped.
+        
+        Time Complexity: O(e) where e = users whose wheel entry fell due
+        Space Complexity: O(e)
+        """
+        for user_id in self.wheel.advance(now):
+            last_seen = self.last_seen.get(user_id)
+            if last_seen is None:
+                continue
+            
+            deadline = last_seen + settings.WS_PRESENCE_TIMEOUT_SECONDS
+            if deadline > now:
+                # Heard from since it was scheduled, check again later
+                self.wheel.schedule(user_id, deadline)
+            else:
+                self._set_state(user_id, False)
+    
+    
+    def collect_diffs(self, now: float) -> Dict[int, dict]:
+        """
+        Expire stale users and build one presence diff per affected room.
+        
+        Time Complexity: O(e + c * r) where c = changed users, r = rooms per user
+        Space Complexity: O(c * r)
+        
+        Args:
+            now: Current time.monotonic()
+        
+        Returns:
+            Dictionary of {room_id: "presence" frame}
+        """
+        self._expire(now)
+        
+        diffs: Dict[int, dict] = {}
+        
+        for user_id, was_online in self.published.items():
+            is_online = user_id in self.online
+            
+            if is_online != was_online:
+                key = "online" if is_online else "offline"
+                for room_id in self.member_rooms.get(user_id, ()):
+                    frame = diffs.setdefault(room_id, {
+                        "type": "presence",
+                        "room_id": room_id,
+                        "online": [],
+                        "offline": []
+                    })
+                    frame[key].append(user_id)
+            
+            # Room list is only needed while connected or for the final offline diff
+            if not is_online and user_id not in self.last_seen:
+                self.member_rooms.pop(user_id, None)
+        
+        self.published = {}
+        return diffs
+    
+    
+    async def run(self, manager):
+        """
+        Background loop pushing presence diffs to rooms every tick.
+        
+        Rooms nobody has joined on a socket are skipped by the manager.
+        
+        Time Complexity: O(e + c * r + d * m) per tick where m = listeners per room
+        Space Complexity: O(c * r)
+        
+        Args:
+            manager: ConnectionManager used for the room broadcasts
+        """
+        while True:
+            await asyncio.sleep(settings.WS_PRESENCE_TICK_SECONDS)
+            
+            try:
+                for room_id, frame in self.collect_diffs(time.monotonic()).items():
+                    await manager.broadcast_to_room(room_id, frame)
+            except Exception:
+                logger.exception("Presence tick failed", extra={"event": "presence.tick_failed"})
+
+
+# Global presence service instance
+presence_service = PresenceService()
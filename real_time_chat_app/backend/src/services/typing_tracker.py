@@ -0,0 +1,152 @@
+from typing import Dict, List, Set, Tuple
+import asyncio
+import logging
+import time
+from src.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class TypingTracker:
+    """
+    Coalesces typing indicators into one aggregated frame per room per tick.
+    
+    Clients send a "typing" frame on every keystroke. Instead of fanning each
+    one out, the tracker records who is typing where, and a single background
+    tick broadcasts a "typing_users" frame only for rooms whose typist list
+    changed. Entries expire after WS_TYPING_TTL_SECONDS without a new signal.
+    
+    Structure:
+    - last_signal: {(user_id, room_id): monotonic time of last accepted signal}
+    - typists: {room_id: {user_id: (username, expires_at)}}
+    - dirty_rooms: {room_id, ...} whose typist list changed since the last tick
+    """
+    
+    def __init__(self):
+        """
+        Initialize typing tracker.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.last_signal: Dict[Tuple[int, int], float] = {}
+        self.typists: Dict[int, Dict[int, Tuple[str, float]]] = {}
+        self.dirty_rooms: Set[int] = set()
+    
+    
+    def record(self, user_id: int, username: str, room_id: int) -> bool:
+        """
+        Record a typing signal, ignoring signals faster than the throttle.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+            username: Username shown to other members
+            room_id: Room ID
+        
+        Returns:
+            True if the signal was accepted, False if throttled
+        """
+        now = time.monotonic()
+        key = (user_id, room_id)
+        
+        last = self.last_signal.get(key)
+        if last is not None and now - last < settings.WS_TYPING_THROTTLE_SECONDS:
+            return False
+        
+        self.last_signal[key] = now
+        
+        room_typists = self.typists.setdefault(room_id, {})
+        if user_id not in room_typists:
+            self.dirty_rooms.add(room_id)
+        
+        room_typists[user_id] = (username, now + settings.WS_TYPING_TTL_SECONDS)
+        return True
+    
+    
+    def stop_typing(self, user_id: int, room_id: int):
+        """
+        Clear a user's typing state (e.g. after they sent the message).
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+            room_id: Room ID
+        """
+        self.last_signal.pop((user_id, room_id), None)
+        
+        room_typists = self.typists.get(room_id)
+        if room_typists and room_typists.pop(user_id, None):
+            self.dirty_rooms.add(room_id)
+            if not room_typists:
+                del self.typists[room_id]
+    
+    
+    def collect(self) -> List[Tuple[int, dict]]:
+        """
+        Expire stale typists and build frames for rooms that changed.
+        
+        Time Complexity: O(t) where t = users currently typing
+        Space Complexity: O(d) where d = rooms that changed
+        
+        Returns:
+            List of (room_id, "typing_users" frame)
+        """
+        now = time.monotonic()
+        
+        for room_id in list(self.typists.keys()):
+            room_typists = self.typists[room_id]
+            expired = [user_id for user_id, (_, expires_at) in room_typists.items() if expires_at <= now]
+            
+            for user_id in expired:
+                del room_typists[user_id]
+                self.last_signal.pop((user_id, room_id), None)
+            
+            if expired:
+                self.dirty_rooms.add(room_id)
+            if not room_typists:
+                del self.typists[room_id]
+        
+        frames = []
+        for room_id in self.dirty_rooms:
+            room_typists = self.typists.get(room_id, {})
+            frames.append((room_id, {
+                "type": "typing_users",
+                "room_id": room_id,
+                "users": [
+                    {"user_id": user_id, "username": username}
+                    for user_id, (username, _) in room_typists.items()
+                ]
+            }))
+        
+        self.dirty_rooms = set()
+        return frames
+    
+    
+    async def run(self, manager):
+        """
+        Background loop broadcasting aggregated typing frames every tick.
+        
+        Time Complexity: O(t + d * m) per tick where m = members per changed room
+        Space Complexity: O(d)
+        
+        Args:
+            manager: ConnectionManager used for the room broadcasts
+        """
+        while True:
+            await asyncio.sleep(settings.WS_TYPING_TICK_SECONDS)
+            
+            try:
+                for room_id, frame in self.collect():
+                    await manager.broadcast_to_room(room_id, frame)
+            except Exception:
+                logger.exception("Typing tick failed", extra={"event": "typing.tick_failed"})
+
+
+# Global typing tracker instance
+typing_tracker = TypingTracker()
@@ -1,7 +1,95 @@
-from typing import Dict, List, Set
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from collections import deque
 from fastapi import WebSocket
+import asyncio
 import json
+import logging
+import secrets
+import time
 from datetime import datetime
+from src.config import get_settings
+from src.services.presence_service import presence_service
+from src.services.heartbeat_monitor import heartbeat_monitor
+from src.services.outbound_queue import OutboundQueue
+from src.utils.frame_codec import JsonCodec
+from src.utils.metrics import metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Close code sent to clients whose outbound buffer overflowed
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+# Close code sent to a socket when the same user connects again elsewhere
+REPLACED_CLOSE_CODE = 4000
+
+broadcast_fanout = metrics.histogram(
+    "ws_broadcast_fanout",
+    "Connections a room broadcast was queued for",
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+broadcast_seconds = metrics.histogram(
+    "ws_broadcast_duration_seconds",
+    "Time to queue one room broadcast for every recipient",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+)
+
+
+class SuspendedSession:
+    """
+    Server-side state kept for a short while after a client disconnects.
+    
+    Holds the rooms the client was in and the "new_message" frames sent to
+    those rooms since, so a reconnecting client can receive only the gap.
+    """
+    
+    def __init__(self, token: str, user_id: int, room_ids: Set[int], expires_at: float):
+        """
+        Initialize suspended session.
+        
+        Time Complexity: O(r) where r = number of rooms
+        Space Complexity: O(r)
+        
+        Args:
+            token: Resume token handed to the client on connect
+            user_id: User ID owning the session
+            room_ids: Rooms the user had joined
+            expires_at: time.monotonic() deadline after which the session is dropped
+        """
+        self.token = token
+        self.user_id = user_id
+        self.room_ids = set(room_ids)
+        self.expires_at = expires_at
+        
+        # Per-room bounded buffer of missed "new_message" frames
+        self.buffers: Dict[int, Deque[dict]] = {
+            room_id: deque(maxlen=settings.WS_RESUME_BUFFER_SIZE) for room_id in room_ids
+        }
+    
+    
+    def frames_after(self, room_id: int, last_seq: int, latest_seq: int) -> Optional[List[dict]]:
+        """
+        Get buffered frames after last_seq, if the buffer covers the whole gap.
+        
+        Time Complexity: O(b) where b = buffered frames for the room
+        Space Complexity: O(b)
+        
+        Args:
+            room_id: Room ID
+            last_seq: Last sequence number the client has
+            latest_seq: Latest sequence number stored for the room
+        
+        Returns:
+            Frames in sequence order, or None if some are missing from the buffer
+        """
+        frames = [frame for frame in self.buffers.get(room_id, ()) if frame["seq"] > last_seq]
+        expected = list(range(last_seq + 1, latest_seq + 1))
+        
+        # Messages sent over REST or dropped from a full buffer leave holes
+        if [frame["seq"] for frame in frames] != expected:
+            return None
+        
+        return frames
 
 
 class ConnectionManager:
@@ -11,6 +99,9 @@ class ConnectionManager:
     Structure:
     - active_connections: {user_id: WebSocket}
     - room_connections: {room_id: {user_id1, user_id2, ...}}
+    - user_rooms: {user_id: {room_id1, room_id2, ...}}
+    - replay_buffers: {(user_id, room_id): [held broadcast frames]}
+    - suspended_sessions: {resume_token: SuspendedSession} (oldest first)
     """
     
     def __init__(self):
@@ -23,50 +114,112 @@ class ConnectionManager:
         # Map user_id to their WebSocket connection
         self.active_connections: Dict[int, WebSocket] = {}
         
+        # Bounded buffer of frames waiting to be written, drained by a writer task
+        self.outbound: Dict[int, OutboundQueue] = {}
+        
+        # Background close tasks (slow or replaced sockets), referenced until they finish
+        self.closing_tasks: Set[asyncio.Task] = set()
+        
         # Map room_id to set of user_ids in that room
         self.room_connections: Dict[int, Set[int]] = {}
+        
+        # Reverse index of room_connections, so disconnect doesn't scan every room
+        self.user_rooms: Dict[int, Set[int]] = {}
+        
+        # Room broadcasts held back while a user's missed messages are replayed
+        self.replay_buffers: Dict[Tuple[int, int], List[dict]] = {}
+        
+        # Resume token handed out to each connected user
+        self.session_tokens: Dict[int, str] = {}
+        
+        # Disconnected sessions that can still be resumed, in expiry order
+        self.suspended_sessions: Dict[str, SuspendedSession] = {}
+        self.suspended_by_room: Dict[int, Set[str]] = {}
     
     
-    async def connect(self, user_id: int, websocket: WebSocket):
+    async def connect(self, user_id: int, websocket: WebSocket, member_room_ids: Iterable[int] = (),
+                      codec: type = JsonCodec, batch_window: float = 0.0) -> str:
         """
         Connect a user via WebSocket.
         
-        Time Complexity: O(1)
-        Space Complexity: O(1)
+        Time Complexity: O(r) where r = rooms the user belongs to
+        Space Complexity: O(r)
         
         Args:
             user_id: User ID
             websocket: WebSocket connection
+            member_room_ids: Rooms the user belongs to, where presence changes are pushed
+            codec: Frame encoding negotiated with the client
+            batch_window: Seconds to collect frames into one array frame (0 = off)
+        
+        Returns:
+            Resume token the client can present after a reconnect
         """
-        await websocket.accept()
+        await self._accept(websocket, codec)
+        
+        # One socket per user: a new connection replaces the old one
+        previous = self.active_connections.get(user_id)
+        if previous is not None:
+            self.disconnect(user_id)
+            self._close_later(previous, REPLACED_CLOSE_CODE, "Replaced by a newer connection")
+        
         self.active_connections[user_id] = websocket
-        print(f"✅ User {user_id} connected via WebSocket")
+        
+        queue = OutboundQueue(settings.WS_OUTBOUND_QUEUE_SIZE, settings.WS_SLOW_CONSUMER_POLICY)
+        queue.writer = asyncio.create_task(self._write_loop(user_id, websocket, queue, codec, batch_window))
+        self.outbound[user_id] = queue
+        
+        presence_service.connect(user_id, member_room_ids)
+        heartbeat_monitor.track(user_id)
+        
+        token = secrets.token_urlsafe(16)
+        self.session_tokens[user_id] = token
+        
+        logger.info("User %s connected", user_id, extra={"event": "ws.connect", "user_id": user_id})
+        return token
     
     
-    def disconnect(self, user_id: int):
+    def disconnect(self, user_id: int, websocket: Optional[WebSocket] = None):
         """
         Disconnect a user.
         
+        The user's rooms are kept in a suspended session for
+        WS_RESUME_WINDOW_SECONDS so the client can resume without a full resync.
+        
         Time Complexity: O(n) where n = number of rooms user is in
-        Space Complexity: O(1)
+        Space Complexity: O(n)
         
         Args:
             user_id: User ID
+            websocket: Socket being torn down; ignored if the user has since
+                reconnected on a different socket (or was already reaped)
         """
+        if websocket is not None and self.active_connections.get(user_id) is not websocket:
+            return
+        
         # Remove from active connections
         if user_id in self.active_connections:
             del self.active_connections[user_id]
         
+        # Stop the writer, unless it is the one reporting a failed send
+        queue = self.outbound.pop(user_id, None)
+        if queue and queue.writer is not asyncio.current_task():
+            queue.writer.cancel()
+        
+        presence_service.disconnect(user_id)
+        heartbeat_monitor.forget(user_id)
+        
+        room_ids = self.user_rooms.pop(user_id, set())
+        token = self.session_tokens.pop(user_id, None)
+        
         # Remove from all rooms
-        for room_id in list(self.room_connections.keys()):
-            if user_id in self.room_connections[room_id]:
-                self.room_connections[room_id].remove(user_id)
-                
-                # Remove room if empty
-                if not self.room_connections[room_id]:
-                    del self.room_connections[room_id]
+        for room_id in room_ids:
+            self._remove_from_room(user_id, room_id)
+        
+        if token and room_ids:
+            self._suspend_session(token, user_id, room_ids)
         
-        print(f"❌ User {user_id} disconnected")
+        logger.info("User %s disconnected", user_id, extra={"event": "ws.disconnect", "user_id": user_id})
     
     
     def join_room(self, user_id: int, room_id: int):
@@ -84,7 +237,9 @@ class ConnectionManager:
             self.room_connections[room_id] = set()
         
         self.room_connections[room_id].add(user_id)
-        print(f"👥 User {user_id} joined room {room_id}")
+        self.user_rooms.setdefault(user_id, set()).add(room_id)
+        logger.info("User %s joined room %s", user_id, room_id,
+                    extra={"event": "ws.join_room", "user_id": user_id, "room_id": room_id})
     
     
     def leave_room(self, user_id: int, room_id: int):
@@ -98,6 +253,24 @@ class ConnectionManager:
             user_id: User ID
             room_id: Room ID
         """
+        self._remove_from_room(user_id, room_id)
+        
+        if user_id in self.user_rooms:
+            self.user_rooms[user_id].discard(room_id)
+            if not self.user_rooms[user_id]:
+                del self.user_rooms[user_id]
+        
+        logger.info("User %s left room %s", user_id, room_id,
+                    extra={"event": "ws.leave_room", "user_id": user_id, "room_id": room_id})
+    
+    
+    def _remove_from_room(self, user_id: int, room_id: int):
+        """
+        Remove user from a room's member set and drop any replay buffer.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
         if room_id in self.room_connections:
             self.room_connections[room_id].discard(user_id)
             
@@ -105,13 +278,278 @@ class ConnectionManager:
             if not self.room_connections[room_id]:
                 del self.room_connections[room_id]
         
-        print(f"🚪 User {user_id} left room {room_id}")
+        self.replay_buffers.pop((user_id, room_id), None)
+    
+    
+    def begin_replay(self, user_id: int, room_id: int):
+        """
+        Join a room while holding back live broadcasts for this user.
+        
+        Broadcasts to the room are buffered until end_replay() is called,
+        so missed messages can be sent first without live ones interleaving.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+            room_id: Room ID
+        """
+        self.replay_buffers[(user_id, room_id)] = []
+        self.join_room(user_id, room_id)
+    
+    
+    async def end_replay(self, user_id: int, room_id: int, last_seq: int):
+        """
+        Flush broadcasts held during replay and resume live delivery.
+        
+        Messages already covered by the replay are skipped to avoid duplicates.
+        
+        Time Complexity: O(n) where n = number of held frames
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+            room_id: Room ID
+            last_seq: Sequence number of the last message sent during replay
+        """
+        key = (user_id, room_id)
+        
+        # Keep buffering while flushing, so frames arriving mid-flush stay in order
+        while self.replay_buffers.get(key):
+            held = self.replay_buffers[key]
+            self.replay_buffers[key] = []
+            
+            for message in held:
+                if message.get("type") == "new_message" and message.get("seq", 0) <= last_seq:
+                    continue
+                await self.send_personal_message(user_id, message)
+        
+        self.replay_buffers.pop(key, None)
+    
+    
+    def _suspend_session(self, token: str, user_id: int, room_ids: Set[int]):
+        """
+        Keep a disconnected user's rooms around so the session can be resumed.
+        
+        Time Complexity: O(r) where r = number of rooms
+        Space Complexity: O(r)
+        """
+        self._purge_expired_sessions()
+        
+        expires_at = time.monotonic() + settings.WS_RESUME_WINDOW_SECONDS
+        self.suspended_sessions[token] = SuspendedSession(token, user_id, room_ids, expires_at)
+        
+        for room_id in room_ids:
+            self.suspended_by_room.setdefault(room_id, set()).add(token)
+    
+    
+    def _drop_suspended_session(self, token: str) -> Optional[SuspendedSession]:
+        """
+        Remove a suspended session and its room index entries.
+        
+        Time Complexity: O(r) where r = number of rooms
+        Space Complexity: O(1)
+        """
+        session = self.suspended_sessions.pop(token, None)
+        if not session:
+            return None
+        
+        for room_id in session.room_ids:
+            tokens = self.suspended_by_room.get(room_id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self.suspended_by_room[room_id]
+        
+        return session
+    
+    
+    def _purge_expired_sessions(self):
+        """
+        Drop suspended sessions past their resume window.
+        
+        Sessions are stored in expiry order, so only expired ones are visited.
+        
+        Time Complexity: O(e) where e = number of expired sessions
+        Space Complexity: O(1)
+        """
+        now = time.monotonic()
+        
+        while self.suspended_sessions:
+            token, session = next(iter(self.suspended_sessions.items()))
+            if session.expires_at > now:
+                break
+            self._drop_suspended_session(token)
+    
+    
+    def take_suspended_session(self, token: str, user_id: int) -> Optional[SuspendedSession]:
+        """
+        Claim a suspended session for resumption.
+        
+        Time Complexity: O(r) where r = number of rooms in the session
+        Space Complexity: O(1)
+        
+        Args:
+            token: Resume token presented by the client
+            user_id: Authenticated user ID (must own the session)
+        
+        Returns:
+            SuspendedSession, or None if unknown, expired or owned by someone else
+        """
+        self._purge_expired_sessions()
+        
+        session = self.suspended_sessions.get(token)
+        if not session or session.user_id != user_id:
+            return None
+        
+        return self._drop_suspended_session(token)
+    
+    
+    async def close_connections(self, user_ids: List[int], code: int, reason: str):
+        """
+        Clean up and close several connections at once.
+        
+        Bookkeeping is dropped first so nothing is routed to the sockets while
+        the close frames go out concurrently.
+        
+        Time Complexity: O(k * r) where k = connections, r = rooms per user
+        Space Complexity: O(k)
+        
+        Args:
+            user_ids: Users whose connections should be closed
+            code: WebSocket close code
+            reason: Close reason sent to the client
+        """
+        websockets = []
+        
+        for user_id in user_ids:
+            websocket = self.active_connections.get(user_id)
+            if websocket is not None:
+                self.disconnect(user_id)
+                websockets.append(websocket)
+        
+        # A dead peer can make close() fail, the state is already gone either way
+        await asyncio.gather(
+            *(websocket.close(code=code, reason=reason) for websocket in websockets),
+            return_exceptions=True
+        )
+    
+    
+    @staticmethod
+    async def _accept(websocket: WebSocket, codec: type):
+        """
+        Complete the handshake, naming a subprotocol only if the client offered some.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        subprotocol = codec.subprotocol if websocket.scope.get("subprotocols") else None
+        await websocket.accept(subprotocol=subprotocol)
+    
+    
+    async def reject(self, websocket: WebSocket, codec: type, code: int, reason: str):
+        """
+        Turn a connection away with a close code the client can read.
+        
+        The handshake is completed first, browsers don't expose close codes
+        for a refused handshake.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            websocket: Incoming connection
+            codec: Frame encoding negotiated with the client
+            code: WebSocket close code
+            reason: Close reason sent to the client
+        """
+        await self._accept(websocket, codec)
+        await websocket.close(code=code, reason=reason)
+    
+    
+    def _close_later(self, websocket: WebSocket, code: int, reason: str):
+        """
+        Close a socket in the background, keeping a reference until it's done.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        task = asyncio.create_task(websocket.close(code=code, reason=reason))
+        self.closing_tasks.add(task)
+        task.add_done_callback(self.closing_tasks.discard)
+    
+    
+    async def _write_loop(self, user_id: int, websocket: WebSocket, queue: OutboundQueue, codec: type,
+                          batch_window: float = 0.0):
+        """
+        Drain a connection's outbound queue onto its socket.
+        
+        With a batch window, the writer waits that long after the first frame
+        and sends everything queued by then as one array frame, so a busy
+        room costs one send per window instead of one per event.
+        
+        Time Complexity: O(n) per frame where n = encoded size
+        Space Complexity: O(b * n) where b = frames per batch
+        
+        Args:
+            user_id: User ID
+            websocket: Socket the queue belongs to
+            queue: Outbound queue to drain
+            codec: Frame encoding negotiated with the client
+            batch_window: Seconds to collect frames into one array frame (0 = off)
+        """
+        send = websocket.send_bytes if codec.binary else websocket.send_text
+        
+        try:
+            while True:
+                message = await queue.get()
+                
+                if batch_window:
+                    await asyncio.sleep(batch_window)
+                    message = [message] + queue.drain(settings.WS_BATCH_MAX_FRAMES - 1)
+                    queue.batches += 1
+                
+                await send(codec.encode(message))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Error sending to user %s: %s", user_id, e,
+                           extra={"event": "ws.send_failed", "user_id": user_id})
+            self.disconnect(user_id, websocket)
+    
+    
+    def _enqueue(self, user_id: int, message: dict):
+        """
+        Queue a frame for a user, disconnecting them if they fell too far behind.
+        
+        The session is suspended as usual, so the client can resume and
+        fetch what it missed from the database.
+        
+        Time Complexity: O(1) amortized
+        Space Complexity: O(1)
+        
+        Args:
+            user_id: User ID
+            message: Message dictionary
+        """
+        queue = self.outbound.get(user_id)
+        if queue is None or queue.put(message):
+            return
+        
+        websocket = self.active_connections.get(user_id)
+        logger.warning("User %s is too slow, %s frames pending", user_id, len(queue),
+                       extra={"event": "ws.slow_consumer", "user_id": user_id})
+        self.disconnect(user_id)
+        self._close_later(websocket, SLOW_CONSUMER_CLOSE_CODE, "Slow consumer")
     
     
     async def send_personal_message(self, user_id: int, message: dict):
         """
         Send message to a specific user.
         
+        The frame is queued and written by the user's writer task.
+        
         Time Complexity: O(1)
         Space Complexity: O(1)
         
@@ -119,20 +557,19 @@ class ConnectionManager:
             user_id: User ID to send to
             message: Message dictionary
         """
-        if user_id in self.active_connections:
-            websocket = self.active_connections[user_id]
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                print(f"❌ Error sending to user {user_id}: {e}")
-                self.disconnect(user_id)
+        self._enqueue(user_id, message)
     
     
     async def broadcast_to_room(self, room_id: int, message: dict, exclude_user: int = None):
         """
         Send message to all users in a room.
         
-        Time Complexity: O(n) where n = users in room
+        "new_message" frames are also buffered for suspended sessions in the room.
+        
+        Frames are queued per connection, so a slow client never holds up
+        the rest of the room.
+        
+        Time Complexity: O(n + s) where n = users in room, s = suspended sessions in room
         Space Complexity: O(1)
         
         Args:
@@ -140,41 +577,69 @@ class ConnectionManager:
             message: Message dictionary
             exclude_user: Optional user ID to exclude (e.g., sender)
         """
+        if message.get("type") == "new_message" and room_id in self.suspended_by_room:
+            self._purge_expired_sessions()
+            for token in self.suspended_by_room.get(room_id, ()):
+                self.suspended_sessions[token].buffers[room_id].append(message)
+        
         if room_id not in self.room_connections:
             return
         
-        disconnected_users = []
+        start = time.perf_counter()
+        recipients = 0
         
-        for user_id in self.room_connections[room_id]:
+        # Iterate over a snapshot, slow consumers are dropped from the room mid-loop
+        for user_id in list(self.room_connections[room_id]):
             # Skip excluded user
             if exclude_user and user_id == exclude_user:
                 continue
             
-            # Send to user if connected
-            if user_id in self.active_connections:
-                websocket = self.active_connections[user_id]
-                try:
-                    await websocket.send_json(message)
-                except Exception as e:
-                    print(f"❌ Error broadcasting to user {user_id}: {e}")
-                    disconnected_users.append(user_id)
-        
-        # Clean up disconnected users
-        for user_id in disconnected_users:
-            self.disconnect(user_id)
+            recipients += 1
+            
+            # Hold frames for users still replaying missed messages
+            held = self.replay_buffers.get((user_id, room_id))
+            if held is not None:
+                held.append(message)
+                continue
+            
+            self._enqueue(user_id, message)
+        
+        broadcast_fanout.observe(recipients)
+        broadcast_seconds.observe(time.perf_counter() - start)
+    
+    
+    def get_connection_stats(self) -> dict:
+        """
+        Outbound buffer statistics for every connection.
+        
+        Time Complexity: O(n) where n = connected users
+        Space Complexity: O(n)
+        
+        Returns:
+            Totals plus per-connection queue depth, drops and lag
+        """
+        per_connection = {user_id: queue.stats() for user_id, queue in self.outbound.items()}
+        
+        return {
+            "connections": len(per_connection),
+            "queued_frames": sum(stats["queued"] for stats in per_connection.values()),
+            "dropped_frames": sum(stats["dropped"] for stats in per_connection.values()),
+            "max_lag_seconds": max((stats["lag_seconds"] for stats in per_connection.values()), default=0.0),
+            "per_connection": per_connection
+        }
     
     
     def get_online_users(self) -> List[int]:
         """
         Get list of all online user IDs.
         
-        Time Complexity: O(n) where n = connected users
+        Time Complexity: O(n) where n = online users
         Space Complexity: O(n)
         
         Returns:
             List of user IDs
         """
-        return list(self.active_connections.keys())
+        return list(presence_service.online)
     
     
     def is_user_online(self, user_id: int) -> bool:
@@ -186,12 +651,12 @@ class ConnectionManager:
         
         Args:
             user_id: User ID
-            
+        
         Returns:
             True if online, False otherwise
         """
-        return user_id in self.active_connections
+        return presence_service.is_online(user_id)
 
 
 # Global connection manager instance
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional, Union
+import json
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class JsonCodec:
+    """
+    Text frames encoded as compact JSON (the default protocol).
+    """
+    subprotocol = "json"
+    binary = False
+    
+    @staticmethod
+    def encode(frame: Union[dict, list]) -> str:
+        """
+        Serialize a frame (or a batch of frames) to JSON text.
+        
+        Time Complexity: O(n) where n = size of the frame
+        Space Complexity: O(n)
+        """
+        return json.dumps(frame, separators=(",", ":"), ensure_ascii=False)
+    
+    @staticmethod
+    def decode(data: Union[str, bytes]) -> dict:
+        """
+        Parse a JSON frame.
+        
+        Time Complexity: O(n) where n = size of the frame
+        Space Complexity: O(n)
+        """
+        return json.loads(data)
+
+
+class MsgpackCodec:
+    """
+    Binary frames encoded with MessagePack (needs the msgpack package).
+    """
+    subprotocol = "msgpack"
+    binary = True
+    
+    @staticmethod
+    def encode(frame: Union[dict, list]) -> bytes:
+        """
+        Serialize a frame (or a batch of frames) to MessagePack bytes.
+        
+        Time Complexity: O(n) where n = size of the frame
+        Space Complexity: O(n)
+        """
+        return msgpack.packb(frame, use_bin_type=True)
+    
+    @staticmethod
+    def decode(data: Union[str, bytes]) -> dict:
+        """
+        Parse a MessagePack frame.
+        
+        Time Complexity: O(n) where n = size of the frame
+        Space Complexity: O(n)
+        """
+        if isinstance(data, str):
+            # Text frames are always JSON, whatever was negotiated
+            return json.loads(data)
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+# Supported subprotocols, in server preference order
+CODECS: Dict[str, type] = {JsonCodec.subprotocol: JsonCodec}
+if msgpack is not None:
+    CODECS[MsgpackCodec.subprotocol] = MsgpackCodec
+
+
+def negotiate_codec(requested: List[str]) -> Optional[type]:
+    """
+    Pick the codec for a connection from the client's offered subprotocols.
+    
+    Clients that offer nothing get JSON, as before subprotocols existed.
+    
+    Time Complexity: O(k) where k = offered subprotocols
+    Space Complexity: O(1)
+    
+    Args:
+        requested: Subprotocols from the Sec-WebSocket-Protocol header, in client order
+    
+    Returns:
+        Codec class, or None if none of the offered subprotocols is supported
+    """
+    if not requested:
+        return JsonCodec
+    
+    for name in requested:
+        if name in CODECS:
+            return CODECS[name]
+    
+    return None
@@ -0,0 +1,148 @@
+from typing import Dict, Optional
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from src.utils.metrics import metrics
+
+dropped_records = metrics.counter(
+    "log_records_dropped_total",
+    "Log records discarded because the log queue was full"
+)
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line.
+    
+    Fields: ts, level, logger, message, then everything passed as extra=
+    (event, user_id, room_id, ...) and the traceback, if any.
+    """
+    
+    converter = time.gmtime
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of high-frequency events.
+    
+    Records are matched on their "event" extra, e.g. {"ws.join_room": 0.01}
+    keeps 1% of joins. Kept records carry sample_rate so counts can be
+    scaled back up. Warnings and errors are never sampled.
+    
+    Time Complexity: O(1) per record
+    """
+    
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        
+        record.sample_rate = rate
+        return random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting or waiting.
+    
+    The stock QueueHandler formats the message in the calling thread; here
+    only the %-args are merged (they may be mutated later) and formatting,
+    JSON encoding and the stdout write all happen on the listener thread.
+    When the queue is full the record is dropped and counted instead of
+    blocking the event loop.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        
+        # Tracebacks hold frames; render them now while they are still valid
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.inc()
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(settings) -> QueueListener:
+    """
+    Route the app's loggers ("src.*") through a queue to stdout.
+    
+    Safe to call more than once; only the first call configures anything.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(q) where q = LOG_QUEUE_SIZE
+    
+    Args:
+        settings: App settings (LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES)
+    
+    Returns:
+        The running listener
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+    
+    handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    if settings.LOG_SAMPLE_RATES:
+        handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+    
+    logger = logging.getLogger("src")
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.addHandler(handler)
+    # Uvicorn configures the root logger; don't print everything twice
+    logger.propagate = False
+    
+    _listener = QueueListener(handler.queue, output)
+    _listener.start()
+    
+    # Flush what is still queued on shutdown
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,264 @@
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond to 10s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Iterable) -> str:
+    """Render {name="value",...}, or "" without labels"""
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Exact sample value: integers without exponent, floats round-trip"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _add_counts(target: dict, shard: dict):
+    """Add a shard of counter values into target"""
+    for labels, value in list(shard.items()):
+        target[labels] = target.get(labels, 0.0) + value
+
+
+def _add_entries(target: dict, shard: dict):
+    """Add a shard of histogram bucket lists into target"""
+    for labels, entry in list(shard.items()):
+        total = target.setdefault(labels, [0] * len(entry))
+        for i, value in enumerate(entry):
+            total[i] += value
+
+
+class _PerThread:
+    """
+    One values dict per thread, merged only when scraped.
+    
+    Updates from the event loop and from threadpool workers never touch the
+    same dict, so the hot path needs no lock and no update can be lost.
+    Threadpool workers come and go: when a new thread registers or the
+    values are merged, the dicts of threads that have exited are folded into
+    retired and dropped, so the shards stay bounded by the live threads.
+    
+    Structure:
+    - shards: {thread: its values dict}
+    - retired: values of threads that have exited
+    - merge: adds one values dict into another (_add_counts / _add_entries)
+    """
+    
+    def __init__(self, merge: Callable[[dict, dict], None]):
+        self.local = threading.local()
+        self.merge = merge
+        self.shards: Dict[threading.Thread, dict] = {}
+        self.retired: dict = {}
+        self.lock = threading.Lock()
+    
+    def values(self) -> dict:
+        try:
+            return self.local.values
+        except AttributeError:
+            values = self.local.values = {}
+            with self.lock:
+                self._retire_dead_threads()
+                self.shards[threading.current_thread()] = values
+            return values
+    
+    def _retire_dead_threads(self):
+        """Fold the values of exited threads into retired; caller holds the lock"""
+        for thread in [thread for thread in self.shards if not thread.is_alive()]:
+            self.merge(self.retired, self.shards.pop(thread))
+    
+    def merged(self) -> dict:
+        """
+        Totals over all threads, live and exited.
+        
+        Time Complexity: O(t * l) where t = live threads, l = label sets
+        Space Complexity: O(l)
+        """
+        merged: dict = {}
+        with self.lock:
+            self._retire_dead_threads()
+            self.merge(merged, self.retired)
+            for shard in self.shards.values():
+                self.merge(merged, shard)
+        return merged
+
+
+class Metric:
+    """Base class: name, help text, type and label names"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(sample name, rendered labels, value) triples"""
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count.
+    
+    Time Complexity: O(1) per inc(), O(t * l) per scrape where t = live threads, l = label sets
+    """
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.data = _PerThread(_add_counts)
+    
+    def inc(self, *labels: str, amount: float = 1.0):
+        values = self.data.values()
+        values[labels] = values.get(labels, 0.0) + amount
+    
+    def totals(self) -> Dict[Labels, float]:
+        return self.data.merged()
+    
+    def samples(self):
+        return [
+            (self.name, _format_labels(self.labelnames, labels), value)
+            for labels, value in sorted(self.totals().items())
+        ]
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in fixed buckets.
+    
+    Each label set keeps non-cumulative bucket counts plus the sum; the
+    cumulative _bucket series are built at scrape time.
+    
+    Time Complexity: O(log b) per observe(), O(t * l * b) per scrape
+    """
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.data = _PerThread(_add_entries)
+    
+    def observe(self, value: float, *labels: str):
+        values = self.data.values()
+        entry = values.get(labels)
+        if entry is None:
+            # len(buckets) finite buckets, +Inf, then the sum
+            entry = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+    
+    @contextmanager
+    def time(self, *labels: str):
+        """Observe the duration of a with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+    
+    def totals(self) -> Dict[Labels, List[float]]:
+        return self.data.merged()
+    
+    def samples(self):
+        samples = []
+        for labels, entry in sorted(self.totals().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), entry):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                samples.append((f"{self.name}_bucket", _format_labels(self.labelnames + ("le",), labels + (le,)), cumulative))
+            samples.append((f"{self.name}_sum", _format_labels(self.labelnames, labels), entry[-1]))
+            samples.append((f"{self.name}_count", _format_labels(self.labelnames, labels), cumulative))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """
+    Gauge or counter read from existing state when scraped.
+    
+    Costs nothing on the hot path: the callback returns either one value or
+    {label values: value}.
+    """
+    
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Union[float, Dict[Labels, float]]],
+                 labelnames: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.kind = kind
+    
+    def samples(self):
+        value = self.callback()
+        if not isinstance(value, dict):
+            return [(self.name, "", value)]
+        return [
+            (self.name, _format_labels(self.labelnames, labels), sample)
+            for labels, sample in sorted(value.items())
+        ]
+
+
+class MetricsRegistry:
+    """
+    Metrics exposed by /metrics, in registration order.
+    
+    Structure:
+    - metrics: {name: Metric}
+    """
+    
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric, replacing any previous one with the same name.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def callback(self, name: str, documentation: str, callback: Callable, labelnames: Sequence[str] = (),
+                 kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback, labelnames, kind))
+    
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        
+        Time Complexity: O(s) where s = number of samples
+        Space Complexity: O(s)
+        """
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
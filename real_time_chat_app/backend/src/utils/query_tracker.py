@@ -0,0 +1,194 @@
+from typing import Callable, Dict, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import re
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.config import get_settings
+from src.utils.metrics import metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+queries_per_unit = metrics.histogram(
+    "db_queries_per_request",
+    "SQL statements issued per HTTP request or WebSocket frame",
+    ("endpoint",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+)
+db_seconds_per_unit = metrics.histogram(
+    "db_time_per_request_seconds",
+    "Time spent in SQL statements per HTTP request or WebSocket frame",
+    ("endpoint",)
+)
+repeated_queries = metrics.counter(
+    "db_repeated_query_warnings_total",
+    "Requests or frames that ran one statement shape suspiciously often (likely N+1)",
+    ("endpoint",)
+)
+budget_exceeded = metrics.counter(
+    "db_query_budget_exceeded_total",
+    "Requests or frames that issued more statements than their declared budget",
+    ("endpoint",)
+)
+
+# Variable-length IN lists ("IN (?, ?, ?)" or "IN (__[POSTCOMPILE_x])") collapse to one shape
+_IN_LIST = re.compile(r"IN \((?:[?%s,\s]+|__\[POSTCOMPILE_\w+\])\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+# BEGIN/SAVEPOINT/RELEASE differ between SQLite, Postgres and the test fixtures
+_TRANSACTION_CONTROL = re.compile(r"\s*(BEGIN|SAVEPOINT|RELEASE|ROLLBACK TO)\b", re.IGNORECASE)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when QUERY_BUDGET_ENFORCE is on and a budget is exceeded"""
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a SQL statement so repeated executions compare equal.
+    
+    Time Complexity: O(n) where n = statement length
+    Space Complexity: O(n)
+    """
+    return _IN_LIST.sub("IN (...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """
+    SQL statements issued by one unit of work (an HTTP request or a frame).
+    
+    Structure:
+    - count: statements executed
+    - seconds: total time inside the driver
+    - shapes: {normalized statement: times executed}
+    - budget: maximum statements allowed, None for no limit
+    """
+    
+    def __init__(self, label: str, budget: Optional[int] = None):
+        self.label = label
+        self.budget = budget
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, int] = {}
+    
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+    
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statement shapes executed at least threshold times"""
+        return {shape: times for shape, times in self.shapes.items() if times >= threshold}
+
+
+# Stats of the request or frame running in the current context. Starlette
+# copies the context into threadpool workers, so sync routes are tracked too.
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Stats being collected for the current request or frame, if any"""
+    return _current.get()
+
+
+def install(engine: Engine):
+    """
+    Attribute every statement run on an engine to the current unit of work.
+    
+    Statements outside track_queries() cost one context variable lookup.
+    Transaction control statements are not counted.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if stats is None or not conn.info.get("query_start"):
+            return
+        
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if not _TRANSACTION_CONTROL.match(statement):
+            stats.record(statement, elapsed)
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare the most SQL statements a route or frame handler may issue.
+    
+    Usage:
+        @router.post("/send")
+        @query_budget(6)
+        def send_message(...):
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    def decorate(func: Callable) -> Callable:
+        func.query_budget = max_queries
+        return func
+    
+    return decorate
+
+
+def check(stats: QueryStats):
+    """
+    Export a finished unit's stats and flag N+1 patterns and blown budgets.
+    
+    Time Complexity: O(s) where s = distinct statement shapes
+    Space Complexity: O(s)
+    
+    Raises:
+        QueryBudgetExceeded: If over budget and QUERY_BUDGET_ENFORCE is on
+    """
+    queries_per_unit.observe(stats.count, stats.label)
+    db_seconds_per_unit.observe(stats.seconds, stats.label)
+    
+    repeated = stats.repeated(settings.QUERY_REPEAT_THRESHOLD)
+    if repeated:
+        repeated_queries.inc(stats.label)
+        for shape, times in repeated.items():
+            logger.warning("Possible N+1 in %s: %sx %s", stats.label, times, shape[:200],
+                           extra={"event": "db.repeated_query", "endpoint": stats.label})
+    
+    if stats.budget is not None and stats.count > stats.budget:
+        budget_exceeded.inc(stats.label)
+        message = f"{stats.label} issued {stats.count} SQL statements, budget is {stats.budget}"
+        if settings.QUERY_BUDGET_ENFORCE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message, extra={"event": "db.query_budget_exceeded", "endpoint": stats.label})
+
+
+@contextmanager
+def track_queries(label: str, budget: Optional[int] = None):
+    """
+    Collect the statements issued inside a with-block, then check() them.
+    
+    The label and budget can still be set on the yielded stats inside the
+    block, e.g. once the request has been routed.
+    
+    Time Complexity: O(q) where q = statements issued
+    Space Complexity: O(s) where s = distinct statement shapes
+    
+    Args:
+        label: Endpoint name for metrics and warnings
+        budget: Optional maximum number of statements
+    """
+    stats = QueryStats(label, budget)
+    token = _current.set(stats)
+    
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    
+    check(stats)
@@ -0,0 +1,117 @@
+from typing import Dict, Hashable, Tuple
+import threading
+import time
+from src.config import get_settings
+
+settings = get_settings()
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets keyed by (user, action).
+    
+    Each action has a refill rate (tokens per second) and a burst size. A
+    request takes one token; with none left it is refused and told how long
+    until the next token. Buckets are refilled lazily on access, so idle users
+    cost nothing, and buckets that would be full again are swept periodically.
+    
+    Sync REST endpoints run in the threadpool, so access is guarded by a lock.
+    
+    Structure:
+    - limits: {action: (rate per second, burst)}
+    - buckets: {(key, action): (tokens, last refill time)}
+    """
+    
+    # Seconds between sweeps of idle buckets
+    SWEEP_INTERVAL = 60.0
+    
+    def __init__(self, limits: Dict[str, Tuple[float, int]], enabled: bool = True):
+        """
+        Initialize rate limiter.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            limits: {action: (rate per second, burst)}
+            enabled: False turns every check into a no-op
+        
+        Raises:
+            ValueError: If a rate is not positive or a burst is below 1
+        """
+        for action, (rate, burst) in limits.items():
+            if rate <= 0 or burst < 1:
+                raise ValueError(f"Rate limit for {action} needs rate > 0 and burst >= 1, got ({rate}, {burst})")
+        
+        self.limits = limits
+        self.enabled = enabled
+        self.buckets: Dict[Tuple[Hashable, str], Tuple[float, float]] = {}
+        self.lock = threading.Lock()
+        self.last_sweep = time.monotonic()
+    
+    
+    def check(self, key: Hashable, action: str) -> float:
+        """
+        Take a token for an action if one is available.
+        
+        Time Complexity: O(1) amortized
+        Space Complexity: O(1)
+        
+        Args:
+            key: Who is acting, usually the user ID
+            action: Action name from limits
+        
+        Returns:
+            0.0 if allowed, otherwise seconds until a token is available
+        """
+        if not self.enabled or action not in self.limits:
+            return 0.0
+        
+        rate, burst = self.limits[action]
+        now = time.monotonic()
+        
+        with self.lock:
+            tokens, last = self.buckets.get((key, action), (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            
+            if tokens >= 1:
+                self.buckets[(key, action)] = (tokens - 1, now)
+                allowed = True
+            else:
+                self.buckets[(key, action)] = (tokens, now)
+                allowed = False
+            
+            if now - self.last_sweep > self.SWEEP_INTERVAL:
+                self._sweep(now)
+        
+        return 0.0 if allowed else (1 - tokens) / rate
+    
+    
+    def _sweep(self, now: float):
+        """
+        Drop buckets that have refilled completely, they equal a fresh bucket.
+        
+        Time Complexity: O(b) where b = number of buckets
+        Space Complexity: O(b)
+        """
+        full = [
+            bucket_key for bucket_key, (tokens, last) in self.buckets.items()
+            if tokens + (now - last) * self.limits[bucket_key[1]][0] >= self.limits[bucket_key[1]][1]
+        ]
+        
+        for bucket_key in full:
+            del self.buckets[bucket_key]
+        
+        self.last_sweep = now
+
+
+# Global rate limiter instance
+rate_limiter = TokenBucketLimiter(
+    {
+        "message": (settings.RATE_LIMIT_MESSAGE_PER_SECOND, settings.RATE_LIMIT_MESSAGE_BURST),
+        "typing": (settings.RATE_LIMIT_TYPING_PER_SECOND, settings.RATE_LIMIT_TYPING_BURST),
+        "join": (settings.RATE_LIMIT_JOIN_PER_SECOND, settings.RATE_LIMIT_JOIN_BURST),
+        "rest_send": (settings.RATE_LIMIT_REST_SEND_PER_SECOND, settings.RATE_LIMIT_REST_SEND_BURST),
+    },
+    enabled=settings.RATE_LIMIT_ENABLED
+)
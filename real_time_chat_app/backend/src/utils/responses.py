@@ -0,0 +1,49 @@
+from typing import Any, Dict, Mapping, Optional
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# App-wide default: orjson encodes dicts several times faster than json.dumps
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+# One TypeAdapter per response type, built on first use
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+class ModelJSONResponse(Response):
+    """
+    JSON rendered straight from pydantic models by pydantic-core.
+    
+    Returning a Response skips FastAPI's response_model pass (dump every
+    model to a dict, validate the dicts again, jsonable_encoder, then
+    json.dumps). The models were validated when the service built them,
+    so this writes the bytes in a single pass. Keep response_model on the
+    route for the OpenAPI schema.
+    
+    Usage:
+        @router.get("/chat/{other_user_id}", response_model=List[MessageWithSender])
+        def get_chat_history(...):
+            return ModelJSONResponse(messages, List[MessageWithSender])
+    
+    Time Complexity: O(n) where n = size of the content
+    Space Complexity: O(n)
+    """
+    
+    media_type = "application/json"
+    
+    def __init__(self, content: Any, model_type: Any, status_code: int = 200,
+                 headers: Optional[Mapping[str, str]] = None):
+        # render() runs inside Response.__init__ and needs the type
+        self.model_type = model_type
+        super().__init__(content, status_code, headers)
+    
+    def render(self, content: Any) -> bytes:
+        adapter = _adapters.get(self.model_type)
+        if adapter is None:
+            adapter = _adapters[self.model_type] = TypeAdapter(self.model_type)
+        return adapter.dump_json(content)
@@ -1,14 +1,27 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import logging
+import secrets
+import uuid
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from src.config import get_settings
+from src.utils.metrics import metrics
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Password hashing context
 pwd_context = CryptContext(schemes=['bcrypt'], deprecated = "auto")
 
+# bcrypt dominates register and login latency, so track it separately
+password_hash_seconds = metrics.histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password with bcrypt",
+    ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0)
+)
+
 
 def hash_password(password : str) -> str:
     """
@@ -23,7 +36,8 @@ def hash_password(password : str) -> str:
     Returns:
         Hashed password string
     """
-    return pwd_context.hash(password)
+    with password_hash_seconds.time("hash"):
+        return pwd_context.hash(password)
 
 def verify_password(plain_password : str, hash_password : str) -> bool:
     """
@@ -39,7 +53,8 @@ def verify_password(plain_password : str, hash_password : str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hash_password)
+    with password_hash_seconds.time("verify"):
+        return pwd_context.verify(plain_password, hash_password)
 
 
 def create_access_token(data : dict, expires_delta : Optional[timedelta] = None) -> str:
@@ -98,7 +113,10 @@ def create_refresh_token(data : dict, expires_delta : Optional[timedelta] = None
 
     to_encode.update({
         "exp": expire,
-        "type": "refresh"
+        "type": "refresh",
+        # Unique per token: two logins in the same second would otherwise
+        # produce the same JWT and collide on refresh_tokens.token
+        "jti": uuid.uuid4().hex
     })
 
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -131,6 +149,26 @@ def verify_token(token : str, token_type : str = "access") -> Optional[dict]:
         return payload
     
     except JWTError as e:
-        print(f"Error {e}")
+        logger.debug("Rejected %s token: %s", token_type, e, extra={"event": "auth.invalid_token"})
         return None
 
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """
+    Check a token against ADMIN_TOKEN in constant time.
+    
+    Always False while ADMIN_TOKEN is unset, so operator features stay off.
+    
+    Time Complexity: O(n) where n = token length
+    Space Complexity: O(1)
+    
+    Args:
+        token: Value of the X-Admin-Token header, if any
+        
+    Returns:
+        True if the token grants admin access
+    """
+    if not settings.ADMIN_TOKEN or token is None:
+        return False
+    
+    return secrets.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
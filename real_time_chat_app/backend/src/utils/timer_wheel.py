@@ -0,0 +1,108 @@
+from typing import Dict, Hashable, List
+import math
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel for large numbers of coarse-grained timeouts.
+    
+    Each key lives in the slot for its deadline tick, so scheduling and
+    cancelling are O(1) and advancing only visits the slots that elapsed.
+    Deadlines further out than one rotation simply stay in their slot until
+    a later pass finds them due.
+    
+    Structure:
+    - slots: [{key: deadline}, ...] of length num_slots
+    - locations: {key: slot index}
+    """
+    
+    def __init__(self, tick_seconds: float, num_slots: int = 512, now: float = 0.0):
+        """
+        Initialize timer wheel.
+        
+        Time Complexity: O(s) where s = num_slots
+        Space Complexity: O(s)
+        
+        Args:
+            tick_seconds: Resolution of the wheel
+            num_slots: Number of slots in one rotation
+            now: Current time on the same clock used for deadlines
+        """
+        self.tick_seconds = tick_seconds
+        self.slots: List[Dict[Hashable, float]] = [{} for _ in range(num_slots)]
+        self.locations: Dict[Hashable, int] = {}
+        self.current_tick = int(now / tick_seconds)
+    
+    
+    def __len__(self) -> int:
+        return len(self.locations)
+    
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.locations
+    
+    
+    def schedule(self, key: Hashable, deadline: float):
+        """
+        Schedule (or reschedule) a key to expire at deadline.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            key: Any hashable identifier
+            deadline: Expiry time on the wheel's clock
+        """
+        self.cancel(key)
+        
+        tick = max(math.ceil(deadline / self.tick_seconds), self.current_tick + 1)
+        slot = tick % len(self.slots)
+        
+        self.slots[slot][key] = deadline
+        self.locations[key] = slot
+    
+    
+    def cancel(self, key: Hashable):
+        """
+        Remove a key from the wheel if present.
+        
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        
+        Args:
+            key: Identifier passed to schedule()
+        """
+        slot = self.locations.pop(key, None)
+        if slot is not None:
+            del self.slots[slot][key]
+    
+    
+    def advance(self, now: float) -> List[Hashable]:
+        """
+        Move the wheel forward to now and pop every key that is due.
+        
+        Time Complexity: O(t + e) where t = elapsed ticks (max num_slots), e = keys in visited slots
+        Space Complexity: O(x) where x = expired keys
+        
+        Args:
+            now: Current time on the wheel's clock
+        
+        Returns:
+            Keys whose deadline has passed
+        """
+        target_tick = int(now / self.tick_seconds)
+        ticks = min(target_tick - self.current_tick, len(self.slots))
+        expired = []
+        
+        for offset in range(1, ticks + 1):
+            slot = self.slots[(self.current_tick + offset) % len(self.slots)]
+            due = [key for key, deadline in slot.items() if deadline <= now]
+            
+            for key in due:
+                del slot[key]
+                del self.locations[key]
+            
+            expired.extend(due)
+        
+        self.current_tick = max(self.current_tick, target_tick)
+        return expired
@@ -0,0 +1,138 @@
+from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import time
+from src.config import get_settings
+from src.utils.metrics import metrics
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+stage_seconds = metrics.histogram(
+    "stage_duration_seconds",
+    "Time spent per stage of a WebSocket frame or HTTP request",
+    ("operation", "stage")
+)
+
+
+class Trace:
+    """
+    Stage timings of one unit of work (a WebSocket frame or HTTP request).
+    
+    Structure:
+    - operation: "ws:message", "GET /messages/chats", ...
+    - stages: {stage: total seconds}, in order of first use
+    - spans: (stage, offset, seconds) per span, for trace events
+    """
+    
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.spans: List[Tuple[str, float, float]] = []
+    
+    def add(self, stage: str, start: float, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.spans.append((stage, start - self.start, seconds))
+    
+    def server_timing(self) -> str:
+        """
+        Stages as a Server-Timing header value, durations in ms.
+        
+        Time Complexity: O(s) where s = distinct stages
+        Space Complexity: O(s)
+        """
+        return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items())
+
+
+# Trace of the frame or request running in the current context (copied
+# into the threadpool, so sync routes add to the same trace)
+_current: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace being collected for the current frame or request, if any"""
+    return _current.get()
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a stage of the current trace.
+    
+    Outside a trace this only costs one context variable lookup, so spans
+    can sit in shared code (repositories) used by every caller.
+    
+    Usage:
+        with span("commit"):
+            db.commit()
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    trace_ = _current.get()
+    if trace_ is None:
+        yield
+        return
+    
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace_.add(stage, start, time.perf_counter() - start)
+
+
+def finish(trace_: Trace):
+    """
+    Record a finished trace in the stage histograms and, if enabled, log it.
+    
+    Time Complexity: O(s) where s = spans
+    Space Complexity: O(s)
+    """
+    for stage, seconds in trace_.stages.items():
+        stage_seconds.observe(seconds, trace_.operation, stage)
+    
+    if not settings.TRACE_EVENTS_ENABLED:
+        return
+    
+    total_ms = (time.perf_counter() - trace_.start) * 1000
+    if total_ms >= settings.TRACE_EVENTS_MIN_MS:
+        logger.info("Trace %s took %.2f ms", trace_.operation, total_ms, extra={
+            "event": "trace",
+            "operation": trace_.operation,
+            "total_ms": round(total_ms, 3),
+            "spans": [
+                {"stage": stage, "start_ms": round(offset * 1000, 3), "dur_ms": round(seconds * 1000, 3)}
+                for stage, offset, seconds in trace_.spans
+            ]
+        })
+
+
+@contextmanager
+def trace(operation: str):
+    """
+    Collect the spans run inside a with-block into one trace, then finish() it.
+    
+    The operation can still be renamed on the yielded trace inside the
+    block, e.g. once the frame type or route is known.
+    
+    Time Complexity: O(s) where s = spans
+    Space Complexity: O(s)
+    
+    Args:
+        operation: Label for the stage histograms and trace events
+    """
+    trace_ = Trace(operation)
+    if not settings.TRACING_ENABLED:
+        # Spans see no trace and cost nothing
+        yield trace_
+        return
+    
+    token = _current.set(trace_)
+    
+    try:
+        yield trace_
+    finally:
+        _current.reset(token)
+        finish(trace_)
@@ -187,4 +187,20 @@ def test_logout(client, test_user_data):
     
     # Try to use refresh token again (should fail)
     refresh_response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
-    assert refresh_response.status_code == 401
\ No newline at end of file
+    assert refresh_response.status_code == 401
+
+def test_refresh_tokens_are_unique(client, test_user_data):
+    """
+    Test that tokens issued in the same second don't collide.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    register = client.post("/auth/register", json=test_user_data)
+    login = client.post("/auth/login", json={
+        "username": test_user_data["username"],
+        "password": test_user_data["password"]
+    })
+    
+    assert login.status_code == 200
+    assert login.json()["tokens"]["refresh_token"] != register.json()["tokens"]["refresh_token"]
@@ -154,6 +154,102 @@ def test_get_all_chats(client, test_user_data, test_user2_data):
     assert chats[0]["other_user_id"] == user2_id
 
 
+
+def test_get_all_chats_last_message_and_unread(client, test_user_data, test_user2_data):
+    """
+    Test that the inbox shows the latest message and unread count, and
+    that opening the chat clears the count.
+    
+    Time Complexity: O(n) where n = number of messages
+    Space Complexity: O(n)
+    """
+    token1 = register_and_login(client, test_user_data)
+    token2 = register_and_login(client, test_user2_data)
+    headers1 = {"Authorization": f"Bearer {token1}"}
+    headers2 = {"Authorization": f"Bearer {token2}"}
+    
+    user1_id = client.get("/auth/me", headers=headers1).json()["id"]
+    user2_id = client.get("/auth/me", headers=headers2).json()["id"]
+    
+    # Opening a chat for the first time creates the room
+    response = client.get(f"/messages/chat/{user2_id}", headers=headers1)
+    assert response.status_code == 200
+    assert response.json() == []
+    
+    for i in range(12):
+        client.post(
+            "/messages/send",
+            json={"recipient_id": user2_id, "content": f"Message {i}"},
+            headers=headers1
+        )
+    
+    chats = client.get("/messages/chats", headers=headers2).json()
+    assert len(chats) == 1
+    assert chats[0]["other_user_id"] == user1_id
+    assert chats[0]["other_user_username"] == test_user_data["username"]
+    assert chats[0]["last_message"] == "Message 11"
+    assert chats[0]["unread_count"] == 12
+    
+    # History shows the read state from before this visit, with senders
+    messages = client.get(f"/messages/chat/{user1_id}", headers=headers2).json()
+    assert [m["seq"] for m in messages] == list(range(1, 13))
+    assert all(m["sender_username"] == test_user_data["username"] for m in messages)
+    assert not any(m["is_read"] for m in messages)
+    
+    chats = client.get("/messages/chats", headers=headers2).json()
+    assert chats[0]["unread_count"] == 0
+
+
+def test_export_room_history(client, test_user_data, test_user2_data, monkeypatch):
+    """
+    Test exporting a room as NDJSON, plain and gzipped, members only.
+    
+    Time Complexity: O(n) where n = number of messages
+    Space Complexity: O(n)
+    """
+    import gzip
+    import json
+    from src.config import get_settings
+    
+    token1 = register_and_login(client, test_user_data)
+    token2 = register_and_login(client, test_user2_data)
+    headers1 = {"Authorization": f"Bearer {token1}"}
+    
+    user2_id = client.get("/auth/me", headers={"Authorization": f"Bearer {token2}"}).json()["id"]
+    
+    for i in range(7):
+        response = client.post(
+            "/messages/send",
+            json={"recipient_id": user2_id, "content": f"Message {i}"},
+            headers=headers1
+        )
+    room_id = response.json()["data"]["chat_room_id"]
+    
+    # Several batches, to cover chunking
+    monkeypatch.setattr(get_settings(), "EXPORT_BATCH_SIZE", 3)
+    response = client.get(f"/messages/rooms/{room_id}/export", headers=headers1)
+    gzipped = client.get(f"/messages/rooms/{room_id}/export?gzip=true", headers=headers1)
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert f"room-{room_id}.ndjson" in response.headers["content-disposition"]
+    
+    lines = [json.loads(line) for line in response.content.decode().splitlines()]
+    assert [line["seq"] for line in lines] == list(range(1, 8))
+    assert lines[-1]["content"] == "Message 6"
+    assert lines[0]["sender_username"] == test_user_data["username"]
+    
+    assert gzipped.status_code == 200
+    assert gzipped.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(gzipped.content) == response.content
+    
+    # Someone outside the room
+    outsider = {"username": "outsider_export", "email": "outsider_export@example.com",
+                "password": "testpass123", "full_name": "Outsider"}
+    token3 = register_and_login(client, outsider)
+    response = client.get(f"/messages/rooms/{room_id}/export", headers={"Authorization": f"Bearer {token3}"})
+    assert response.status_code == 403
+
 def test_unauthorized_send_message(client, test_user_data):
     """
     Test sending message without authentication fails.
@@ -0,0 +1,65 @@
+import json
+import logging
+import queue
+from src.utils.log import JsonFormatter, SamplingFilter, NonBlockingQueueHandler, dropped_records
+
+
+def _record(level=logging.INFO, msg="User %s joined room %s", args=(1, 2), **extra) -> logging.LogRecord:
+    record = logging.LogRecord("src.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter():
+    """
+    Test that records render as one JSON object with their extra fields.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    line = JsonFormatter().format(_record(event="ws.join_room", user_id=1, room_id=2))
+    entry = json.loads(line)
+    
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "src.test"
+    assert entry["message"] == "User 1 joined room 2"
+    assert entry["event"] == "ws.join_room"
+    assert entry["user_id"] == 1 and entry["room_id"] == 2
+    assert entry["ts"].endswith("Z")
+    assert "\n" not in line
+
+
+def test_sampling_filter():
+    """
+    Test that sampled events are dropped but warnings always pass.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    sampler = SamplingFilter({"ws.join_room": 0.0, "ws.connect": 1.0})
+    
+    assert not sampler.filter(_record(event="ws.join_room"))
+    assert sampler.filter(_record(level=logging.WARNING, event="ws.join_room"))
+    assert sampler.filter(_record(event="ws.leave_room"))
+    
+    kept = _record(event="ws.connect")
+    assert sampler.filter(kept)
+    assert kept.sample_rate == 1.0
+
+
+def test_queue_handler_never_blocks():
+    """
+    Test that a full log queue drops records instead of waiting.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    before = dropped_records.totals().get((), 0)
+    
+    handler.handle(_record())
+    handler.handle(_record())
+    
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "User 1 joined room 2" and queued.args is None
+    assert dropped_records.totals()[()] == before + 1
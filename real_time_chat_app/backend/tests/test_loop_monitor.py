@@ -0,0 +1,37 @@
+import asyncio
+import time
+from src.services.loop_monitor import LoopLagMonitor, loop_blocked
+
+
+def _blocking_call(seconds: float):
+    """Stands in for a sync database call made from an async handler"""
+    time.sleep(seconds)
+
+
+def test_blocking_call_is_measured_and_captured():
+    """
+    Test that a stall shows up as lag and its stack names the blocking call.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.1)
+    
+    async def scenario():
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        _blocking_call(0.4)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    
+    asyncio.run(scenario())
+    
+    assert monitor.max_lag >= 0.3
+    assert len(monitor.stalls) == 1
+    
+    stall = monitor.stalls[0]
+    assert "_blocking_call" in stall["site"]
+    assert "time.sleep(seconds)" in stall["stack"]
+    assert loop_blocked.totals()[(stall["site"],)] >= 1
+    assert monitor.get_stats()["recent_blocking_sites"] == [stall["site"]]
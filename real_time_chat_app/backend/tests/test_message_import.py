@@ -0,0 +1,97 @@
+import io
+import json
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from src.database import Base
+from src.db.bulk_load import deferrable_indexes
+from src.db.message_import import MessageImporter, read_csv, read_ndjson
+from src.models import ChatRoom, Message, User
+
+
+def _target(tmp_path):
+    """A file database with two users and a room that already has 2 messages"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    Base.metadata.create_all(bind=engine)
+    
+    with Session(engine) as db:
+        db.add_all([
+            User(id=1, username="alice", email="alice@example.com", hashed_password="x"),
+            User(id=2, username="bob", email="bob@example.com", hashed_password="x"),
+            ChatRoom(id=10, room_type="group", name="Imported", last_message_seq=2),
+        ])
+        db.commit()
+    
+    return engine
+
+
+def test_import_maps_ids_and_continues_sequences(tmp_path):
+    """
+    Test that external ids are mapped, seq continues per room and bad
+    records are skipped and counted.
+    
+    Time Complexity: O(n) where n = records
+    Space Complexity: O(n)
+    """
+    engine = _target(tmp_path)
+    records = [
+        {"chat_room_id": "general", "sender_id": "u-alice", "content": "first", "created_at": "2020-01-01T10:00:00Z"},
+        {"chat_room_id": "general", "sender_id": "u-bob", "content": "second", "created_at": "2020-01-01T11:00:00+01:00",
+         "is_read": False},
+        {"chat_room_id": "general", "sender_id": None, "content": "system", "created_at": "2020-01-01T10:30:00"},
+        {"chat_room_id": "random", "sender_id": "u-alice", "content": "no such room", "created_at": "2020-01-01T10:00:00"},
+        {"chat_room_id": "general", "sender_id": "u-carol", "content": "no such user", "created_at": "2020-01-01T10:00:00"},
+        {"chat_room_id": "general", "sender_id": "u-alice", "content": "bad date", "created_at": "yesterday"},
+    ]
+    stream = io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+    
+    importer = MessageImporter(
+        engine,
+        user_map={"u-alice": 1, "u-bob": 2},
+        room_map={"general": 10, "random": 99},
+        chunk_size=2,
+        batch_size=2
+    )
+    stats = importer.run(read_ndjson(stream), defer_indexes=True)
+    
+    assert stats.consumed == 6
+    assert stats.loaded == 3
+    assert stats.skipped == {"unknown_room": 1, "unknown_sender": 1, "bad_record": 1}
+    
+    with Session(engine) as db:
+        messages = db.execute(select(Message).order_by(Message.seq)).scalars().all()
+        assert [(m.seq, m.sender_id, m.content) for m in messages] == [
+            (3, 1, "first"), (4, 2, "second"), (5, None, "system")
+        ]
+        assert [m.is_read for m in messages] == [True, False, True]
+        assert messages[1].created_at.hour == 10  # converted to UTC
+        assert db.get(ChatRoom, 10).last_message_seq == 5
+    
+    # Deferred indexes were rebuilt
+    with engine.connect() as conn:
+        names = {name for name, _ in deferrable_indexes(conn, "messages")}
+    assert "ix_messages_created_at" in names
+
+
+def test_import_csv_with_resume(tmp_path):
+    """
+    Test CSV input without id maps, resuming past already loaded records.
+    
+    Time Complexity: O(n) where n = records
+    Space Complexity: O(n)
+    """
+    engine = _target(tmp_path)
+    stream = io.StringIO(
+        "chat_room_id,sender_id,content,created_at,is_read\n"
+        "10,1,already loaded,2020-01-01 10:00:00,true\n"
+        "10,2,hello,2020-01-01 10:01:00,false\n"
+        "10,,bye,2020-01-01 10:02:00,\n"
+    )
+    
+    stats = MessageImporter(engine).run(read_csv(stream), skip=1)
+    
+    assert stats.consumed == 3
+    assert stats.loaded == 2
+    
+    with Session(engine) as db:
+        rows = db.execute(select(Message.seq, Message.sender_id, Message.is_read).order_by(Message.seq)).all()
+        assert [tuple(row) for row in rows] == [(3, 2, False), (4, None, True)]
@@ -0,0 +1,87 @@
+import threading
+import pytest
+from src.utils.metrics import MetricsRegistry
+
+
+def test_histogram_and_counter_render():
+    """
+    Test the Prometheus text output of the in-house registry.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    frames = registry.counter("frames_total", "Frames", ("type",))
+    registry.callback("queued", "Queued frames", lambda: 3)
+    
+    latency.observe(0.05, "/a")
+    latency.observe(0.5, "/a")
+    latency.observe(5.0, "/a")
+    frames.inc('say "hi"', amount=1234567)
+    
+    output = registry.render()
+    
+    assert "# TYPE latency_seconds histogram" in output
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in output
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in output
+    assert 'latency_seconds_count{route="/a"} 3' in output
+    assert 'latency_seconds_sum{route="/a"} 5.55' in output
+    assert 'frames_total{type="say \\"hi\\""} 1234567' in output
+    assert "queued 3" in output
+
+
+
+def test_exited_threads_are_folded_into_totals():
+    """
+    Test that values from threads that have exited are kept while their
+    per-thread shards are dropped, so short-lived workers don't pile up.
+    
+    Time Complexity: O(t) where t = threads
+    Space Complexity: O(1)
+    """
+    registry = MetricsRegistry()
+    frames = registry.counter("frames_total", "Frames", ("type",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    
+    def work():
+        frames.inc("message", amount=2)
+        latency.observe(0.5)
+    
+    for _ in range(50):
+        worker = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+        # A new thread only registers after the previous one was retired
+        assert len(frames.data.shards) <= 1
+    
+    frames.inc("message")
+    
+    assert frames.totals() == {("message",): 101.0}
+    assert latency.totals()[()][:3] == [0, 50, 0]
+    assert len(frames.data.shards) == 1
+    assert len(latency.data.shards) == 0
+
+
+def test_metrics_endpoint(client, test_user_data):
+    """
+    Test that /metrics reports HTTP latency by route template.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    register = client.post("/auth/register", json=test_user_data)
+    token = register.json()["tokens"]["access_token"]
+    client.get("/messages/chat/12345", headers={"Authorization": f"Bearer {token}"})
+    
+    response = client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/auth/register",status="201"}' in body
+    assert 'route="/messages/chat/{other_user_id}"' in body
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in body
+    assert "ws_connections_active 0" in body
+    assert "db_pool_checked_out" in body
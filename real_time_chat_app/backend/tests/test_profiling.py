@@ -0,0 +1,143 @@
+import cProfile
+import json
+import pstats
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.config import get_settings
+from src.middleware import profiling
+from src.middleware.profiling import ProfilingMiddleware, instrument_routes
+
+
+def _slow_inbox():
+    return sum(i * i for i in range(10000))
+
+
+def _profiled_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    
+    @app.get("/chats/{user_id}")
+    def get_user_chats(user_id: int):
+        return {"total": _slow_inbox()}
+    
+    instrument_routes(app)
+    return app
+
+
+def test_profile_on_admin_header(tmp_path, monkeypatch):
+    """
+    Test that an admin-requested profile includes the threadpool work of a sync route.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    settings = get_settings()
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "ops-secret")
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_PERCENT", 0.0)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    client = TestClient(_profiled_app())
+    
+    # Without the admin token the header is ignored
+    response = client.get("/chats/1", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert "x-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+    
+    response = client.get("/chats/1", headers={"X-Profile": "1", "X-Admin-Token": "ops-secret"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    
+    metadata = json.loads((tmp_path / f"{profile_id}.json").read_text())
+    assert metadata["route"] == "/chats/{user_id}"
+    assert metadata["path"] == "/chats/1"
+    assert metadata["status"] == 200
+    assert metadata["threadpool_ms"] > 0
+    
+    stats = pstats.Stats(str(tmp_path / f"{profile_id}.prof"))
+    assert any(name == "_slow_inbox" for _, _, name in stats.stats)
+
+
+def test_profile_sampling(tmp_path, monkeypatch):
+    """
+    Test that sampled requests are profiled without the header.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    settings = get_settings()
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_PERCENT", 100.0)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    client = TestClient(_profiled_app())
+    
+    response = client.get("/chats/2")
+    
+    assert "x-profile-id" not in response.headers
+    (metadata_file,) = tmp_path.glob("*.json")
+    assert json.loads(metadata_file.read_text())["reason"] == "sampled"
+
+
+class _OneProfilerAtATime(cProfile.Profile):
+    """cProfile as on Python 3.12+: a second active profiler raises ValueError"""
+    
+    active = None
+    
+    def enable(self, *args, **kwargs):
+        if _OneProfilerAtATime.active is not None:
+            raise ValueError("Another profiling tool is already active")
+        _OneProfilerAtATime.active = self
+        super().enable(*args, **kwargs)
+    
+    def disable(self):
+        # Also called again by pstats through create_stats()
+        super().disable()
+        if _OneProfilerAtATime.active is self:
+            _OneProfilerAtATime.active = None
+
+
+def test_sync_endpoint_profiled_during_loop_profile_with_one_profiler(tmp_path, monkeypatch):
+    """
+    Test that with a process-wide profiler (3.12+) a sync endpoint running
+    under the request's loop profile doesn't start a second profiler.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    settings = get_settings()
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "ops-secret")
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_PERCENT", 0.0)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "_PROCESS_WIDE_PROFILER", True)
+    monkeypatch.setattr(profiling.cProfile, "Profile", _OneProfilerAtATime)
+    client = TestClient(_profiled_app())
+    
+    response = client.get("/chats/1", headers={"X-Profile": "1", "X-Admin-Token": "ops-secret"})
+    
+    assert response.status_code == 200
+    metadata = json.loads((tmp_path / f"{response.headers['x-profile-id']}.json").read_text())
+    assert metadata["loop_profiled"] is True
+    assert metadata["threadpool_ms"] > 0
+    assert _OneProfilerAtATime.active is None
+    assert not profiling._profiler_slot.locked()
+
+
+def test_profile_id_header_added_to_tuple_headers(tmp_path, monkeypatch):
+    """
+    Test X-Profile-Id is added when the app sends its headers as a tuple.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    settings = get_settings()
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "ops-secret")
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_PERCENT", 0.0)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": ((b"x-app", b"1"),)})
+        await send({"type": "http.response.body", "body": b""})
+    
+    client = TestClient(ProfilingMiddleware(app))
+    response = client.get("/", headers={"X-Profile": "1", "X-Admin-Token": "ops-secret"})
+    
+    assert response.status_code == 204
+    assert response.headers["x-app"] == "1"
+    assert "x-profile-id" in response.headers
@@ -0,0 +1,70 @@
+import pytest
+from src.config import get_settings
+from src.models import User
+from src.utils.query_tracker import track_queries, statement_shape, QueryBudgetExceeded
+
+
+def test_repeated_statements_flagged(db_session):
+    """
+    Test that one query per row (N+1) is caught as a repeated statement shape.
+    
+    Time Complexity: O(n) where n = users loaded
+    Space Complexity: O(n)
+    """
+    threshold = get_settings().QUERY_REPEAT_THRESHOLD
+    users = [User(username=f"n1user{i}", email=f"n1user{i}@example.com", hashed_password="x") for i in range(threshold)]
+    db_session.add_all(users)
+    db_session.commit()
+    user_ids = [user.id for user in users]
+    
+    with track_queries("test:n_plus_one") as stats:
+        for user_id in user_ids:
+            db_session.query(User).filter(User.id == user_id).first()
+    
+    assert stats.count == threshold
+    assert len(stats.repeated(threshold)) == 1
+    
+    # One batched query instead
+    with track_queries("test:batched") as stats:
+        db_session.query(User).filter(User.id.in_(user_ids)).all()
+    
+    assert stats.count == 1
+    assert not stats.repeated(2)
+    assert statement_shape("SELECT 1 WHERE id IN (?, ?,\n ?)") == statement_shape("SELECT 1 WHERE id IN (?)")
+
+
+def test_query_budget_enforced(db_session, monkeypatch):
+    """
+    Test that going over a budget raises when enforcement is on.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    monkeypatch.setattr(get_settings(), "QUERY_BUDGET_ENFORCE", True)
+    
+    with track_queries("test:within", budget=2) as stats:
+        db_session.query(User).count()
+        db_session.query(User).first()
+    assert stats.count == 2
+    
+    with pytest.raises(QueryBudgetExceeded):
+        with track_queries("test:over", budget=1):
+            db_session.query(User).count()
+            db_session.query(User).first()
+
+
+def test_route_query_counts(client, test_user_data):
+    """
+    Test that HTTP requests are counted under their route template.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    register = client.post("/auth/register", json=test_user_data)
+    token = register.json()["tokens"]["access_token"]
+    client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    
+    body = client.get("/metrics").text
+    
+    assert 'db_queries_per_request_bucket{endpoint="GET /auth/me",le="1"}' in body
+    assert 'db_queries_per_request_count{endpoint="POST /auth/register"}' in body
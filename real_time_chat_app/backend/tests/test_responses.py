@@ -0,0 +1,21 @@
+import json
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from benchmarks.bench_serialization import build_page
+from src.schemas.message import MessageWithSender
+from src.utils.responses import ModelJSONResponse
+
+
+def test_model_json_response_matches_response_model():
+    """
+    Test that ModelJSONResponse writes the same JSON as the response_model path.
+    
+    Time Complexity: O(n) where n = messages
+    Space Complexity: O(n)
+    """
+    page = build_page(20, seed=3)
+    response = ModelJSONResponse(page, List[MessageWithSender], headers={"x-test": "1"})
+    
+    assert response.media_type == "application/json"
+    assert response.headers["x-test"] == "1"
+    assert json.loads(response.body) == jsonable_encoder(page)
@@ -0,0 +1,74 @@
+from fastapi.testclient import TestClient
+from src.middleware.server_timing import ServerTimingMiddleware
+from src.utils.tracing import stage_seconds
+from tests.test_websocket import register_user, receive_frame, create_group_with_messages
+
+
+def test_rest_routes_send_server_timing(client, test_user_data, test_user2_data):
+    """
+    Test that REST responses break their time down in Server-Timing.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token1, _ = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], [])
+    
+    response = client.post(
+        "/groups/send",
+        json={"group_id": group_id, "content": "Timed"},
+        headers={"Authorization": f"Bearer {token1}"}
+    )
+    
+    stages = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert stages == ["membership", "insert", "commit", "refresh", "app"]
+    assert ("POST /groups/send", "commit") in stage_seconds.totals()
+
+
+
+def test_server_timing_added_to_tuple_headers():
+    """
+    Test Server-Timing is added when the app sends its headers as a tuple.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": ((b"x-app", b"1"),)})
+        await send({"type": "http.response.body", "body": b""})
+    
+    response = TestClient(ServerTimingMiddleware(app)).get("/")
+    
+    assert response.headers["x-app"] == "1"
+    assert response.headers["server-timing"].startswith("app;dur=")
+
+
+def test_websocket_message_stages(client, test_user_data, test_user2_data):
+    """
+    Test that a message frame is timed stage by stage.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token1, _ = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], [])
+    # Bucket counts are all but the trailing sum
+    before = {labels: sum(entry[:-1]) for labels, entry in stage_seconds.totals().items()}
+    
+    with client.websocket_connect(f"/ws/{token1}") as websocket:
+        receive_frame(websocket)
+        websocket.send_json({"type": "join_room", "room_id": group_id})
+        receive_frame(websocket)
+        websocket.send_json({"type": "message", "room_id": group_id, "content": "Traced"})
+        assert receive_frame(websocket)["type"] == "new_message"
+        
+        # Frames are handled in order, so the message's trace is done by now
+        websocket.send_json({"type": "ping"})
+        assert receive_frame(websocket)["type"] == "pong"
+    
+    totals = stage_seconds.totals()
+    for stage in ("parse", "membership", "insert", "commit", "refresh", "build_frame", "broadcast"):
+        labels = ("ws:message", stage)
+        assert sum(totals[labels][:-1]) == before.get(labels, 0) + 1
@@ -0,0 +1,681 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from src.config import get_settings
+from src.services.presence_service import presence_service
+from src.services.websocket_manager import manager
+from src.services.outbound_queue import OutboundQueue
+from src.utils.rate_limiter import TokenBucketLimiter, rate_limiter
+from src.services.admission_control import admission_controller
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    """Presence and rate limits are process-wide, so start every test clean"""
+    presence_service.reset()
+    rate_limiter.buckets.clear()
+    admission_controller.limiter.buckets.clear()
+    yield
+
+
+@pytest.fixture
+def admin_headers(monkeypatch):
+    """Headers that pass the X-Admin-Token check for operator-only endpoints"""
+    monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", "ops-secret")
+    return {"X-Admin-Token": "ops-secret"}
+
+
+def register_user(client, user_data):
+    """Helper to register a user and return (token, user_id)"""
+    response = client.post("/auth/register", json=user_data)
+    data = response.json()
+    return data["tokens"]["access_token"], data["user"]["id"]
+
+
+def receive_frame(websocket):
+    """Helper to receive the next frame, skipping presence diffs pushed by the background tick"""
+    while True:
+        frame = websocket.receive_json()
+        if frame["type"] != "presence":
+            return frame
+
+
+def create_group_with_messages(client, token, member_ids, contents):
+    """Helper to create a group and post messages to it, returns (group_id, message_ids)"""
+    group_response = client.post(
+        "/groups/create",
+        json={"name": "WebSocket Group", "member_ids": member_ids},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    group_id = group_response.json()["group"]["id"]
+    
+    message_ids = []
+    for content in contents:
+        response = client.post(
+            "/groups/send",
+            json={"group_id": group_id, "content": content},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        message_ids.append(response.json()["data"]["id"])
+    
+    return group_id, message_ids
+
+
+def test_join_room_replays_missed_messages(client, test_user_data, test_user2_data):
+    """
+    Test join_room with since_message_id streams only the missed messages.
+    
+    Time Complexity: O(n) where n = number of messages
+    Space Complexity: O(n)
+    """
+    token1, _ = register_user(client, test_user_data)
+    token2, user2_id = register_user(client, test_user2_data)
+    
+    group_id, message_ids = create_group_with_messages(
+        client, token1, [user2_id], ["Message 1", "Message 2", "Message 3"]
+    )
+    
+    with client.websocket_connect(f"/ws/{token2}") as websocket:
+        assert receive_frame(websocket)["type"] == "connected"
+        
+        websocket.send_json({
+            "type": "join_room",
+            "room_id": group_id,
+            "since_message_id": message_ids[0]
+        })
+        
+        assert receive_frame(websocket)["type"] == "room_joined"
+        
+        history = receive_frame(websocket)
+        assert history["type"] == "message_history"
+        assert [m["content"] for m in history["messages"]] == ["Message 2", "Message 3"]
+        assert history["has_more"] is False
+        
+        assert [m["seq"] for m in history["messages"]] == [2, 3]
+        
+        complete = receive_frame(websocket)
+        assert complete["type"] == "replay_complete"
+        assert complete["last_seq"] == 3
+
+
+def test_join_room_without_since_skips_replay(client, test_user_data, test_user2_data):
+    """
+    Test plain join_room keeps the original behaviour.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token1, _ = register_user(client, test_user_data)
+    token2, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], ["Hello"])
+    
+    with client.websocket_connect(f"/ws/{token2}") as websocket:
+        receive_frame(websocket)
+        websocket.send_json({"type": "join_room", "room_id": group_id})
+        assert receive_frame(websocket)["type"] == "room_joined"
+        
+        websocket.send_json({"type": "ping"})
+        assert receive_frame(websocket)["type"] == "pong"
+
+
+
+def test_messages_get_per_room_sequence(client, test_user_data, test_user2_data):
+    """
+    Test every message gets the next sequence number of its room.
+    
+    Time Complexity: O(n) where n = number of messages
+    Space Complexity: O(n)
+    """
+    token1, _ = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    
+    group_a, _ = create_group_with_messages(client, token1, [user2_id], ["A1", "A2"])
+    group_b, _ = create_group_with_messages(client, token1, [user2_id], ["B1"])
+    
+    response = client.get(
+        f"/groups/{group_a}/messages",
+        headers={"Authorization": f"Bearer {token1}"}
+    )
+    assert [m["seq"] for m in response.json()] == [1, 2]
+    
+    response = client.get(
+        f"/groups/{group_b}/messages",
+        headers={"Authorization": f"Bearer {token1}"}
+    )
+    assert [m["seq"] for m in response.json()] == [1]
+
+
+def test_resume_session_receives_only_the_gap(client, test_user_data, test_user2_data):
+    """
+    Test a reconnecting client resumes with its token and gets only missed messages.
+    
+    Time Complexity: O(n) where n = number of missed messages
+    Space Complexity: O(n)
+    """
+    token1, _ = register_user(client, test_user_data)
+    token2, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], ["Before"])
+    
+    with client.websocket_connect(f"/ws/{token2}") as websocket:
+        resume_token = receive_frame(websocket)["resume_token"]
+        websocket.send_json({"type": "join_room", "room_id": group_id})
+        assert receive_frame(websocket)["type"] == "room_joined"
+    
+    # Sent while user 2 is away
+    with client.websocket_connect(f"/ws/{token1}") as websocket:
+        receive_frame(websocket)
+        websocket.send_json({"type": "join_room", "room_id": group_id})
+        receive_frame(websocket)
+        websocket.send_json({"type": "message", "room_id": group_id, "content": "Missed"})
+        assert receive_frame(websocket)["seq"] == 2
+    
+    with client.websocket_connect(f"/ws/{token2}") as websocket:
+        receive_frame(websocket)
+        websocket.send_json({
+            "type": "resume",
+            "resume_token": resume_token,
+            "last_seqs": {str(group_id): 1}
+        })
+        
+        resumed = receive_frame(websocket)
+        assert resumed["type"] == "resumed"
+        assert resumed["room_ids"] == [group_id]
+        
+        history = receive_frame(websocket)
+        assert [m["content"] for m in history["messages"]] == ["Missed"]
+        assert receive_frame(websocket)["type"] == "replay_complete"
+        
+        # Token is single use
+        websocket.send_json({"type": "resume", "resume_token": resume_token})
+        assert receive_frame(websocket)["type"] == "resume_failed"
+
+
+def test_typing_signals_are_coalesced(client, test_user_data, test_user2_data):
+    """
+    Test a burst of typing frames produces one aggregated typing_users frame.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token1, user1_id = register_user(client, test_user_data)
+    token2, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], [])
+    
+    with client.websocket_connect(f"/ws/{token2}") as listener:
+        receive_frame(listener)
+        listener.send_json({"type": "join_room", "room_id": group_id})
+        receive_frame(listener)
+        
+        with client.websocket_connect(f"/ws/{token1}") as typist:
+            receive_frame(typist)
+            typist.send_json({"type": "join_room", "room_id": group_id})
+            receive_frame(typist)
+            assert receive_frame(listener)["type"] == "user_joined"
+            
+            for _ in range(20):
+                typist.send_json({"type": "typing", "room_id": group_id})
+            
+            typing = receive_frame(listener)
+            assert typing["type"] == "typing_users"
+            assert typing["users"] == [{"user_id": user1_id, "username": test_user_data["username"]}]
+            
+            # Sending the message clears the typing state on the next tick
+            typist.send_json({"type": "message", "room_id": group_id, "content": "Done"})
+            assert receive_frame(listener)["type"] == "new_message"
+            
+            cleared = receive_frame(listener)
+            assert cleared["type"] == "typing_users"
+            assert cleared["users"] == []
+
+
+def test_presence_diffs_are_pushed_to_room_members(client, test_user_data, test_user2_data):
+    """
+    Test members of a shared room see a peer come online and go offline.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token1, user1_id = register_user(client, test_user_data)
+    token2, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], [])
+    
+    def receive_presence(websocket, user_id):
+        while True:
+            frame = websocket.receive_json()
+            if frame["type"] == "presence" and user_id in frame["online"] + frame["offline"]:
+                return frame
+    
+    with client.websocket_connect(f"/ws/{token2}") as listener:
+        receive_frame(listener)
+        listener.send_json({"type": "join_room", "room_id": group_id})
+        receive_frame(listener)
+        
+        with client.websocket_connect(f"/ws/{token1}") as peer:
+            receive_frame(peer)
+            
+            online = receive_presence(listener, user1_id)
+            assert online["room_id"] == group_id
+            assert user1_id in online["online"]
+        
+        offline = receive_presence(listener, user1_id)
+        assert user1_id in offline["offline"]
+
+
+def test_presence_query_is_batched(client, test_user_data, test_user2_data):
+    """
+    Test one presence query answers for many users over WebSocket and REST.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token1, user1_id = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    
+    with client.websocket_connect(f"/ws/{token1}") as websocket:
+        receive_frame(websocket)
+        
+        websocket.send_json({"type": "presence_query", "user_ids": [user1_id, user2_id]})
+        status = receive_frame(websocket)
+        
+        assert status["type"] == "presence_status"
+        assert status["online"] == [user1_id]
+        assert status["offline"] == [user2_id]
+        
+        response = client.post(
+            "/ws/presence",
+            json={"user_ids": [user1_id, user2_id]},
+            headers={"Authorization": f"Bearer {token1}"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"online": [user1_id], "offline": [user2_id]}
+
+
+def test_silent_connection_is_pinged_then_reaped(client, test_user_data, test_user2_data, monkeypatch):
+    """
+    Test a connection that never answers server pings is closed and cleaned up.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    settings = get_settings()
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_INTERVAL_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "WS_IDLE_TIMEOUT_SECONDS", 4.0)
+    
+    token1, _ = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], [])
+    
+    with client.websocket_connect(f"/ws/{token1}") as websocket:
+        user1_id = receive_frame(websocket)["user_id"]
+        websocket.send_json({"type": "join_room", "room_id": group_id})
+        receive_frame(websocket)
+        
+        assert receive_frame(websocket)["type"] == "ping"
+        
+        with pytest.raises(WebSocketDisconnect) as closed:
+            while True:
+                receive_frame(websocket)
+        
+        assert closed.value.code == 4002
+        assert user1_id not in manager.active_connections
+        assert group_id not in manager.room_connections
+
+
+def test_outbound_queue_sheds_low_priority_before_giving_up():
+    """
+    Test a full outbound buffer coalesces and drops typing/presence frames
+    before refusing a message frame.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    queue = OutboundQueue(max_frames=3)
+    
+    assert queue.put({"type": "typing_users", "room_id": 1, "users": [{"user_id": 1}]})
+    assert queue.put({"type": "typing_users", "room_id": 1, "users": []})
+    assert queue.put({"type": "presence", "room_id": 1, "online": [2], "offline": []})
+    assert queue.put({"type": "presence", "room_id": 1, "online": [3], "offline": [2]})
+    assert queue.put({"type": "new_message", "room_id": 1, "seq": 1})
+    assert len(queue) == 3
+    assert queue.coalesced == 2
+    
+    # Full: low-priority frames make room, oldest first
+    assert queue.put({"type": "new_message", "room_id": 1, "seq": 2})
+    assert queue.put({"type": "new_message", "room_id": 1, "seq": 3})
+    assert queue.dropped == 2
+    
+    # Only messages left, the client has to be disconnected
+    assert not queue.put({"type": "new_message", "room_id": 1, "seq": 4})
+    assert [frame["seq"] for frame, _ in queue.high] == [1, 2, 3]
+
+
+def test_outbound_queue_merges_presence_diffs():
+    """
+    Test queued presence diffs for a room fold into the net change.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    queue = OutboundQueue(max_frames=10)
+    
+    queue.put({"type": "presence", "room_id": 1, "online": [2, 3], "offline": []})
+    queue.put({"type": "presence", "room_id": 1, "online": [4], "offline": [3]})
+    
+    (frame, _), = queue.low.values()
+    assert frame["online"] == [2, 4]
+    assert frame["offline"] == [3]
+
+
+def test_connection_stats_report_outbound_buffers(client, test_user_data, admin_headers):
+    """
+    Test /ws/stats lists each connection's outbound buffer, for operators only.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token, user_id = register_user(client, test_user_data)
+    
+    with client.websocket_connect(f"/ws/{token}") as websocket:
+        receive_frame(websocket)
+        
+        # Operators only
+        assert client.get("/ws/stats").status_code == 403
+        assert client.get("/ws/stats", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        
+        response = client.get("/ws/stats", headers=admin_headers)
+        assert response.status_code == 200
+        
+        stats = response.json()
+        assert stats["connections"] == 1
+        assert stats["per_connection"][str(user_id)]["sent"] >= 1
+
+
+def test_msgpack_subprotocol_uses_binary_frames(client, test_user_data, test_user2_data):
+    """
+    Test a client offering the msgpack subprotocol talks MessagePack both ways.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    msgpack = pytest.importorskip("msgpack")
+    
+    token1, _ = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], [])
+    
+    def receive_binary(websocket):
+        while True:
+            frame = msgpack.unpackb(websocket.receive_bytes(), raw=False)
+            if frame["type"] != "presence":
+                return frame
+    
+    with client.websocket_connect(f"/ws/{token1}", subprotocols=["msgpack", "json"]) as websocket:
+        assert websocket.accepted_subprotocol == "msgpack"
+        assert receive_binary(websocket)["type"] == "connected"
+        
+        websocket.send_bytes(msgpack.packb({"type": "join_room", "room_id": group_id}))
+        assert receive_binary(websocket)["type"] == "room_joined"
+        
+        websocket.send_bytes(msgpack.packb({"type": "message", "room_id": group_id, "content": "Packed"}))
+        message = receive_binary(websocket)
+        assert message["type"] == "new_message"
+        assert message["content"] == "Packed"
+
+
+def test_unsupported_subprotocol_is_rejected(client, test_user_data):
+    """
+    Test a client offering only unknown subprotocols is refused.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token, _ = register_user(client, test_user_data)
+    
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect(f"/ws/{token}", subprotocols=["cbor"]):
+            pass
+    
+    assert closed.value.code == 4003
+
+
+def test_batching_sends_array_frames(client, test_user_data, test_user2_data):
+    """
+    Test a connection opting into batching receives events grouped into arrays.
+    
+    Time Complexity: O(n) where n = number of messages
+    Space Complexity: O(n)
+    """
+    token1, _ = register_user(client, test_user_data)
+    token2, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], [])
+    
+    with client.websocket_connect(f"/ws/{token2}?batch_ms=50") as listener:
+        batch = listener.receive_json()
+        assert isinstance(batch, list)
+        assert batch[0]["type"] == "connected"
+        assert batch[0]["batch_ms"] == 50
+        
+        listener.send_json({"type": "join_room", "room_id": group_id})
+        assert listener.receive_json()[0]["type"] == "room_joined"
+        
+        with client.websocket_connect(f"/ws/{token1}") as sender:
+            receive_frame(sender)
+            sender.send_json({"type": "join_room", "room_id": group_id})
+            receive_frame(sender)
+            
+            for i in range(5):
+                sender.send_json({"type": "message", "room_id": group_id, "content": f"Burst {i}"})
+            for _ in range(5):
+                receive_frame(sender)
+            
+            contents = []
+            sends = 0
+            while len(contents) < 5:
+                frames = listener.receive_json()
+                sends += 1
+                contents.extend(f["content"] for f in frames if f["type"] == "new_message")
+            
+            assert contents == [f"Burst {i}" for i in range(5)]
+            assert sends < 5
+
+
+def test_malformed_frames_get_errors_without_disconnecting(client, test_user_data, test_user2_data, admin_headers):
+    """
+    Test bad JSON, unknown types and invalid fields are answered with errors
+    while the connection keeps working.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token1, _ = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], [])
+    
+    with client.websocket_connect(f"/ws/{token1}") as websocket:
+        receive_frame(websocket)
+        
+        bad_frames = [
+            ("{not json", "Malformed frame"),
+            ('{"type": "dance"}', "Unknown message type: dance"),
+            ('{"room_id": 1}', "Missing message type"),
+            ('{"type": "join_room"}', "Invalid join_room frame: room_id"),
+            ('{"type": "message", "room_id": 1, "content": 42}', "Invalid message frame: content"),
+        ]
+        
+        for raw, expected in bad_frames:
+            websocket.send_text(raw)
+            error = receive_frame(websocket)
+            assert error["type"] == "error"
+            assert error["message"].startswith(expected)
+        
+        websocket.send_json({"type": "join_room", "room_id": group_id})
+        assert receive_frame(websocket)["type"] == "room_joined"
+    
+    stats = client.get("/ws/stats", headers=admin_headers).json()["inbound_frames"]
+    assert stats["invalid"]["errors"] >= len(bad_frames)
+    assert stats["join_room"]["count"] >= 1
+
+
+def test_token_bucket_allows_burst_then_refills(monkeypatch):
+    """
+    Test a bucket allows its burst, refuses with a retry hint, then refills.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    clock = [100.0]
+    monkeypatch.setattr("src.utils.rate_limiter.time.monotonic", lambda: clock[0])
+    
+    limiter = TokenBucketLimiter({"message": (2.0, 3)})
+    
+    assert [limiter.check(1, "message") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.check(1, "message") == pytest.approx(0.5)
+    
+    # Other users and unknown actions are unaffected
+    assert limiter.check(2, "message") == 0.0
+    assert limiter.check(1, "unlimited") == 0.0
+    
+    clock[0] += 0.5
+    assert limiter.check(1, "message") == 0.0
+    assert limiter.check(1, "message") > 0
+
+
+
+def test_token_bucket_rejects_non_positive_limits():
+    """
+    Test a zero rate or burst is refused up front instead of failing a check.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    for limits in ({"message": (0.0, 3)}, {"message": (-1.0, 3)}, {"message": (2.0, 0)}):
+        with pytest.raises(ValueError, match="message"):
+            TokenBucketLimiter(limits)
+
+
+def test_message_flood_is_throttled(client, test_user_data, test_user2_data, monkeypatch):
+    """
+    Test messages beyond the burst get throttled replies over WebSocket and 429 over REST.
+    
+    Time Complexity: O(n) where n = number of messages
+    Space Complexity: O(1)
+    """
+    monkeypatch.setitem(rate_limiter.limits, "message", (0.01, 3))
+    monkeypatch.setitem(rate_limiter.limits, "rest_send", (0.01, 2))
+    
+    token1, _ = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], ["REST 1", "REST 2"])
+    
+    response = client.post(
+        "/groups/send",
+        json={"group_id": group_id, "content": "REST 3"},
+        headers={"Authorization": f"Bearer {token1}"}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    
+    with client.websocket_connect(f"/ws/{token1}") as websocket:
+        receive_frame(websocket)
+        websocket.send_json({"type": "join_room", "room_id": group_id})
+        receive_frame(websocket)
+        
+        for i in range(4):
+            websocket.send_json({"type": "message", "room_id": group_id, "content": f"Flood {i}"})
+        
+        frames = [receive_frame(websocket) for _ in range(4)]
+        assert [f["type"] for f in frames] == ["new_message"] * 3 + ["throttled"]
+        assert frames[-1]["action"] == "message"
+        assert frames[-1]["retry_after"] > 0
+
+
+def test_connections_over_capacity_are_told_to_retry(client, test_user_data, test_user2_data, monkeypatch):
+    """
+    Test connections beyond the worker cap are closed with 1013 and a jittered retry hint.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    monkeypatch.setattr(get_settings(), "WS_MAX_CONNECTIONS", 1)
+    
+    token1, _ = register_user(client, test_user_data)
+    token2, _ = register_user(client, test_user2_data)
+    
+    with client.websocket_connect(f"/ws/{token1}") as websocket:
+        receive_frame(websocket)
+        
+        with client.websocket_connect(f"/ws/{token2}") as rejected:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                rejected.receive_json()
+        
+        assert closed.value.code == 1013
+        retry_after = float(closed.value.reason.split("retry_after=")[1])
+        assert 5.0 <= retry_after < 10.0
+        
+        # The admitted connection is unaffected
+        websocket.send_json({"type": "ping"})
+        assert receive_frame(websocket)["type"] == "pong"
+
+
+def test_fast_reconnects_are_throttled_per_user(client, test_user_data, monkeypatch):
+    """
+    Test a user reconnecting faster than allowed is turned away, and a new
+    connection replaces the user's previous one.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    monkeypatch.setitem(admission_controller.limiter.limits, "connect", (0.01, 2))
+    
+    token, _ = register_user(client, test_user_data)
+    
+    with client.websocket_connect(f"/ws/{token}") as first:
+        receive_frame(first)
+        
+        with client.websocket_connect(f"/ws/{token}") as second:
+            assert receive_frame(second)["type"] == "connected"
+            
+            with pytest.raises(WebSocketDisconnect) as replaced:
+                receive_frame(first)
+            assert replaced.value.code == 4000
+            
+            with client.websocket_connect(f"/ws/{token}") as third:
+                with pytest.raises(WebSocketDisconnect) as closed:
+                    third.receive_json()
+            
+            assert closed.value.code == 1013
+            assert "retry_after=" in closed.value.reason
+
+
+def test_idle_connection_holds_no_database_transaction(client, db_session, test_user_data, test_user2_data):
+    """
+    Test the socket's session gives its connection back after the handshake
+    and after each frame, so open sockets do not pin pool connections.
+    
+    Time Complexity: O(1)
+    Space Complexity: O(1)
+    """
+    token1, _ = register_user(client, test_user_data)
+    _, user2_id = register_user(client, test_user2_data)
+    group_id, _ = create_group_with_messages(client, token1, [user2_id], ["Hello"])
+    
+    with client.websocket_connect(f"/ws/{token1}") as websocket:
+        assert receive_frame(websocket)["type"] == "connected"
+        assert not db_session.in_transaction()
+        
+        websocket.send_json({"type": "join_room", "room_id": group_id})
+        assert receive_frame(websocket)["type"] == "room_joined"
+        
+        # The pong is only sent after the join frame has been cleaned up
+        websocket.send_json({"type": "ping"})
+        assert receive_frame(websocket)["type"] == "pong"
+        assert not db_session.in_transaction()